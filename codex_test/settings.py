@@ -61,7 +61,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "myapp.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "myapp.middleware.HoneypotFastPathMiddleware",
+    "myapp.middleware.CatchAllCaptureMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -100,6 +103,9 @@ DATABASES = {
     }
 }
 
+# Covering-index INCLUDE columns only apply on PostgreSQL; SQLite builds the key part
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -163,6 +169,99 @@ REST_FRAMEWORK = {
 }
 
 
+# Cache
+# Locmem by default; set DJANGO_CACHE_URL (e.g. filecache:///tmp/botfarm-cache or
+# rediscache://host:6379/1) to share cached responses across gunicorn workers.
+CACHES = {
+    "default": env.cache_url("DJANGO_CACHE_URL", default="locmemcache://"),
+}
+
+# Versioned response cache for the analytics endpoints (see myapp/caching.py). Its data
+# version lives in this cache, so more than one process needs a shared DJANGO_CACHE_URL
+# (check myapp.W001)
+RESPONSE_CACHE_ENABLED = env.bool("RESPONSE_CACHE_ENABLED", default=True)
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=300)
+
+# Seconds a signed honeypot correlation token carries timing (see myapp/correlation.py)
+CORRELATION_TOKEN_MAX_AGE = env.int("CORRELATION_TOKEN_MAX_AGE", default=86400)
+
+# Serve /api/bot-events/ and /api/attacks/ lists from .values() rows (see FastListMixin)
+FAST_LIST_SERIALIZATION = env.bool("FAST_LIST_SERIALIZATION", default=True)
+
+# Rows fetched per round-trip by the streaming NDJSON/CSV exports
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Heavy-hitter sketches behind /api/top/ (see myapp/sketches.py): items kept per
+# dimension, and seconds between merges of a worker's counts into the table
+HEAVY_HITTER_CAPACITY = env.int("HEAVY_HITTER_CAPACITY", default=1000)
+HEAVY_HITTER_FLUSH_INTERVAL = env.float("HEAVY_HITTER_FLUSH_INTERVAL", default=10)
+
+# HyperLogLog distinct counters behind /api/uniques/ and snapshot total_ips (see
+# myapp/distinct.py); turn off to answer with exact DISTINCT queries
+APPROXIMATE_DISTINCT_COUNTS = env.bool("APPROXIMATE_DISTINCT_COUNTS", default=True)
+DISTINCT_COUNTER_FLUSH_INTERVAL = env.float(
+    "DISTINCT_COUNTER_FLUSH_INTERVAL", default=10
+)
+
+# Monthly event partitions on PostgreSQL (see manage_partitions): months created
+# ahead of time, and months kept before partitions are detached (0 = forever)
+EVENT_PARTITION_MONTHS_AHEAD = env.int("EVENT_PARTITION_MONTHS_AHEAD", default=3)
+EVENT_RETENTION_MONTHS = env.int("EVENT_RETENTION_MONTHS", default=0)
+
+# Content-addressed payload store (see myapp/payloads.py): payloads of at least
+# this many bytes are zlib-compressed (0 = never); digests cached per worker
+PAYLOAD_COMPRESSION_THRESHOLD = env.int("PAYLOAD_COMPRESSION_THRESHOLD", default=1024)
+PAYLOAD_CACHE_SIZE = env.int("PAYLOAD_CACHE_SIZE", default=10000)
+
+# Interned dimension tables (see myapp/dimensions.py): value -> key entries each
+# worker caches per dimension
+DIMENSION_CACHE_SIZE = env.int("DIMENSION_CACHE_SIZE", default=5000)
+
+# Default prefix lengths of /api/aggregate-subnets/ (IPv6 at most 64, see myapp/subnets.py)
+SUBNET_PREFIX_V4 = env.int("SUBNET_PREFIX_V4", default=24)
+SUBNET_PREFIX_V6 = env.int("SUBNET_PREFIX_V6", default=48)
+
+# Offline geo/ASN enrichment (see myapp/geoip.py): range database or .mmdb file
+# (unset = headers only), and lookups cached per worker
+GEOIP_DATABASE = env.str("GEOIP_DATABASE", default=None)
+GEOIP_CACHE_SIZE = env.int("GEOIP_CACHE_SIZE", default=10000)
+
+# Answer honeypot paths in HoneypotFastPathMiddleware, before sessions, auth
+# and DRF (see myapp/middleware.py); False sends them through HoneypotView
+HONEYPOT_FAST_PATH = env.bool("HONEYPOT_FAST_PATH", default=True)
+
+# Record requests to paths nothing matches (CatchAllCaptureMiddleware) under a
+# normalized path capped at HONEYPOT_PATH_MAX_LENGTH; past
+# HONEYPOT_CATCH_ALL_MAX_PATHS distinct paths new ones are stored as /{other}
+HONEYPOT_CATCH_ALL = env.bool("HONEYPOT_CATCH_ALL", default=True)
+HONEYPOT_CATCH_ALL_MAX_PATHS = env.int("HONEYPOT_CATCH_ALL_MAX_PATHS", default=10000)
+HONEYPOT_PATH_MAX_LENGTH = env.int("HONEYPOT_PATH_MAX_LENGTH", default=200)
+
+# Per-route request metrics (see myapp/metrics.py): Server-Timing for staff and
+# Prometheus text at /metrics. Set METRICS_DIR to a directory shared by the
+# gunicorn workers of this host to aggregate across them. /metrics answers a valid
+# "Authorization: Bearer <METRICS_TOKEN>", a client address in
+# METRICS_ALLOWED_IPS (addresses or CIDRs, matched on REMOTE_ADDR) or a staff
+# session; with neither setting configured it is a 404 for everyone else
+METRICS_ENABLED = env.bool("METRICS_ENABLED", default=True)
+METRICS_DIR = env.str("METRICS_DIR", default=None)
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", default=10)
+METRICS_TOKEN = env.str("METRICS_TOKEN", default=None)
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=[])
+
+# On-demand profiling of API requests by staff (?_profile=1, see myapp/profiling.py).
+# Reports are written to PROFILE_DIR; each user may profile PROFILE_RATE_LIMIT
+# requests per hour and only the newest PROFILE_KEEP reports are kept
+PROFILE_DIR = env.path("PROFILE_DIR", default=BASE_DIR / "profiles")
+PROFILE_RATE_LIMIT = env.int("PROFILE_RATE_LIMIT", default=10)
+PROFILE_KEEP = env.int("PROFILE_KEEP", default=100)
+
+# Cold archive of old events (see archive_events / restore_events)
+ARCHIVE_DIR = env.path("ARCHIVE_DIR", default=BASE_DIR / "archive")
+ARCHIVE_AFTER_DAYS = env.int("ARCHIVE_AFTER_DAYS", default=30)
+
+
 CORS_ALLOWED_ORIGINS = [
     origin
     for origin in env.str("CORS_ALLOWED_ORIGINS", default="").split(",")
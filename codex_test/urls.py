@@ -15,23 +15,58 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import ipaddress
+
+from django.conf import settings
 from django.contrib import admin
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework.authentication import SessionAuthentication
 
+from myapp import metrics
+
 
 def health_check(request):
     return JsonResponse({"status": "ok"})
 
 
+def _metrics_ip_allowed(request):
+    networks = getattr(settings, "METRICS_ALLOWED_IPS", None) or []
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
+
+
+def metrics_view(request):
+    """
+    Per-route request metrics in the Prometheus text format, for a valid
+    METRICS_TOKEN, an address in METRICS_ALLOWED_IPS or a staff session.
+    Anyone else gets 401 when a token is configured and 404 otherwise.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    authorized = bool(token) and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+    if not (authorized or _metrics_ip_allowed(request) or request.user.is_staff):
+        if token:
+            return HttpResponse(status=401)
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", health_check),
     path("health/", health_check),  # Explicit health check endpoint
+    path("metrics", metrics_view, name="metrics"),
     path("", include("myapp.urls")),
 ]
 
@@ -1,7 +1,105 @@
+import json
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Count
+from django.utils.html import format_html
+
+from .models import BotEvent, AttackType, CorrelationSession
+from .aggregates import ListAgg
+from .caching import bump_data_version
+from .dimensions import DIMENSION_COLUMNS
+from .exports import BOT_EVENT_EXPORT_FIELDS, ATTACK_TYPE_EXPORT_FIELDS, stream_export
+from .pagination import EstimatedCountPaginator
+from .payloads import resolve_payload
+from .serializers import normalize_listagg
+
+
+def _dimension_text(bot_event, column):
+    """Text of an interned event column, from its dimension row."""
+    related = getattr(bot_event, DIMENSION_COLUMNS[column][0])
+    return related.value if related is not None else None
+
+
+def _export_selected(queryset, fields, file_format, basename):
+    # Re-select by pk so changelist annotations/joins are not carried into the export
+    rows = queryset.model.objects.filter(pk__in=queryset.values("pk"))
+    return stream_export(rows.order_by("-created_at"), fields, file_format, basename)
+
+
+class InvalidateResponsesMixin:
+    """Changes made in the admin invalidate cached analytics responses."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        transaction.on_commit(bump_data_version)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(bump_data_version)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(bump_data_version)
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter rendered as a text input instead of a list of links, so the
+    changelist never enumerates distinct values of high-cardinality columns.
+    """
+
+    template = "admin/input_filter.html"
+    lookup = "exact"
+
+    def lookups(self, request, model_admin):
+        # Must be non-empty for the filter to be displayed; nothing is enumerated
+        return ((None, None),)
+
+    def choices(self, changelist):
+        # Only the "All" choice, carrying the other active params as hidden inputs
+        all_choice = next(super().choices(changelist))
+        all_choice["query_parts"] = [
+            (key, value)
+            for key, values in changelist.get_filters_params().items()
+            if key != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value:
+            return queryset.filter(
+                **{f"{self.parameter_name}__{self.lookup}": value.strip()}
+            )
+        return queryset
+
+
+class IPAddressFilter(InputFilter):
+    title = "IP address"
+    parameter_name = "ip_address"
+
+
+class LanguageFilter(InputFilter):
+    title = "language"
+    parameter_name = "language"
+
+
+class TargetFieldFilter(InputFilter):
+    title = "target field"
+    parameter_name = "target_field"
+
+
+class LeanChangeList(ChangeList):
+    """ChangeList that defers the model admin's `changelist_defer` columns."""
 
-from .models import BotEvent, AttackType
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        defer = getattr(self.model_admin, "changelist_defer", ())
+        return queryset.defer(*defer) if defer else queryset
 
 
 class AttackTypeInline(admin.TabularInline):
@@ -17,15 +115,15 @@ class AttackTypeInline(admin.TabularInline):
 
 
 @admin.register(BotEvent)
-class BotEventAdmin(admin.ModelAdmin):
+class BotEventAdmin(InvalidateResponsesMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "created_at",
         "method",
-        "request_path",
+        "request_path_value",
         "email",
         "ip_address",
-        "agent",
+        "agent_value",
         "language",
         "attack_attempted",
         "attack_count",
@@ -35,27 +133,36 @@ class BotEventAdmin(admin.ModelAdmin):
         "created_at",
         "method",
         "attack_attempted",
-        "ip_address",
-        "language",
+        IPAddressFilter,
+        LanguageFilter,
     )
     search_fields = (
         "email",
         "ip_address",
-        "request_path",
-        "agent",
-        "referer",
+        "request_path_ref__value",
+        "agent_ref__value",
+        "referer_ref__value",
         "correlation_token",
     )
     readonly_fields = (
         "id",
         "created_at",
+        "request_path_value",
+        "agent_value",
+        "referer_value",
         "correlation_token",
         "attack_count",
         "attack_categories",
+        "data_details_display",
     )
     ordering = ("-created_at",)
     inlines = [AttackTypeInline]
     date_hierarchy = "created_at"
+    actions = ["export_ndjson", "export_csv"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_defer = ("data_details",)
+    list_select_related = ("request_path_ref", "agent_ref")
 
     fieldsets = (
         (
@@ -63,9 +170,9 @@ class BotEventAdmin(admin.ModelAdmin):
             {
                 "fields": (
                     "method",
-                    "request_path",
+                    "request_path_value",
                     "correlation_token",
-                    "data",
+                    "data_details_display",
                 )
             },
         ),
@@ -75,8 +182,8 @@ class BotEventAdmin(admin.ModelAdmin):
                 "fields": (
                     "ip_address",
                     "geo_location",
-                    "agent",
-                    "referer",
+                    "agent_value",
+                    "referer_value",
                     "language",
                 )
             },
@@ -108,31 +215,75 @@ class BotEventAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        qs = qs.annotate(_attack_count=Count("attacks", distinct=True))
+        qs = qs.annotate(
+            _attack_count=Count("attacks", distinct=True),
+            _attack_categories=ListAgg("attacks__category"),
+        )
         return qs
 
+    def request_path_value(self, obj):
+        """Display the request path (from its dimension row)."""
+        return _dimension_text(obj, "request_path")
+
+    request_path_value.short_description = "Request Path"
+    request_path_value.admin_order_field = "request_path_ref__value"
+
+    def agent_value(self, obj):
+        """Display the user agent (from its dimension row)."""
+        return _dimension_text(obj, "agent")
+
+    agent_value.short_description = "Agent"
+
+    def referer_value(self, obj):
+        """Display the referer (from its dimension row)."""
+        return _dimension_text(obj, "referer")
+
+    referer_value.short_description = "Referer"
+
     def attack_count(self, obj):
-        """Display count of attacks for this event."""
-        count = obj.attacks.count()
+        """Display count of attacks for this event (from the annotation)."""
+        count = obj._attack_count
         return count if count > 0 else "—"
 
     attack_count.short_description = "Attack Count"
     attack_count.admin_order_field = "_attack_count"
 
     def attack_categories(self, obj):
-        """Display attack categories found in this event."""
-        categories = obj.attacks.values_list("category", flat=True).distinct()
+        """Display attack categories found in this event (from the annotation)."""
+        categories = normalize_listagg(obj._attack_categories)
         if categories:
             return ", ".join(sorted(categories))
         return "—"
 
     attack_categories.short_description = "Attack Categories"
 
+    def data_details_display(self, obj):
+        """Submitted data, inline or from the shared payload store."""
+        value = resolve_payload(obj, "data_details")
+        if value is None:
+            return "—"
+        return format_html(
+            "<pre>{}</pre>", json.dumps(value, indent=2, cls=DjangoJSONEncoder)
+        )
+
+    data_details_display.short_description = "Data Details"
+
+    @admin.action(description="Export selected events (NDJSON)")
+    def export_ndjson(self, request, queryset):
+        return _export_selected(queryset, BOT_EVENT_EXPORT_FIELDS, "ndjson", "bot-events")
+
+    @admin.action(description="Export selected events (CSV)")
+    def export_csv(self, request, queryset):
+        return _export_selected(queryset, BOT_EVENT_EXPORT_FIELDS, "csv", "bot-events")
+
 
 @admin.register(AttackType)
-class AttackTypeAdmin(admin.ModelAdmin):
+class AttackTypeAdmin(InvalidateResponsesMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "bot_event",
@@ -147,7 +298,7 @@ class AttackTypeAdmin(admin.ModelAdmin):
     list_filter = (
         "category",
         "pattern",
-        "target_field",
+        TargetFieldFilter,
         "created_at",
         "bot_event__method",
     )
@@ -157,7 +308,7 @@ class AttackTypeAdmin(admin.ModelAdmin):
         "category",
         "raw_value",
         "bot_event__email",
-        "bot_event__request_path",
+        "bot_event__request_path_ref__value",
         "bot_event__ip_address",
     )
     readonly_fields = (
@@ -168,6 +319,12 @@ class AttackTypeAdmin(admin.ModelAdmin):
     )
     ordering = ("-created_at",)
     date_hierarchy = "created_at"
+    actions = ["export_ndjson", "export_csv"]
+    list_select_related = ("bot_event__request_path_ref",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_defer = ("full_value", "bot_event__data_details")
+    raw_id_fields = ("bot_event",)
 
     fieldsets = (
         (
@@ -200,6 +357,9 @@ class AttackTypeAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
     def bot_event_created_at(self, obj):
         """Display the bot event's created_at timestamp."""
         return obj.bot_event.created_at if obj.bot_event else None
@@ -216,7 +376,35 @@ class AttackTypeAdmin(admin.ModelAdmin):
 
     def bot_event_path(self, obj):
         """Display the bot event's request path."""
-        return obj.bot_event.request_path if obj.bot_event else None
+        return _dimension_text(obj.bot_event, "request_path") if obj.bot_event else None
 
     bot_event_path.short_description = "Request Path"
-    bot_event_path.admin_order_field = "bot_event__request_path"
+    bot_event_path.admin_order_field = "bot_event__request_path_ref__value"
+
+    @admin.action(description="Export selected attacks (NDJSON)")
+    def export_ndjson(self, request, queryset):
+        return _export_selected(queryset, ATTACK_TYPE_EXPORT_FIELDS, "ndjson", "attacks")
+
+    @admin.action(description="Export selected attacks (CSV)")
+    def export_csv(self, request, queryset):
+        return _export_selected(queryset, ATTACK_TYPE_EXPORT_FIELDS, "csv", "attacks")
+
+
+@admin.register(CorrelationSession)
+class CorrelationSessionAdmin(admin.ModelAdmin):
+    list_display = (
+        "token",
+        "first_submitted_at",
+        "request_path",
+        "ip_address",
+        "time_to_submit_ms",
+        "chars_per_second",
+        "submit_count",
+    )
+    list_filter = ("first_submitted_at", IPAddressFilter)
+    search_fields = ("token", "request_path")
+    readonly_fields = ("post_event",)
+    ordering = ("-first_submitted_at",)
+    date_hierarchy = "first_submitted_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,89 @@
+"""
+User-agent classification.
+
+Each rule is a tuple of (family, is_automation_tool, compiled_regex); the
+first matching rule wins and its `version` group, if any, is the version.
+Automation tools (HTTP libraries, scanners, headless browsers) come before
+browsers because many of them append a browser token to look like one.
+
+Agents are parsed once per distinct string when it is interned into the
+UserAgent table (see myapp/dimensions.py), so queries filter and group on
+stored columns instead of matching regexes over events.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+_V = r"(?P<version>\d+(?:\.\d+)*)"
+
+AGENT_RULES = [
+    # Scanners and recon tools
+    ("zgrab", True, re.compile(rf"\bzgrab(?:/{_V})?", re.IGNORECASE)),
+    ("masscan", True, re.compile(rf"\bmasscan(?:/{_V})?", re.IGNORECASE)),
+    ("nmap", True, re.compile(r"\bnmap\b", re.IGNORECASE)),
+    ("nuclei", True, re.compile(rf"\bnuclei(?:\s*-?\s*v?{_V})?", re.IGNORECASE)),
+    ("sqlmap", True, re.compile(rf"\bsqlmap(?:/{_V})?", re.IGNORECASE)),
+    ("nikto", True, re.compile(rf"\bnikto(?:/{_V})?", re.IGNORECASE)),
+    ("wpscan", True, re.compile(rf"\bwpscan(?:\s+v{_V})?", re.IGNORECASE)),
+    ("censys", True, re.compile(r"\bcensys", re.IGNORECASE)),
+    # HTTP clients and libraries
+    ("curl", True, re.compile(rf"^curl(?:/{_V})?", re.IGNORECASE)),
+    ("wget", True, re.compile(rf"^wget(?:/{_V})?", re.IGNORECASE)),
+    ("python-requests", True, re.compile(rf"\bpython-requests(?:/{_V})?", re.IGNORECASE)),
+    ("python-urllib", True, re.compile(rf"\bpython-urllib(?:/{_V})?", re.IGNORECASE)),
+    ("python-httpx", True, re.compile(rf"\bpython-httpx(?:/{_V})?", re.IGNORECASE)),
+    ("aiohttp", True, re.compile(rf"\baiohttp(?:/{_V})?", re.IGNORECASE)),
+    ("scrapy", True, re.compile(rf"\bscrapy(?:/{_V})?", re.IGNORECASE)),
+    ("go-http-client", True, re.compile(rf"\bgo-http-client(?:/{_V})?", re.IGNORECASE)),
+    ("okhttp", True, re.compile(rf"\bokhttp(?:/{_V})?", re.IGNORECASE)),
+    ("apache-httpclient", True, re.compile(rf"\bapache-httpclient(?:/{_V})?", re.IGNORECASE)),
+    ("java", True, re.compile(rf"^java(?:/{_V})?", re.IGNORECASE)),
+    ("libwww-perl", True, re.compile(rf"\blibwww-perl(?:/{_V})?", re.IGNORECASE)),
+    ("axios", True, re.compile(rf"\baxios(?:/{_V})?", re.IGNORECASE)),
+    ("node-fetch", True, re.compile(rf"\bnode-fetch(?:/{_V})?", re.IGNORECASE)),
+    ("postman", True, re.compile(rf"\bpostmanruntime(?:/{_V})?", re.IGNORECASE)),
+    # Headless browsers
+    ("headless-chrome", True, re.compile(rf"\bheadlesschrome(?:/{_V})?", re.IGNORECASE)),
+    ("phantomjs", True, re.compile(rf"\bphantomjs(?:/{_V})?", re.IGNORECASE)),
+    # Crawlers
+    ("crawler", True, re.compile(r"\b(?:bot|crawler|spider)\b", re.IGNORECASE)),
+    # Browsers (most specific token first)
+    ("edge", False, re.compile(rf"\bEdg(?:e|A|iOS)?/{_V}")),
+    ("opera", False, re.compile(rf"\bOPR/{_V}")),
+    ("firefox", False, re.compile(rf"\bFirefox/{_V}")),
+    ("chrome", False, re.compile(rf"\b(?:Chrome|CriOS)/{_V}")),
+    ("safari", False, re.compile(rf"\bVersion/{_V}.*\bSafari/")),
+]
+
+# (os, compiled_regex); first match wins
+OS_RULES = [
+    ("windows", re.compile(r"\bWindows\b")),
+    ("android", re.compile(r"\bAndroid\b")),
+    ("ios", re.compile(r"\b(?:iPhone|iPad|iPod)\b")),
+    ("macos", re.compile(r"\bMac OS X\b|\bMacintosh\b")),
+    ("linux", re.compile(r"\bLinux\b|\bX11\b")),
+]
+
+OTHER_FAMILY = "other"
+
+
+class ParsedAgent(NamedTuple):
+    family: str
+    version: str
+    os: str
+    is_automation_tool: bool
+
+
+@lru_cache(maxsize=4096)
+def parse_agent(agent: str) -> ParsedAgent:
+    """Classify a raw User-Agent string (memoized per string)."""
+    family, version, is_automation_tool = OTHER_FAMILY, "", False
+    for name, automation, regex in AGENT_RULES:
+        match = regex.search(agent)
+        if match:
+            family, is_automation_tool = name, automation
+            version = (match.groupdict().get("version") or "")[:32]
+            break
+    os_name = next((name for name, regex in OS_RULES if regex.search(agent)), "")
+    return ParsedAgent(family, version, os_name, is_automation_tool)
@@ -1,6 +1,27 @@
+import atexit
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
 
 
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from . import checks  # noqa: F401 - registers the system checks
+        from . import distinct, metrics, payloads, sketches
+
+        payloads.register_lookups()
+        connection_created.connect(
+            metrics.install_query_timer, dispatch_uid=f"{metrics.__name__}.timer"
+        )
+
+        # Merge ingest counters after the response is sent, not inside the
+        # scanner's request, and flush what is left when the worker exits
+        for module in (sketches, distinct):
+            request_finished.connect(
+                module.flush_after_request, dispatch_uid=f"{module.__name__}.flush"
+            )
+            atexit.register(module.flush)
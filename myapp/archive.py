@@ -0,0 +1,259 @@
+"""
+Cold archive of old events and attacks to gzipped NDJSON.
+
+`archive_events` streams every event older than a cutoff (and the attacks of
+those events) into one file per table per day:
+
+    <ARCHIVE_DIR>/<run>/bot_events/date=2026-01-31/part-0000.ndjson.gz
+    <ARCHIVE_DIR>/<run>/attacks/date=2026-01-31/part-0000.ndjson.gz
+    <ARCHIVE_DIR>/<run>/manifest.json
+
+Attacks are filed under their event's day so a day restores as a unit. The
+manifest lists every file with its row count and sha256; files are re-read
+and checked against it (and against the database counts) before any row is
+deleted. `restore_events` loads a manifest's days back. Payloads and
+interned agent/referer/origin/path text are archived inline rather than as
+keys, and restored rows get their keys (and lose the inline copies) the way
+ingest would.
+"""
+
+import gzip
+import hashlib
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .dimensions import DIMENSION_COLUMNS, clear_text, text_source
+from .models import AttackType, BotEvent
+from .payloads import PAYLOAD_COLUMNS, intern_values, iter_resolved_rows
+
+MANIFEST_NAME = "manifest.json"
+
+# Manifest table name -> model; events first (attacks point at them)
+ARCHIVED_MODELS = {"bot_events": BotEvent, "attacks": AttackType}
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without the millisecond truncation: archives are lossless."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchiveError(Exception):
+    """Archive files do not match the manifest or the database."""
+
+
+def archive_fields(model):
+    """
+    Concrete columns, with shared payloads inlined instead of their digests
+    and interned text instead of its dimension keys.
+    """
+    skipped = set(PAYLOAD_COLUMNS.get(model, {}).values())
+    if model is BotEvent:
+        skipped.update(key_column for key_column, _ in DIMENSION_COLUMNS.values())
+    return [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.name not in skipped
+    ]
+
+
+def archived_querysets(cutoff):
+    """(table, queryset, day column) for everything older than `cutoff`."""
+    return [
+        ("bot_events", BotEvent.objects.filter(created_at__lt=cutoff), "created_at"),
+        (
+            "attacks",
+            AttackType.objects.filter(bot_event__created_at__lt=cutoff),
+            "bot_event__created_at",
+        ),
+    ]
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_table(root, table, queryset, day_column, fields, chunk_size):
+    """
+    Stream `queryset` into per-day gzipped NDJSON files under root/table.
+    Returns the manifest entries of the files written.
+    """
+    sources = [text_source(queryset.model, field) for field in fields]
+    rows = iter_resolved_rows(
+        queryset.order_by(day_column, "id"), [day_column, *sources], chunk_size
+    )
+    encoder = ArchiveEncoder()
+    files, current_day, handle, entry = [], None, None, None
+
+    def close():
+        handle.close()
+        entry["sha256"] = _sha256(root / entry["path"])
+        files.append(entry)
+
+    for day_value, *values in rows:
+        day = timezone.localdate(day_value)
+        if day != current_day:
+            if handle is not None:
+                close()
+            current_day = day
+            relative = Path(table) / f"date={day.isoformat()}" / "part-0000.ndjson.gz"
+            (root / relative).parent.mkdir(parents=True, exist_ok=True)
+            handle = gzip.open(root / relative, "wt", encoding="utf-8")
+            entry = {"path": str(relative), "day": day.isoformat(), "rows": 0}
+        handle.write(encoder.encode(dict(zip(fields, values))) + "\n")
+        entry["rows"] += 1
+    if handle is not None:
+        close()
+    return files
+
+
+def iter_file(root, entry):
+    with gzip.open(Path(root) / entry["path"], "rt", encoding="utf-8") as handle:
+        for line in handle:
+            yield json.loads(line)
+
+
+def verify(root, manifest):
+    """Re-read every file; raise ArchiveError on a checksum or count mismatch."""
+    for table, info in manifest["tables"].items():
+        total = 0
+        for entry in info["files"]:
+            path = Path(root) / entry["path"]
+            if _sha256(path) != entry["sha256"]:
+                raise ArchiveError(f"Checksum mismatch: {entry['path']}")
+            rows = sum(1 for _ in iter_file(root, entry))
+            if rows != entry["rows"]:
+                raise ArchiveError(
+                    f"{entry['path']}: {rows} rows, manifest says {entry['rows']}"
+                )
+            total += rows
+        if total != info["rows"]:
+            raise ArchiveError(f"{table}: {total} rows, manifest says {info['rows']}")
+
+
+def archive(root, cutoff, chunk_size=2000):
+    """Write and verify an archive of rows older than `cutoff`; return the manifest."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "created_at": timezone.now().isoformat(),
+        "cutoff": cutoff.isoformat(),
+        "format": "ndjson.gz",
+        "tables": {},
+    }
+    for table, queryset, day_column in archived_querysets(cutoff):
+        fields = archive_fields(queryset.model)
+        expected = queryset.count()
+        files = write_table(root, table, queryset, day_column, fields, chunk_size)
+        rows = sum(entry["rows"] for entry in files)
+        if rows != expected:
+            raise ArchiveError(f"{table}: wrote {rows} rows, database has {expected}")
+        manifest["tables"][table] = {"fields": fields, "rows": rows, "files": files}
+
+    with open(root / MANIFEST_NAME, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    verify(root, manifest)
+    return manifest
+
+
+def delete_archived(cutoff, batch_size=1000):
+    """
+    Delete rows older than `cutoff` in keyset batches (attacks first: the
+    event FK is PROTECT). Returns {table: rows deleted}.
+    """
+    deleted = {}
+    for table, queryset, day_column in reversed(archived_querysets(cutoff)):
+        model = queryset.model
+        total = 0
+        while True:
+            # Deleted rows drop out of the range, so each batch is the next key range
+            batch = list(
+                queryset.order_by(day_column, "id").values_list("id", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.filter(pk__in=batch).delete()
+            total += len(batch)
+        deleted[table] = total
+    return deleted
+
+
+def load_manifest(root):
+    with open(Path(root) / MANIFEST_NAME, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def restore(root, start: date | None = None, end: date | None = None, batch_size=1000):
+    """
+    Re-import archived days between `start` and `end` (inclusive).
+    Rows already present are skipped. Returns {table: rows inserted}.
+    """
+    manifest = load_manifest(root)
+    verify(root, manifest)
+    inserted = {}
+    for table, model in ARCHIVED_MODELS.items():
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        total = 0
+        for entry in manifest["tables"].get(table, {}).get("files", []):
+            day = date.fromisoformat(entry["day"])
+            if (start and day < start) or (end and day > end):
+                continue
+            batch = []
+            for row in iter_file(root, entry):
+                values = {name: fields[name].to_python(value) for name, value in row.items()}
+                batch.append(model(**values))
+                if len(batch) >= batch_size:
+                    total += _insert(model, batch)
+                    batch = []
+            if batch:
+                total += _insert(model, batch)
+        inserted[table] = total
+    return inserted
+
+
+def _insert(model, objects):
+    existing = set(
+        model.objects.filter(pk__in=[obj.pk for obj in objects]).values_list(
+            "pk", flat=True
+        )
+    )
+    objects = [obj for obj in objects if obj.pk not in existing]
+    with transaction.atomic():
+        _prepare(model, objects)
+        for obj in objects:
+            # raw=True keeps archived created_at (skips auto_now_add), like loaddata
+            obj.save_base(raw=True, force_insert=True)
+    return len(objects)
+
+
+def _prepare(model, objects):
+    """Move inline payloads and text into their stores and fill the keys save() would."""
+    for column, fk in PAYLOAD_COLUMNS.get(model, {}).items():
+        attname = model._meta.get_field(fk).attname
+        pending = [
+            obj
+            for obj in objects
+            if getattr(obj, attname) is None and getattr(obj, column) not in (None, "")
+        ]
+        empty = model._meta.get_field(column).get_default()
+        for obj, digest in zip(pending, intern_values(getattr(obj, column) for obj in pending)):
+            setattr(obj, attname, digest)
+            setattr(obj, column, empty)
+    if model is BotEvent:
+        BotEvent.fill_derived_fields(objects)
+        clear_text(objects)
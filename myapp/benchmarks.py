@@ -0,0 +1,209 @@
+"""
+Scale benchmarks for the analytics endpoints (`benchmark_endpoints`).
+
+For each dataset size the database is topped up with `synthetic.generate`,
+the sketch tables are rebuilt and the planner statistics refreshed. Each
+case (an endpoint plus a common filter / search / ordering) is then
+requested through the full Django stack with response caching off. The
+median latency and the query count are recorded, along with the query
+plan of the slowest statement, with the tables it reads in full.
+
+Between two sizes, growth is reported as the exponent k in
+time ~ rows^k: about 0 means the case does not grow with the data, 1
+means linear (a full scan), and more than 1 means it is getting worse
+than a scan.
+"""
+
+import math
+import re
+import statistics
+import time
+from io import StringIO
+from typing import NamedTuple
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from . import synthetic
+from .caching import bump_data_version
+from .loadtest import local_client
+from .models import BotEvent
+
+
+class Case(NamedTuple):
+    name: str
+    url_name: str
+    params: dict
+
+
+CASES = [
+    Case("snapshot", "snapshot", {}),
+    Case("bot-events", "bot-event-list", {}),
+    Case("bot-events:filter", "bot-event-list", {"event_category": "attack", "method": "POST"}),
+    Case("bot-events:search", "bot-event-list", {"search": "passwd"}),
+    Case("bot-events:order", "bot-event-list", {"ordering": "ip_address"}),
+    Case("bot-events:cidr", "bot-event-list", {"cidr": "10.0.0.0/8"}),
+    Case("bot-events:page-20", "bot-event-list", {"page": 20}),
+    Case("aggregate-ips", "aggregate-ip-list", {}),
+    Case("aggregate-ips:order", "aggregate-ip-list", {"ordering": "-attack_count"}),
+    Case("aggregate-ips:search", "aggregate-ip-list", {"search": "10.1"}),
+    Case("aggregate-paths", "aggregate-path-list", {}),
+    Case("aggregate-paths:search", "aggregate-path-list", {"search": "admin"}),
+    Case("aggregate-subnets", "aggregate-subnet-list", {}),
+    Case("agents", "agent-list", {}),
+]
+
+# Reads of every row: SQLite "SCAN t", including "SCAN t USING [COVERING]
+# INDEX" (a walk of the whole index; selective lookups are "SEARCH"), and
+# PostgreSQL "Seq Scan on t"
+_FULL_SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)(\w+)|Seq Scan on (\w+)")
+
+
+def seed_to(size, seed=0, batch_size=5000):
+    """Top the event table up to `size` rows; returns the rows added."""
+    existing = BotEvent.objects.count()
+    if existing >= size:
+        return 0
+    synthetic.generate(
+        size - existing, seed=seed + existing, total=size, batch_size=batch_size
+    )
+    call_command("rebuild_heavy_hitters", stdout=StringIO())
+    call_command("rebuild_distinct_counters", stdout=StringIO())
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    bump_data_version()
+    return size - existing
+
+
+def explain(sql, params):
+    """The plan of one statement, as a list of lines."""
+    prefix = connection.ops.explain_query_prefix()
+    if connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN"
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        rows = cursor.fetchall()
+    # SQLite rows are (id, parent, notused, detail); others one text column
+    return [str(row[-1]) for row in rows]
+
+
+def full_scans(plan):
+    """Tables a plan reads in full."""
+    tables = set()
+    for line in plan:
+        for match in _FULL_SCAN.finditer(line):
+            tables.add(match.group(1) or match.group(2))
+    return sorted(tables)
+
+
+def time_case(client, case, repeat=5):
+    """Median ms over `repeat` requests, queries per request and the slowest plan."""
+    url = reverse(case.url_name)
+    statements = []
+
+    def record(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            statements.append((time.perf_counter() - start, sql, params))
+
+    timings = []
+    status = None
+    for attempt in range(repeat + 1):  # the first request only warms up
+        statements.clear()
+        start = time.perf_counter()
+        with connection.execute_wrapper(record):
+            status = client.get(url, case.params).status_code
+        if attempt:
+            timings.append((time.perf_counter() - start) * 1000)
+    if status != 200:
+        raise ValueError(f"{case.name}: {url} returned HTTP {status}")
+
+    selects = [s for s in statements if s[1].lstrip().upper().startswith(("SELECT", "WITH"))]
+    plan = []
+    if selects:
+        _, sql, params = max(selects, key=lambda statement: statement[0])
+        plan = explain(sql, params)
+    return {
+        "status": status,
+        "ms": statistics.median(timings),
+        "queries": len(statements),
+        "plan": plan,
+        "full_scans": full_scans(plan),
+    }
+
+
+def growth(sizes, timings):
+    """Exponent k of time ~ rows^k between consecutive sizes."""
+    exponents = []
+    for (n1, t1), (n2, t2) in zip(zip(sizes, timings), zip(sizes[1:], timings[1:])):
+        if t1 > 0 and t2 > 0 and n2 > n1:
+            exponents.append(math.log(t2 / t1) / math.log(n2 / n1))
+        else:
+            exponents.append(None)
+    return exponents
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+def run_suite(sizes, cases=CASES, repeat=5, seed=0, progress=None):
+    """
+    Seed each size in turn and time every case.
+    Returns {"sizes": [...], "cases": {name: {"ms": [...], ...}}}.
+    """
+    client = local_client()
+    results = {
+        "sizes": [],
+        "cases": {case.name: {"ms": [], "queries": [], "plans": []} for case in cases},
+    }
+    for size in sorted(sizes):
+        seed_to(size, seed)
+        results["sizes"].append(size)
+        for case in cases:
+            measured = time_case(client, case, repeat)
+            entry = results["cases"][case.name]
+            entry["ms"].append(measured["ms"])
+            entry["queries"].append(measured["queries"])
+            entry["plans"].append(
+                {"plan": measured["plan"], "full_scans": measured["full_scans"]}
+            )
+            if progress:
+                progress(size, case, measured)
+    for entry in results["cases"].values():
+        entry["growth"] = growth(results["sizes"], entry["ms"])
+    return results
+
+
+def check_budgets(results, budgets):
+    """
+    Cases over budget. `budgets` maps a case name to milliseconds, either
+    one number for every size or {size: ms}. Returns messages.
+    """
+    violations = []
+    for name, budget in budgets.items():
+        entry = results["cases"].get(name)
+        if entry is None:
+            continue
+        for size, ms in zip(results["sizes"], entry["ms"]):
+            limit = budget.get(str(size)) if isinstance(budget, dict) else budget
+            if limit is not None and ms > limit:
+                violations.append(f"{name} @ {size} rows: {ms:.1f} ms > budget {limit} ms")
+    return violations
+
+
+def check_baseline(results, baseline, tolerance=1.5):
+    """Cases slower than `tolerance` x a previous run at the same size."""
+    violations = []
+    for name, entry in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        before = dict(zip(baseline["sizes"], previous["ms"]))
+        for size, ms in zip(results["sizes"], entry["ms"]):
+            if size in before and ms > before[size] * tolerance:
+                violations.append(
+                    f"{name} @ {size} rows: {ms:.1f} ms vs {before[size]:.1f} ms baseline"
+                )
+    return violations
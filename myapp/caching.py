@@ -0,0 +1,143 @@
+"""
+Versioned response cache for the analytics endpoints.
+
+Responses are cached under a key built from (view name, normalized query
+params, data version). The data version is a counter stored in the cache
+that is bumped every time the honeypot ingests an event, so any write
+invalidates every cached response at once without having to track keys.
+
+The same key doubles as a strong ETag: when the client sends a matching
+``If-None-Match`` header we answer ``304 Not Modified`` before the view
+touches the database.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+DATA_VERSION_KEY = "botfarm:data-version"
+
+
+def get_response_cache():
+    """Return the cache backend configured for analytics responses."""
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def get_data_version() -> int:
+    """
+    Return the current data version.
+    If the counter is missing (first request or evicted) it is seeded with the
+    current time so it can never move back to a value used by stale entries.
+    """
+    cache = get_response_cache()
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version() -> int:
+    """Invalidate all cached analytics responses. Called on every ingest."""
+    cache = get_response_cache()
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        # Key missing: seed it (incr is not supported on missing keys)
+        cache.add(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+        return cache.incr(DATA_VERSION_KEY)
+
+
+def normalize_query_params(query_params) -> str:
+    """
+    Build a canonical string from the query params.
+    Keys and values are sorted and blank values dropped, so `?a=1&b=2`,
+    `?b=2&a=1` and `?a=1&b=2&search=` share the same cache entry.
+    """
+    items = []
+    for key in sorted(query_params.keys()):
+        values = sorted(v for v in query_params.getlist(key) if v != "")
+        items.extend(f"{key}={value}" for value in values)
+    return "&".join(items)
+
+
+def build_cache_key(view_name: str, request, version: int) -> str:
+    """Build the cache key (and ETag seed) for a request."""
+    renderer = getattr(request, "accepted_renderer", None)
+    raw = "|".join(
+        [
+            view_name,
+            request.get_host(),
+            request.path,
+            normalize_query_params(request.query_params),
+            getattr(renderer, "format", "") or "",
+            str(version),
+        ]
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _finalize(response, etag):
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def cache_response(view_name: str, timeout: int | None = None):
+    """
+    Decorator for GET handlers (APIView.get or ViewSet list/retrieve).
+
+    Usage:
+        @cache_response("snapshot")
+        def get(self, request): ...
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            # Profiled requests (see myapp/profiling.py) must do the real work
+            if (
+                not getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+                or getattr(self, "profile", None) is not None
+            ):
+                return handler(self, request, *args, **kwargs)
+
+            cache = get_response_cache()
+            key = build_cache_key(view_name, request, get_data_version())
+            etag = f'"{key}"'
+
+            # Conditional request: answer without touching the database
+            if_none_match = request.headers.get("If-None-Match")
+            if if_none_match:
+                etags = parse_etags(if_none_match)
+                if "*" in etags or etag in etags:
+                    return _finalize(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+            cache_key = f"botfarm:response:{key}"
+            data = cache.get(cache_key)
+            if data is not None:
+                return _finalize(Response(data, status=status.HTTP_200_OK), etag)
+
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(
+                    cache_key,
+                    response.data,
+                    timeout
+                    if timeout is not None
+                    else getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+                )
+                _finalize(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    """
+    The data version behind the response cache (see myapp/caching.py) lives in
+    the cache itself. A per-process backend keeps one version per worker, so
+    an ingest on one worker, or a management command, never reaches the
+    others and they keep answering 304 for stale ETags.
+    """
+    if not getattr(settings, "RESPONSE_CACHE_ENABLED", True):
+        return []
+    alias = getattr(settings, "RESPONSE_CACHE_ALIAS", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if backend != "django.core.cache.backends.locmem.LocMemCache":
+        return []
+    return [
+        Warning(
+            "The analytics response cache uses a per-process cache, so its "
+            "data version is not shared between workers or with management "
+            "commands.",
+            hint="Set DJANGO_CACHE_URL to a shared backend (filecache://, "
+            "rediscache://, ...) or set RESPONSE_CACHE_ENABLED=False when "
+            "running more than one process.",
+            id="myapp.W001",
+        )
+    ]
@@ -0,0 +1,133 @@
+"""
+Correlation tokens and GET→POST sessions for the honeypot form.
+
+`HoneypotView.get` issues a signed, stateless token carrying the issue
+timestamp in milliseconds ("<uuid>:<base62 ms>:<signature>"). When the form
+comes back, `parse_token` recovers the UUID and issue time without touching
+the database (and on any worker), so time-to-submit and fill speed are
+computed inline and stored on a CorrelationSession.
+"""
+
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CorrelationSession
+
+TOKEN_SALT = "myapp.correlation"
+
+# Fields that are part of the form plumbing, not typed by the client
+IGNORED_FIELDS = ("ctoken", "csrfmiddlewaretoken")
+
+
+def _signer():
+    # TimestampSigner only has 1s resolution; bots submit in milliseconds
+    return signing.Signer(salt=TOKEN_SALT)
+
+
+def issue_token() -> tuple[UUID, str]:
+    """Return (correlation uuid, signed token to render into the form)."""
+    token = uuid4()
+    issued_ms = signing.b62_encode(time.time_ns() // 1_000_000)
+    return token, _signer().sign(f"{token}:{issued_ms}")
+
+
+def parse_token(raw: Any) -> tuple[UUID | None, datetime | None]:
+    """
+    Recover (correlation uuid, issued_at) from a submitted ctoken.
+
+    Accepts signed tokens and plain UUIDs (direct POSTs, old forms).
+    issued_at is None unless the signature is valid and younger than
+    CORRELATION_TOKEN_MAX_AGE. Returns (None, None) for garbage.
+    """
+    if isinstance(raw, list):
+        raw = raw[0] if raw else None
+    if not raw:
+        return None, None
+    raw = str(raw).strip()
+
+    signer = _signer()
+    try:
+        value, issued_ms = signer.unsign(raw).split(signer.sep)
+        issued_at = datetime.fromtimestamp(
+            signing.b62_decode(issued_ms) / 1000, tz=dt_timezone.utc
+        )
+        max_age = getattr(settings, "CORRELATION_TOKEN_MAX_AGE", 86400)
+        if (timezone.now() - issued_at).total_seconds() <= max_age:
+            return UUID(value), issued_at
+    except (signing.BadSignature, ValueError):
+        pass
+
+    # Expired or tampered signed token, or a plain UUID: keep the UUID, drop timing
+    try:
+        return UUID(raw.split(signer.sep, 1)[0]), None
+    except ValueError:
+        return None, None
+
+
+def fill_metrics(params: Dict[str, Any] | None) -> tuple[int, int]:
+    """Return (fields_filled, chars_submitted) for the submitted form values."""
+    fields_filled = 0
+    chars_submitted = 0
+    for key, value in (params or {}).items():
+        if key in IGNORED_FIELDS:
+            continue
+        if isinstance(value, list):
+            value = "".join(str(v) for v in value)
+        value = "" if value is None else str(value)
+        if value:
+            fields_filled += 1
+            chars_submitted += len(value)
+    return fields_filled, chars_submitted
+
+
+def record_submission(token, issued_at, bot_event, params, request_path) -> None:
+    """
+    Create the session on the first POST for a token, or bump its counters on
+    a resubmission. Timing is only computed for the first POST. The event
+    stores its path as a dimension key, so the path is passed in.
+    """
+    now = bot_event.created_at or timezone.now()
+    updated = CorrelationSession.objects.filter(token=token).update(
+        submit_count=F("submit_count") + 1, last_submitted_at=now
+    )
+    if updated:
+        return
+
+    fields_filled, chars_submitted = fill_metrics(params)
+    time_to_submit_ms = None
+    chars_per_second = None
+    if issued_at is not None:
+        elapsed = max((now - issued_at).total_seconds(), 0.0)
+        time_to_submit_ms = int(elapsed * 1000)
+        # Floor at 1ms to avoid dividing by zero
+        chars_per_second = round(chars_submitted / max(elapsed, 0.001), 2)
+
+    session = CorrelationSession(
+        token=token,
+        post_event=bot_event,
+        ip_address=bot_event.ip_address,
+        request_path=request_path,
+        issued_at=issued_at,
+        first_submitted_at=now,
+        last_submitted_at=now,
+        time_to_submit_ms=time_to_submit_ms,
+        fields_filled=fields_filled,
+        chars_submitted=chars_submitted,
+        chars_per_second=chars_per_second,
+    )
+    try:
+        with transaction.atomic():
+            session.save(force_insert=True)
+    except IntegrityError:
+        # Concurrent first POST for the same token won the insert
+        CorrelationSession.objects.filter(token=token).update(
+            submit_count=F("submit_count") + 1, last_submitted_at=now
+        )
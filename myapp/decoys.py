@@ -0,0 +1,95 @@
+"""
+Pre-rendered decoy pages served on honeypot GETs.
+
+The only dynamic part of a decoy form is the signed `ctoken`. Each variant
+template (contact, login, upload) is therefore rendered once per worker,
+with a marker in place of the token, and split into the bytes before and
+after it. A GET is answered with `head + token + tail`, with no template
+engine or context processors involved. The signed token only holds
+URL-safe base64 and `:`, so autoescaping would not have changed it.
+
+Paths pick their variant in `fake_urls.DECOY_VARIANTS` (default "contact").
+Pages carry `Cache-Control: no-store`: a cached copy would replay an old
+token and corrupt the GET->POST timing. With DEBUG on, templates are
+re-rendered on every request so edits show up without a restart.
+"""
+
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .fake_urls import DECOY_VARIANTS
+
+DEFAULT_VARIANT = "contact"
+TEMPLATES = {
+    "contact": "fake_form.html",
+    "login": "fake_login.html",
+    "upload": "fake_upload.html",
+}
+TOKEN_SLOT = "__ctoken_slot__"
+
+# Decoy paths as matched against request.path (FAKE_URLS entries have no leading slash)
+_VARIANT_BY_PATH = {f"/{url}": variant for url, variant in DECOY_VARIANTS.items()}
+
+
+class Page(NamedTuple):
+    head: bytes
+    tail: bytes
+
+
+def render_page(template_name):
+    """Render a decoy template around the token slot."""
+    html = render_to_string(template_name, {"ctoken": TOKEN_SLOT}).encode("utf-8")
+    head, slot, tail = html.partition(TOKEN_SLOT.encode("utf-8"))
+    if not slot or TOKEN_SLOT.encode("utf-8") in tail:
+        raise ImproperlyConfigured(
+            f"Decoy template {template_name} must use {{{{ ctoken }}}} exactly once."
+        )
+    return Page(head, tail)
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = None
+
+    def load(self):
+        """Render every variant (idempotent); called when the middleware starts."""
+        with self.lock:
+            if self.pages is None:
+                self.pages = {
+                    variant: render_page(template) for variant, template in TEMPLATES.items()
+                }
+            return self.pages
+
+    def page(self, variant):
+        if settings.DEBUG:
+            return render_page(TEMPLATES[variant])
+        pages = self.pages or self.load()
+        return pages[variant]
+
+    def clear(self):
+        with self.lock:
+            self.pages = None
+
+
+registry = _Registry()
+
+
+def variant_for(path):
+    return _VARIANT_BY_PATH.get(path, DEFAULT_VARIANT)
+
+
+def response(path, token):
+    """The decoy page for `path` with `token` in its ctoken field."""
+    page = registry.page(variant_for(path))
+    response = HttpResponse(
+        page.head + token.encode("utf-8") + page.tail,
+        content_type="text/html; charset=utf-8",
+    )
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,160 @@
+"""
+Interned dimension tables for repetitive event text.
+
+User agents, request paths, referers and origins repeat across millions of
+events but have only thousands of distinct values. Each distinct value is
+stored once in its dimension table (UserAgent, RequestPath, Referer, Origin)
+and events carry its small integer key instead of the text, so
+aggregates GROUP BY an integer and join the text only for the rows they
+return.
+
+Keys are assigned on save. Each worker keeps an LRU of value -> key per
+dimension, so a known value costs a dict lookup; misses are resolved with
+one INSERT ... ON CONFLICT DO NOTHING plus one SELECT per dimension. Keys
+enter the LRU only once the transaction that read or created them commits,
+so a rollback cannot leave the cache pointing at rows that do not exist.
+
+Ingest, the synthetic generator and restores store only the key
+(`clear_text()`), and readers go through it (`text_source()`); the text
+columns are left over from rows written before the tables existed and are
+emptied by migration 0017.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import BotEvent, Origin, Referer, RequestPath, UserAgent
+
+# BotEvent text column -> (key column, dimension model)
+DIMENSION_COLUMNS = {
+    "agent": ("agent_ref", UserAgent),
+    "referer": ("referer_ref", Referer),
+    "origin": ("origin_ref", Origin),
+    "request_path": ("request_path_ref", RequestPath),
+}
+
+
+def value_hash(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class _KeyCache:
+    """LRU of value -> dimension key, one per dimension model."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = {}
+
+    def get_many(self, model, values):
+        found = {}
+        with self.lock:
+            keys = self.keys.get(model)
+            if keys is None:
+                return found
+            for value in values:
+                key = keys.get(value)
+                if key is not None:
+                    keys.move_to_end(value)
+                    found[value] = key
+        return found
+
+    def add(self, model, mapping):
+        limit = getattr(settings, "DIMENSION_CACHE_SIZE", 5000)
+        with self.lock:
+            keys = self.keys.setdefault(model, OrderedDict())
+            keys.update(mapping)
+            for value in mapping:
+                keys.move_to_end(value)
+            while len(keys) > limit:
+                keys.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.keys.clear()
+
+
+_cache = _KeyCache()
+
+
+def intern(model, values):
+    """Return {value: key} for `values`, creating missing dimension rows."""
+    values = set(values)
+    found = _cache.get_many(model, values)
+    missing = values - found.keys()
+    if missing:
+        hashes = {value_hash(value): value for value in missing}
+        model.objects.bulk_create(
+            [model.for_value(value, digest) for digest, value in hashes.items()],
+            ignore_conflicts=True,
+        )
+        created = {
+            hashes[digest]: key
+            for key, digest in model.objects.filter(
+                value_hash__in=list(hashes)
+            ).values_list("id", "value_hash")
+        }
+        transaction.on_commit(lambda: _cache.add(model, created))
+        found.update(created)
+    return found
+
+
+def lookup(model, value):
+    """Key of an existing dimension value, or None. Never creates a row."""
+    found = _cache.get_many(model, [value])
+    if found:
+        return found[value]
+    key = (
+        model.objects.filter(value_hash=value_hash(value))
+        .values_list("id", flat=True)
+        .first()
+    )
+    if key is not None:
+        transaction.on_commit(lambda: _cache.add(model, {value: key}))
+    return key
+
+
+def assign_dimensions(events):
+    """Fill in the missing dimension keys of `events` from their text columns."""
+    for column, (key_column, model) in DIMENSION_COLUMNS.items():
+        attname = f"{key_column}_id"
+        pending = [
+            event
+            for event in events
+            if getattr(event, column) is not None and getattr(event, attname) is None
+        ]
+        if not pending:
+            continue
+        keys = intern(model, (getattr(event, column) for event in pending))
+        for event in pending:
+            setattr(event, attname, keys[getattr(event, column)])
+
+
+def clear_text(events):
+    """Empty the text columns of `events` whose keys are set: the dimension tables hold it."""
+    for column, (key_column, _) in DIMENSION_COLUMNS.items():
+        attname = f"{key_column}_id"
+        for event in events:
+            if getattr(event, attname) is not None:
+                setattr(event, column, None)
+
+
+def text_source(model, path):
+    """
+    ORM path that reads `path` from `model`: an interned BotEvent column,
+    also across relations (`request_path`, `bot_event__request_path`), is
+    read through its key; anything else is returned unchanged.
+    """
+    *relations, column = path.split("__")
+    for name in relations:
+        model = model._meta.get_field(name).related_model
+    if model is not BotEvent or column not in DIMENSION_COLUMNS:
+        return path
+    return "__".join([*relations, DIMENSION_COLUMNS[column][0], "value"])
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,367 @@
+"""
+HyperLogLog distinct counters for unique IPs, emails, agents and IPs per path.
+
+One sketch is stored per (dimension, key, day) in DistinctCounter: 2**12
+one-byte registers (about 1.6% standard error), zlib-compressed, so a bucket
+costs a few KB at most. Ingest buffers 64-bit hashes per bucket in-process and
+folds them into the stored registers at most every
+DISTINCT_COUNTER_FLUSH_INTERVAL seconds, after a response has been sent
+(request_finished), and once more when the worker exits. Register-wise max
+is idempotent, so buckets for any range of days are unioned at query time
+without double counting.
+
+Migration 0013 seeds the sketches from the events that existed before them,
+one day per transaction, and is recorded as applied only once it is done.
+Until then, with APPROXIMATE_DISTINCT_COUNTS off, or while no sketch exists
+for a dimension (no events yet), counts fall back to exact DISTINCT queries.
+Events written outside ingest (bulk loads) need `rebuild_distinct_counters`.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import zlib
+from math import log
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .dimensions import lookup
+from .models import BotEvent, DistinctCounter, RequestPath
+
+logger = logging.getLogger(__name__)
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+RELATIVE_ERROR = round(1.04 / REGISTERS**0.5, 4)
+
+# Dimension -> BotEvent column counted distinct; PATH_IP is keyed by request_path.
+# Agents are counted by their interned key (one per distinct agent string).
+DIMENSION_COLUMNS = {
+    DistinctCounter.Dimension.IP: "ip_address",
+    DistinctCounter.Dimension.EMAIL: "email",
+    DistinctCounter.Dimension.AGENT: "agent_ref",
+    DistinctCounter.Dimension.PATH_IP: "ip_address",
+}
+
+
+def hash_value(value) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+class HyperLogLog:
+    """Dense HyperLogLog with 2**PRECISION registers over 64-bit hashes."""
+
+    _tail_bits = 64 - PRECISION
+    _tail_mask = (1 << _tail_bits) - 1
+    _alpha = 0.7213 / (1 + 1.079 / REGISTERS)
+
+    def __init__(self, registers=None):
+        self.registers = registers if registers is not None else bytearray(REGISTERS)
+
+    def add_hash(self, hashed):
+        index = hashed >> self._tail_bits
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = self._tail_bits - (hashed & self._tail_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(hash_value(value))
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        registers = self.registers
+        estimate = self._alpha * REGISTERS**2 / sum(2.0**-r for r in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            estimate = REGISTERS * log(REGISTERS / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data) -> "HyperLogLog":
+        return cls(bytearray(zlib.decompress(bytes(data))))
+
+
+class _Pending:
+    """Hashes ingested by this worker since the last flush, per bucket."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.last_flush = 0.0
+
+
+_pending = _Pending()
+
+
+def record_event(bot_event, agent, request_path):
+    """
+    Buffer one ingested event's values into its day buckets. The event
+    stores agent and path as dimension keys, so their text is passed in.
+    """
+    day = timezone.localdate(bot_event.created_at or timezone.now())
+    ip_hash = hash_value(bot_event.ip_address) if bot_event.ip_address else None
+    entries = []
+    if ip_hash is not None:
+        entries.append((DistinctCounter.Dimension.IP, "", ip_hash))
+        if request_path:
+            entries.append((DistinctCounter.Dimension.PATH_IP, request_path, ip_hash))
+    if bot_event.email:
+        entries.append((DistinctCounter.Dimension.EMAIL, "", hash_value(bot_event.email)))
+    if agent:
+        entries.append((DistinctCounter.Dimension.AGENT, "", hash_value(agent)))
+
+    with _pending.lock:
+        for dimension, key, hashed in entries:
+            _pending.buckets.setdefault((dimension, key, day), set()).add(hashed)
+
+
+def flush_after_request(**kwargs):
+    """request_finished receiver: fold hashes in outside the ingest request."""
+    flush(force=False)
+
+
+def flush(force=True):
+    """
+    Fold buffered hashes into the stored sketches.
+    Without `force` this only runs once per DISTINCT_COUNTER_FLUSH_INTERVAL.
+    """
+    interval = getattr(settings, "DISTINCT_COUNTER_FLUSH_INTERVAL", 10)
+    with _pending.lock:
+        if not force and time.monotonic() - _pending.last_flush < interval:
+            return
+        buckets, _pending.buckets = _pending.buckets, {}
+        _pending.last_flush = time.monotonic()
+
+    for (dimension, key, day), hashes in buckets.items():
+        sketch = HyperLogLog()
+        for hashed in hashes:
+            sketch.add_hash(hashed)
+        try:
+            merge_into_table(dimension, key, day, sketch)
+        except DatabaseError:
+            logger.exception("Distinct counter flush failed; retrying later")
+            with _pending.lock:
+                _pending.buckets.setdefault((dimension, key, day), set()).update(hashes)
+
+
+def merge_into_table(dimension, key, day, sketch, retries=1):
+    """Union `sketch` into the stored (dimension, key, day) bucket."""
+    try:
+        with transaction.atomic():
+            row = (
+                DistinctCounter.objects.select_for_update()
+                .filter(dimension=dimension, key=key, day=day)
+                .first()
+            )
+            if row is None:
+                DistinctCounter.objects.create(
+                    dimension=dimension, key=key, day=day, registers=sketch.to_bytes()
+                )
+                return
+            sketch.merge(HyperLogLog.from_bytes(row.registers))
+            row.registers = sketch.to_bytes()
+            row.save(update_fields=["registers", "updated_at"])
+    except IntegrityError:
+        # Another worker created the bucket first; merge into theirs
+        if not retries:
+            raise
+        merge_into_table(dimension, key, day, sketch, retries - 1)
+
+
+def reset():
+    """Drop this worker's buffered hashes (tests, rebuilds)."""
+    with _pending.lock:
+        _pending.buckets = {}
+        _pending.last_flush = 0.0
+
+
+def approximate_enabled() -> bool:
+    return getattr(settings, "APPROXIMATE_DISTINCT_COUNTS", True)
+
+
+def _buckets(dimension, key, start, end):
+    queryset = DistinctCounter.objects.filter(dimension=dimension, key=key)
+    if start is not None:
+        queryset = queryset.filter(day__gte=start)
+    if end is not None:
+        queryset = queryset.filter(day__lte=end)
+    return queryset
+
+
+def has_sketches(dimension) -> bool:
+    return DistinctCounter.objects.filter(dimension=dimension).exists()
+
+
+SEED_MIGRATION = ("myapp", "0013_seed_distinct_counters")
+_seeded = False
+
+
+def seeded() -> bool:
+    """Whether the seeding migration has finished (cached once it has)."""
+    global _seeded
+    if not _seeded:
+        app, name = SEED_MIGRATION
+        _seeded = (
+            MigrationRecorder(connection).migration_qs.filter(app=app, name=name).exists()
+        )
+    return _seeded
+
+
+def use_exact(dimension) -> bool:
+    return not approximate_enabled() or not has_sketches(dimension) or not seeded()
+
+
+def _exact_queryset(dimension, key, start, end):
+    column = DIMENSION_COLUMNS[dimension]
+    queryset = BotEvent.objects.filter(**{f"{column}__isnull": False})
+    if dimension == DistinctCounter.Dimension.PATH_IP:
+        path_key = lookup(RequestPath, key)
+        if path_key is None:
+            return queryset.none(), column
+        queryset = queryset.filter(request_path_ref=path_key)
+    if start is not None:
+        queryset = queryset.filter(created_at__date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__date__lte=end)
+    return queryset, column
+
+
+def distinct_count(dimension, key="", start=None, end=None, exact=None):
+    """
+    Number of distinct values for a dimension between two days (inclusive).
+    Returns (count, approximate).
+    """
+    if exact is None:
+        exact = use_exact(dimension)
+    if exact:
+        queryset, column = _exact_queryset(dimension, key, start, end)
+        return queryset.values(column).distinct().count(), False
+
+    union = HyperLogLog()
+    for registers in _buckets(dimension, key, start, end).values_list(
+        "registers", flat=True
+    ).iterator():
+        union.merge(HyperLogLog.from_bytes(registers))
+    return union.count(), True
+
+
+def daily_counts(dimension, key="", start=None, end=None, exact=None):
+    """Return ([(day, count)], approximate), oldest day first."""
+    if exact is None:
+        exact = use_exact(dimension)
+    if exact:
+        queryset, column = _exact_queryset(dimension, key, start, end)
+        rows = (
+            queryset.annotate(day=TruncDate("created_at"))
+            .values("day")
+            .annotate(count=Count(column, distinct=True))
+            .order_by("day")
+            .values_list("day", "count")
+        )
+        return list(rows), False
+
+    rows = _buckets(dimension, key, start, end).order_by("day").values_list(
+        "day", "registers"
+    )
+    return [
+        (day, HyperLogLog.from_bytes(registers).count()) for day, registers in rows
+    ], True
+
+
+def rebuild(
+    dimensions=None,
+    chunk_size=2000,
+    event_model=BotEvent,
+    counter_model=DistinctCounter,
+    replace=True,
+):
+    """
+    Recompute every bucket from BotEvent in one ordered pass.
+    Returns the number of buckets written. Each day is merged into the stored
+    buckets in its own transaction, so a caller outside a transaction (the
+    seeding migration, with `replace=False`) never holds one for the whole
+    scan. `replace` first deletes the stored buckets. Migrations pass their
+    historical models.
+    """
+    dimensions = dimensions or list(DIMENSION_COLUMNS)
+    if replace:
+        counter_model.objects.filter(dimension__in=dimensions).delete()
+    written = 0
+    current_day, sketches = None, {}
+
+    def write(retries=1):
+        try:
+            with transaction.atomic():
+                stored = {
+                    (row.dimension, row.key): row
+                    for row in counter_model.objects.select_for_update().filter(
+                        day=current_day, dimension__in=dimensions
+                    )
+                }
+                now = timezone.now()
+                changed, created = [], []
+                for (dimension, key), sketch in sketches.items():
+                    row = stored.get((dimension, key))
+                    if row is None:
+                        created.append(
+                            counter_model(
+                                dimension=dimension,
+                                key=key,
+                                day=current_day,
+                                registers=sketch.to_bytes(),
+                            )
+                        )
+                        continue
+                    merged = HyperLogLog.from_bytes(row.registers)
+                    merged.merge(sketch)
+                    row.registers, row.updated_at = merged.to_bytes(), now
+                    changed.append(row)
+                counter_model.objects.bulk_update(changed, ["registers", "updated_at"])
+                counter_model.objects.bulk_create(created)
+        except IntegrityError:
+            # Ingest created one of the day's buckets first; merge into it
+            if not retries:
+                raise
+            write(retries - 1)
+        return len(sketches)
+
+    rows = (
+        event_model.objects.order_by("created_at")
+        .values_list(
+            "created_at", "ip_address", "email", "agent_ref__value", "request_path_ref__value"
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for created_at, ip_address, email, agent, request_path in rows:
+        day = timezone.localdate(created_at)
+        if day != current_day:
+            if sketches:
+                written += write()
+            current_day, sketches = day, {}
+        values = {
+            (DistinctCounter.Dimension.IP, ""): ip_address,
+            (DistinctCounter.Dimension.EMAIL, ""): email,
+            (DistinctCounter.Dimension.AGENT, ""): agent,
+            (DistinctCounter.Dimension.PATH_IP, request_path): ip_address,
+        }
+        for (dimension, key), value in values.items():
+            if value and dimension in dimensions:
+                sketches.setdefault((dimension, key), HyperLogLog()).add(value)
+    if sketches:
+        written += write()
+    return written
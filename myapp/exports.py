@@ -0,0 +1,178 @@
+"""
+Streaming NDJSON/CSV export of events and attacks.
+
+Rows are read with `.values_list(...).iterator(chunk_size=...)` (server-side
+cursors on PostgreSQL; payload columns joined and resolved) and encoded one at a time into a
+StreamingHttpResponse, so memory stays flat regardless of result size.
+"""
+
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.filters import SearchFilter
+from rest_framework.renderers import BaseRenderer
+from django_filters.rest_framework import DjangoFilterBackend
+
+from .dimensions import text_source
+from .payloads import iter_resolved_rows
+
+BOT_EVENT_EXPORT_FIELDS = [
+    "id",
+    "created_at",
+    "method",
+    "request_path",
+    "event_category",
+    "attack_attempted",
+    "ip_address",
+    "geo_location",
+    "agent",
+    "referer",
+    "origin",
+    "language",
+    "email",
+    "correlation_token",
+    "data_present",
+    "field_count",
+    "target_fields",
+    "data_details",
+]
+
+ATTACK_TYPE_EXPORT_FIELDS = [
+    "id",
+    "created_at",
+    "bot_event_id",
+    "category",
+    "pattern",
+    "target_field",
+    "raw_value",
+    "full_value",
+    "bot_event__ip_address",
+    "bot_event__request_path",
+    "bot_event__method",
+]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Content-negotiation placeholder; export views stream their own bytes."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Content-negotiation placeholder; export views stream their own bytes."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+
+class _Echo:
+    """File-like object for csv.writer that returns the line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    """Flatten JSON columns (dict/list) into a JSON string for CSV cells."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
+
+
+def _column_name(field):
+    # bot_event__ip_address -> ip_address
+    return field.split("__")[-1]
+
+
+def iter_ndjson(rows, fields):
+    columns = [_column_name(f) for f in fields]
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([_column_name(f) for f in fields])
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_export(queryset, fields, file_format, basename):
+    """
+    Stream `fields` of every row in `queryset` as NDJSON or CSV.
+
+    Args:
+        queryset: Filtered queryset to export (ordering is kept).
+        fields: Column names, related lookups allowed (e.g. "bot_event__ip_address").
+            Interned event columns are read through their dimension keys.
+        file_format: "ndjson" or "csv".
+        basename: Prefix for the download filename.
+    """
+    chunk_size = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    sources = [text_source(queryset.model, field) for field in fields]
+    rows = iter_resolved_rows(queryset, sources, chunk_size)
+
+    if file_format == CSVRenderer.format:
+        content, content_type = iter_csv(rows, fields), CSVRenderer.media_type
+    else:
+        content, content_type = iter_ndjson(rows, fields), NDJSONRenderer.media_type
+
+    stamp = timezone.now().strftime("%Y%m%d%H%M%S")
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="{basename}-{stamp}.{file_format}"'
+    )
+    return response
+
+
+class ExportMixin:
+    """
+    Adds an `export/` list route to a ViewSet.
+
+    The route honours the filterset and search params of the list view and
+    streams NDJSON (default) or CSV (`?format=csv`).
+    """
+
+    export_fields = []
+    export_basename = "export"
+    export_ordering = ["-created_at"]
+
+    def get_export_queryset(self):
+        """Plain model queryset: no list annotations, joins or prefetches."""
+        return self.queryset.model.objects.all()
+
+    def filter_export_queryset(self, queryset):
+        for backend in (DjangoFilterBackend, SearchFilter):
+            if backend in self.filter_backends:
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset.order_by(*self.export_ordering)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream all matching rows as NDJSON or CSV (`?format=csv`)."""
+        queryset = self.filter_export_queryset(self.get_export_queryset())
+        return stream_export(
+            queryset,
+            self.export_fields,
+            request.accepted_renderer.format,
+            self.export_basename,
+        )
@@ -47,3 +47,17 @@ FAKE_URLS = [
     "lookup/",
     "filter/",
 ]
+
+# Decoy page served on GET (see myapp/decoys.py); paths not listed get "contact"
+DECOY_VARIANTS = {
+    "upload/": "upload",
+    "upload/image/": "upload",
+    "login.php": "login",
+    "dashboard.php": "login",
+    "api/admin/": "login",
+    "api/v1/admin/login/": "login",
+    "admin-login/": "login",
+    "cp/": "login",
+    "dashboard/login/": "login",
+    "adminpanel/": "login",
+}
@@ -1,8 +1,60 @@
 from django_filters import rest_framework as filters
 from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 
-from .models import BotEvent, AttackType
+from .models import BotEvent, AttackType, CorrelationSession, RequestPath, UserAgent
+from .dimensions import DIMENSION_COLUMNS, lookup
 from .enums import MethodChoice
+from .subnets import network_range
+
+
+def filter_cidr(queryset, name, value):
+    """`?cidr=10.0.0.0/8`: index range scan on the integer IP key."""
+    if not value:
+        return queryset
+    try:
+        version, low, high = network_range(value)
+    except ValueError as exc:
+        raise ValidationError({"cidr": [str(exc)]})
+    return queryset.filter(ip_version=version, ip_int__gte=low, ip_int__lte=high)
+
+
+def filter_dimension(queryset, name, value):
+    """
+    Exact match on an interned event column (`request_path`,
+    `bot_event__referer`, ...) through its key: an index lookup, no join.
+    """
+    if not value:
+        return queryset
+    prefix, _, column = name.rpartition("__")
+    key_column, model = DIMENSION_COLUMNS[column]
+    key = lookup(model, value)
+    if key is None:
+        return queryset.none()
+    return queryset.filter(**{"__".join(filter(None, [prefix, key_column])): key})
+
+
+def filter_bot_data(queryset, name, value):
+    """`?bot_data=`: submitted data, whether stored inline or as a shared payload."""
+    if not value:
+        return queryset
+    return queryset.filter(
+        Q(data_payload__contains_text=value) | Q(data_details__icontains=value)
+    )
+
+
+class PayloadSearchFilter(SearchFilter):
+    """
+    SearchFilter that accepts `<payload fk>__contains_text` in search_fields.
+    DRF's distinct check expects field names only; a payload FK never needs
+    distinct, so the lookup is dropped before the check.
+    """
+
+    def must_call_distinct(self, queryset, search_fields):
+        return super().must_call_distinct(
+            queryset, [field.removesuffix("__contains_text") for field in search_fields]
+        )
 
 
 class AggregatePathFilter(filters.FilterSet):
@@ -13,10 +65,38 @@ class AggregatePathFilter(filters.FilterSet):
     )
 
     class Meta:
-        model = BotEvent
+        model = RequestPath
         fields = ["most_popular_attack"]
 
 
+class AgentFilter(filters.FilterSet):
+    """Filterset for the user-agent family aggregate."""
+
+    is_automation_tool = filters.BooleanFilter(field_name="is_automation_tool")
+    os = filters.CharFilter(field_name="os", lookup_expr="exact")
+    family = filters.CharFilter(field_name="family", lookup_expr="exact")
+
+    class Meta:
+        model = UserAgent
+        fields = ["is_automation_tool", "os", "family"]
+
+
+class SubnetFilter(filters.FilterSet):
+    """Filterset for the subnet aggregate (applied before grouping)."""
+
+    cidr = filters.CharFilter(
+        method=filter_cidr, help_text="Subnets inside a network, e.g. 198.51.100.0/22."
+    )
+    ip_version = filters.ChoiceFilter(field_name="ip_version", choices=[(4, "4"), (6, "6")])
+    attack_attempted = filters.BooleanFilter(field_name="attack_attempted")
+    created_after = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = BotEvent
+        fields = ["ip_version", "attack_attempted", "created_after", "created_before"]
+
+
 class AggregateIPFilter(filters.FilterSet):
     """Custom filterset for AggregateIP with advanced filtering options."""
 
@@ -26,6 +106,9 @@ class AggregateIPFilter(filters.FilterSet):
     agent = filters.CharFilter(field_name="agent", lookup_expr="exact")
     language = filters.CharFilter(field_name="language", lookup_expr="exact")
     geo_location = filters.CharFilter(field_name="geo_location", lookup_expr="exact")
+    cidr = filters.CharFilter(
+        method=filter_cidr, help_text="IPs inside a network, e.g. 203.0.113.0/24."
+    )
 
     # Choice filters
     method = filters.ChoiceFilter(
@@ -57,27 +140,41 @@ class BotEventFilter(filters.FilterSet):
 
     # Exact filters
     ip_address = filters.CharFilter(field_name="ip_address", lookup_expr="exact")
+    cidr = filters.CharFilter(
+        method=filter_cidr, help_text="IPs inside a network, e.g. 203.0.113.0/24."
+    )
+    # Offline geo enrichment (see myapp/geoip.py)
+    country = filters.CharFilter(field_name="country", lookup_expr="exact")
+    asn = filters.NumberFilter(field_name="asn", lookup_expr="exact")
     exact_request_path = filters.CharFilter(
         field_name="request_path",
-        lookup_expr="exact",
+        method=filter_dimension,
         help_text="Exact match filter for request path. Alternative to request_path filter.",
     )
     email = filters.CharFilter(field_name="email", lookup_expr="exact")
     geo_location = filters.CharFilter(field_name="geo_location", lookup_expr="exact")
     language = filters.CharFilter(field_name="language", lookup_expr="exact")
-    request_path = filters.CharFilter(field_name="request_path", lookup_expr="exact")
-    referer = filters.CharFilter(field_name="referer", lookup_expr="exact")
-    origin = filters.CharFilter(field_name="origin", lookup_expr="exact")
-    agent = filters.CharFilter(field_name="agent", lookup_expr="exact")
+    # Interned columns, matched on their dimension key (see myapp/dimensions.py)
+    request_path = filters.CharFilter(field_name="request_path", method=filter_dimension)
+    referer = filters.CharFilter(field_name="referer", method=filter_dimension)
+    origin = filters.CharFilter(field_name="origin", method=filter_dimension)
+    agent = filters.CharFilter(field_name="agent", method=filter_dimension)
+    # Parsed user-agent columns (see myapp/agents.py)
+    agent_family = filters.CharFilter(field_name="agent_ref__family", lookup_expr="exact")
+    agent_os = filters.CharFilter(field_name="agent_ref__os", lookup_expr="exact")
+    automation_tool = filters.BooleanFilter(field_name="agent_ref__is_automation_tool")
     raw_attack_value = filters.CharFilter(
         field_name="attacks__raw_value",
         lookup_expr="icontains",
         help_text="Search in attack raw values (case-insensitive partial match).",
     )
     bot_data = filters.CharFilter(
-        field_name="data",
-        lookup_expr="icontains",
+        method=filter_bot_data,
+        help_text="Search in submitted data (case-insensitive partial match).",
     )
+    # Time range (lets PostgreSQL prune monthly partitions, see myapp/partitioning.py)
+    created_after = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
     # Boolean filter
     attack_attempted = filters.BooleanFilter(field_name="attack_attempted")
 
@@ -152,6 +249,13 @@ class BotEventFilter(filters.FilterSet):
             "correlation_token",
             "exact_request_path",
             "event_category",
+            "created_after",
+            "created_before",
+            "agent_family",
+            "agent_os",
+            "automation_tool",
+            "country",
+            "asn",
             # Note: spam_bot and scan_bot are custom filter methods (filter_spam_bot, filter_scan_bot)
             # They are automatically available as filters but should not be in Meta.fields
             # since they are not actual model fields
@@ -175,13 +279,15 @@ class AttackTypeFilter(filters.FilterSet):
         field_name="bot_event__ip_address", lookup_expr="exact"
     )
     request_path = filters.CharFilter(
-        field_name="bot_event__request_path", lookup_expr="exact"
+        field_name="bot_event__request_path", method=filter_dimension
     )
     method = filters.ChoiceFilter(
         field_name="bot_event__method",
         choices=BotEvent.MethodChoice.choices,
         help_text="Filter by HTTP method of the associated bot event (GET, POST, PUT, PATCH, DELETE).",
     )
+    created_after = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
 
     class Meta:
         model = AttackType
@@ -194,4 +300,46 @@ class AttackTypeFilter(filters.FilterSet):
             "ip_address",
             "request_path",
             "method",
+            "created_after",
+            "created_before",
+        ]
+
+
+class CorrelationSessionFilter(filters.FilterSet):
+    """Custom filterset for CorrelationSession (fill speed / timing ranges)."""
+
+    ip_address = filters.CharFilter(field_name="ip_address", lookup_expr="exact")
+    request_path = filters.CharFilter(field_name="request_path", lookup_expr="exact")
+    token = filters.UUIDFilter(field_name="token")
+    min_chars_per_second = filters.NumberFilter(
+        field_name="chars_per_second",
+        lookup_expr="gte",
+        help_text="Sessions filled at least this fast (characters per second).",
+    )
+    max_chars_per_second = filters.NumberFilter(
+        field_name="chars_per_second", lookup_expr="lte"
+    )
+    max_time_to_submit_ms = filters.NumberFilter(
+        field_name="time_to_submit_ms",
+        lookup_expr="lte",
+        help_text="Sessions submitted within this many milliseconds of the GET.",
+    )
+    submitted_after = filters.IsoDateTimeFilter(
+        field_name="first_submitted_at", lookup_expr="gte"
+    )
+    submitted_before = filters.IsoDateTimeFilter(
+        field_name="first_submitted_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = CorrelationSession
+        fields = [
+            "ip_address",
+            "request_path",
+            "token",
+            "min_chars_per_second",
+            "max_chars_per_second",
+            "max_time_to_submit_ms",
+            "submitted_after",
+            "submitted_before",
         ]
@@ -0,0 +1,318 @@
+"""
+Offline IP -> country / city / ASN lookup from a local range database.
+
+GEOIP_DATABASE points at either a file in the format below (built from a CSV
+with `build_geo_db`) or a MaxMind `.mmdb` file (GeoLite2 City / ASN; needs
+the optional `maxminddb` package). Either way the file is memory-mapped,
+so workers share the page cache and nothing is loaded up front, and a
+lookup is a binary search behind a per-worker LRU: microseconds, no network.
+A file that cannot be opened is logged once per worker and ingest falls back
+to the CDN geo headers; `enrich_geo` reports it as an error.
+
+Range file layout (all integers little-endian):
+
+    header   "<8sIII"   magic b"BFGEO01\\n", v4 range count, v6 range count,
+                        record count
+    v4       "<III"     start, end (inclusive, as integers), record index;
+                        sorted by start, non-overlapping
+    v6       "<16s16sI" start, end (16-byte big-endian addresses), record index
+    offsets  "<I" * (record count + 1)
+                        offsets of each record in the blob; the last one is
+                        the blob length
+    blob     UTF-8 JSON arrays [country, city, asn, as_org], one per record
+"""
+
+import bisect
+import csv
+import ipaddress
+import json
+import logging
+import mmap
+import struct
+import threading
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+
+MAGIC = b"BFGEO01\n"
+HEADER = struct.Struct("<8sIII")
+V4_RANGE = struct.Struct("<III")
+V6_RANGE = struct.Struct("<16s16sI")
+OFFSET = struct.Struct("<I")
+
+logger = logging.getLogger(__name__)
+
+
+class GeoRecord(NamedTuple):
+    country: str | None
+    city: str | None
+    asn: int | None
+    as_org: str | None
+
+    @property
+    def location(self):
+        """Same "Country, City" format as the CDN headers give geo_location."""
+        return ", ".join(part for part in (self.country, self.city) if part) or None
+
+
+class GeoDatabaseError(Exception):
+    """The geo database file is missing, malformed or unsupported."""
+
+
+class _Starts:
+    """Range start addresses of an mmapped section, as a sequence for bisect."""
+
+    def __init__(self, buffer, offset, count, record):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.record = record
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.record.unpack_from(self.buffer, self.offset + index * self.record.size)[0]
+
+
+class RangeDatabase:
+    """Reader for the range file format above."""
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            raise GeoDatabaseError(f"{path}: truncated header")
+        magic, v4_count, v6_count, records = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise GeoDatabaseError(f"{path}: not a range database")
+        offset = HEADER.size
+        self.v4 = _Starts(self.buffer, offset, v4_count, V4_RANGE)
+        offset += v4_count * V4_RANGE.size
+        self.v6 = _Starts(self.buffer, offset, v6_count, V6_RANGE)
+        offset += v6_count * V6_RANGE.size
+        self.offsets = offset
+        self.blob = offset + (records + 1) * OFFSET.size
+
+    def _find(self, starts, key):
+        index = bisect.bisect_right(starts, key) - 1
+        if index < 0:
+            return None
+        _, end, record = starts.record.unpack_from(
+            self.buffer, starts.offset + index * starts.record.size
+        )
+        return record if key <= end else None
+
+    def _record(self, index):
+        start = OFFSET.unpack_from(self.buffer, self.offsets + index * OFFSET.size)[0]
+        end = OFFSET.unpack_from(self.buffer, self.offsets + (index + 1) * OFFSET.size)[0]
+        return GeoRecord(*json.loads(self.buffer[self.blob + start : self.blob + end]))
+
+    def lookup(self, ip):
+        if ip.version == 4:
+            record = self._find(self.v4, int(ip))
+        else:
+            record = self._find(self.v6, ip.packed)
+        return None if record is None else self._record(record)
+
+    def close(self):
+        self.buffer.close()
+
+
+class MaxMindDatabase:
+    """Reader for MaxMind .mmdb files (City and/or ASN), through `maxminddb`."""
+
+    def __init__(self, path):
+        try:
+            import maxminddb
+        except ImportError as exc:
+            raise GeoDatabaseError(
+                "Reading .mmdb files requires the maxminddb package (pip install maxminddb)."
+            ) from exc
+        self.reader = maxminddb.open_database(str(path), maxminddb.MODE_MMAP)
+
+    def lookup(self, ip):
+        data = self.reader.get(str(ip))
+        if not data:
+            return None
+        city = data.get("city", {}).get("names", {}).get("en")
+        country = data.get("country", {}).get("iso_code")
+        return GeoRecord(
+            country,
+            city,
+            data.get("autonomous_system_number"),
+            data.get("autonomous_system_organization"),
+        )
+
+    def close(self):
+        self.reader.close()
+
+
+def open_database(path):
+    try:
+        with open(path, "rb") as handle:
+            magic = handle.read(len(MAGIC))
+    except OSError as exc:
+        raise GeoDatabaseError(f"Cannot open geo database {path}: {exc}") from exc
+    reader = RangeDatabase if magic == MAGIC else MaxMindDatabase
+    try:
+        return reader(path)
+    except (OSError, ValueError, RuntimeError) as exc:
+        # Empty file (mmap), unreadable or malformed .mmdb
+        raise GeoDatabaseError(f"Cannot read geo database {path}: {exc}") from exc
+
+
+class GeoLookup:
+    """An open database with an LRU of recent lookups in front."""
+
+    def __init__(self, path, cache_size):
+        self.path = path
+        self.database = open_database(path)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, address):
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        return self.database.lookup(ip)
+
+
+_lock = threading.Lock()
+_geo = None
+# (path, GeoDatabaseError) of the last database that failed to open
+_failure = None
+
+
+def get_lookup():
+    """
+    The worker's GeoLookup for GEOIP_DATABASE, or None when unset.
+    Raises GeoDatabaseError if the file cannot be opened; the failure is
+    logged and cached, so later calls re-raise without touching the file.
+    """
+    global _geo, _failure
+    path = getattr(settings, "GEOIP_DATABASE", None)
+    if not path:
+        return None
+    path = str(path)
+    geo = _geo
+    if geo is None or geo.path != path:
+        with _lock:
+            if _failure is not None and _failure[0] == path:
+                raise _failure[1]
+            if _geo is None or _geo.path != path:
+                try:
+                    _geo = GeoLookup(path, getattr(settings, "GEOIP_CACHE_SIZE", 10000))
+                except GeoDatabaseError as exc:
+                    logger.error("%s; geo enrichment is off for this worker", exc)
+                    _failure = (path, exc)
+                    raise
+            geo = _geo
+    return geo
+
+
+def available() -> bool:
+    """Whether GEOIP_DATABASE is set and could be opened."""
+    try:
+        return get_lookup() is not None
+    except GeoDatabaseError:
+        return False
+
+
+def lookup(address):
+    """GeoRecord for an IP address string, or None (no database, no match)."""
+    try:
+        geo = get_lookup()
+    except GeoDatabaseError:
+        return None
+    if geo is None or not address:
+        return None
+    return geo.lookup(address)
+
+
+def reset():
+    """Forget the open database (after GEOIP_DATABASE changes, and in tests)."""
+    global _geo, _failure
+    with _lock:
+        _geo = _failure = None
+
+
+def enrichment_fields(address, geo_location=None):
+    """
+    Model field values for an event from `address`: country, city, asn,
+    as_org, and geo_location when the CDN headers did not provide one.
+    """
+    record = lookup(address)
+    if record is None:
+        return {"geo_location": geo_location}
+    return {
+        "country": record.country,
+        "city": record.city,
+        "asn": record.asn,
+        "as_org": record.as_org,
+        "geo_location": geo_location or record.location,
+    }
+
+
+def read_csv_ranges(handle):
+    """
+    Rows of a CSV with a header of either `network` or `start_ip,end_ip`,
+    plus `country,city,asn,as_org` (any may be empty).
+    Yields (start ip, end ip, GeoRecord).
+    """
+    for row in csv.DictReader(handle):
+        if row.get("network"):
+            network = ipaddress.ip_network(row["network"], strict=False)
+            start, end = network.network_address, network.broadcast_address
+        else:
+            start = ipaddress.ip_address(row["start_ip"])
+            end = ipaddress.ip_address(row["end_ip"])
+        asn = (row.get("asn") or "").strip().upper().removeprefix("AS")
+        yield start, end, GeoRecord(
+            (row.get("country") or "").strip() or None,
+            (row.get("city") or "").strip() or None,
+            int(asn) if asn else None,
+            (row.get("as_org") or "").strip() or None,
+        )
+
+
+def build_database(ranges, path):
+    """
+    Write (start ip, end ip, GeoRecord) ranges to `path` in the range format.
+    Raises ValueError on overlapping ranges. Returns (v4, v6, records) counts.
+    """
+    records, v4, v6 = {}, [], []
+    for start, end, record in ranges:
+        if start.version != end.version or int(end) < int(start):
+            raise ValueError(f"Invalid range {start} - {end}")
+        index = records.setdefault(record, len(records))
+        (v4 if start.version == 4 else v6).append((int(start), int(end), index))
+
+    for ranges_ in (v4, v6):
+        ranges_.sort()
+        for previous, current in zip(ranges_, ranges_[1:]):
+            if current[0] <= previous[1]:
+                raise ValueError(
+                    f"Overlapping ranges at {ipaddress.ip_address(current[0])}"
+                )
+
+    blob, offsets = bytearray(), [0]
+    for record in records:  # insertion order == index order
+        blob += json.dumps(list(record), separators=(",", ":")).encode("utf-8")
+        offsets.append(len(blob))
+
+    with open(path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, len(v4), len(v6), len(records)))
+        for start, end, index in v4:
+            handle.write(V4_RANGE.pack(start, end, index))
+        for start, end, index in v6:
+            handle.write(
+                V6_RANGE.pack(start.to_bytes(16, "big"), end.to_bytes(16, "big"), index)
+            )
+        for offset in offsets:
+            handle.write(OFFSET.pack(offset))
+        handle.write(blob)
+    return len(v4), len(v6), len(records)
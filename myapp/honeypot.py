@@ -0,0 +1,273 @@
+"""
+Honeypot ingest shared by HoneypotView and the honeypot middleware.
+
+`log_event` turns one request into a BotEvent (plus its AttackType rows and
+the sketch/counter updates). The fast path calls it with params parsed by
+`request_params`, which only handles what is cheap to parse and returns
+None for everything else, so those requests keep going through DRF and
+get exactly the same responses (415, 400, ...) as before.
+
+FAKE_URLS are the interactive decoys (a form, correlated POSTs). Every
+other path that resolves to nothing is captured passively by
+CatchAllCaptureMiddleware under `capture_path(path)`. Numeric, hex/UUID
+and long token segments are collapsed (`/user/{n}/`,
+`/static/{hash}.js`) and the result is capped at HONEYPOT_PATH_MAX_LENGTH.
+Once the RequestPath table holds HONEYPOT_CATCH_ALL_MAX_PATHS distinct
+paths, captured paths not seen before are stored as `/{other}`. Workers
+check the count independently, so the table can overshoot by a few rows.
+This keeps `request_path` groupable and `/api/aggregate-paths/` fast
+however many paths scanners make up.
+"""
+
+import json
+import re
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+
+from . import dimensions, distinct, geoip, metrics, sketches
+from .caching import bump_data_version
+from .models import AttackType, BotEvent, RequestPath
+from .payloads import intern_values
+from .utils import extract_attacks, extract_email_from_payload, extract_meta_data
+
+FORM_TYPE = "application/x-www-form-urlencoded"
+MULTIPART_TYPE = "multipart/form-data"
+JSON_TYPE = "application/json"
+
+
+def request_params(request):
+    """
+    The params of a request as DRF would parse them (`request.GET` for GET),
+    or None when this needs DRF's parsers: unknown content types, multipart
+    outside POST, invalid JSON or a JSON body that is not an object.
+    """
+    if request.method == "GET":
+        return request.GET
+    if not int(request.META.get("CONTENT_LENGTH") or 0):
+        return {}  # DRF does not parse an empty body either
+
+    content_type = request.content_type
+    if content_type == FORM_TYPE:
+        return QueryDict(request.body, encoding=request.encoding)
+    if content_type == MULTIPART_TYPE:
+        if request.method != "POST":
+            return None
+        if request.FILES:
+            return with_file_names(request.POST, request.FILES)
+        return request.POST
+    if content_type == JSON_TYPE:
+        try:
+            data = json.loads(request.body, parse_constant=_reject_constant)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return None
+
+
+OVERFLOW_PATH = "/{other}"
+TRUNCATED = "{more}"
+
+_NUMBER = re.compile(r"^\d+$")
+_HASH = re.compile(r"^(?:[0-9a-fA-F]{16,}|[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})$")
+_TOKEN = re.compile(r"^(?=.*\d)[A-Za-z0-9_\-=]{32,}$")
+# Seconds a worker trusts "RequestPath is full" before counting again
+FULL_CHECK_INTERVAL = 60
+
+
+def _normalize_segment(segment):
+    stem, dot, extension = segment.partition(".")
+    for pattern, placeholder in ((_NUMBER, "{n}"), (_HASH, "{hash}"), (_TOKEN, "{token}")):
+        if pattern.match(stem):
+            return placeholder + dot + extension
+    return segment
+
+
+def normalize_path(path):
+    """Collapse variable segments, empty segments and overlong paths."""
+    max_length = getattr(settings, "HONEYPOT_PATH_MAX_LENGTH", 200)
+    segments = [_normalize_segment(segment) for segment in path.split("/") if segment]
+    normalized = "/" + "/".join(segments)
+    if segments and path.endswith("/"):
+        normalized += "/"
+    if len(normalized) > max_length:
+        cut = normalized.rfind("/", 0, max_length - len(TRUNCATED))
+        normalized = normalized[: cut + 1] + TRUNCATED
+    return normalized
+
+
+class _PathLimit:
+    """Per-worker memo of "the RequestPath table is full"."""
+
+    def __init__(self):
+        self.full_until = 0.0
+
+    def full(self):
+        now = time.monotonic()
+        if now < self.full_until:
+            return True
+        limit = getattr(settings, "HONEYPOT_CATCH_ALL_MAX_PATHS", 10000)
+        if RequestPath.objects.count() < limit:
+            return False
+        self.full_until = now + FULL_CHECK_INTERVAL
+        return True
+
+    def clear(self):
+        self.full_until = 0.0
+
+
+_path_limit = _PathLimit()
+
+
+def capture_path(path):
+    """The `request_path` to store for an unmatched path (see module docstring)."""
+    normalized = normalize_path(path)
+    if dimensions.lookup(RequestPath, normalized) is not None:
+        return normalized
+    return OVERFLOW_PATH if _path_limit.full() else normalized
+
+
+def clear_cache():
+    _path_limit.clear()
+
+
+def with_file_names(data, files):
+    """Form data with each upload replaced by its file name (payloads are stored as JSON)."""
+    data = data.copy()
+    for name in files:
+        data.setlist(name, [upload.name for upload in files.getlist(name)])
+    return data
+
+
+def _reject_constant(name):
+    # DRF's JSONParser rejects NaN/Infinity too
+    raise ValueError(f"Out of range float values are not JSON compliant: {name}")
+
+
+def _save_event(bot_event, attacks, payload_values):
+    """
+    INSERT the event and its attacks (one bulk query) in one transaction.
+    Payload digests may come from this worker's cache; if `intern_payloads
+    --prune` deleted one since, the foreign key check fails, so the payloads
+    are written again without the cache and the insert is retried once.
+    """
+    # Dimension keys first, so a rollback below cannot discard them; only the
+    # keys are stored (the dimension tables hold the text)
+    BotEvent.fill_derived_fields([bot_event])
+    dimensions.clear_text([bot_event])
+    for retry in (False, True):
+        if retry:
+            intern_values(payload_values, use_cache=False)
+        try:
+            with transaction.atomic():
+                bot_event.save(force_insert=True)
+                if attacks:
+                    AttackType.objects.bulk_create(attacks)
+            return
+        except IntegrityError:
+            if retry or not payload_values:
+                raise
+
+
+def log_event(request, method_type, params, ctoken, path=None):
+    """
+    Store one honeypot hit with its detected attacks and return the BotEvent.
+    `path` overrides `request.path` (normalized catch-all paths).
+    """
+    meta_data = extract_meta_data(request.META)
+    # Use extract_email_from_payload which handles QueryDict lists, validates format, and checks multiple fields
+    email = extract_email_from_payload(params)
+
+    # Optimize: Collect all attacks and use bulk_create instead of individual creates
+    # This reduces N database writes to 1
+    attacks_to_create = []
+    attacks_found = False
+
+    # Check for attacks before creating the event (to determine category)
+    # Ensure params is dict-like and iterable
+    if params:
+        with metrics.timer("detect"):
+            for key, value in params.items():
+                attack_list = extract_attacks(value)
+                if attack_list:
+                    for attack in attack_list:
+                        pattern, category, match = attack
+                        attacks_to_create.append(
+                            AttackType(
+                                target_field=key,
+                                pattern=pattern,
+                                raw_value=match,
+                                category=category.value,  # Convert enum to string value
+                                # for full context
+                                full_value=value,
+                            )
+                        )
+                    attacks_found = True
+
+    # Extract submission data information
+    if params and isinstance(params, dict):
+        data_present = True
+        field_count = len(params)
+        target_fields = list(params.keys())
+        data_details = dict(params)  # Store all param data
+    else:
+        data_present = False
+        field_count = 0
+        target_fields = None
+        data_details = None
+
+    # Store payloads once by content hash; the inline columns stay empty
+    payload_values = ([data_details] if data_details is not None else []) + [
+        str(attack.full_value) for attack in attacks_to_create
+    ]
+    digests = intern_values(payload_values)
+    if data_details is not None:
+        data_payload_id, digests = digests[0], digests[1:]
+    else:
+        data_payload_id = None
+    for attack, digest in zip(attacks_to_create, digests):
+        attack.full_value = ""
+        attack.full_value_payload_id = digest
+
+    # Country/city/ASN from the local geo database (no network); fills
+    # geo_location when the CDN headers did not
+    geo = geoip.enrichment_fields(meta_data["ip_address"], meta_data["geo_location"])
+
+    # Create main BotEvent, categorized before the INSERT (no follow-up UPDATE)
+    request_path = path or request.path
+    bot_event = BotEvent(
+        method=method_type,
+        ip_address=meta_data["ip_address"],
+        agent=meta_data["agent"],
+        referer=meta_data["referer"],
+        language=meta_data["lang"],
+        origin=meta_data["origin"],
+        request_path=request_path,
+        correlation_token=ctoken,
+        email=email,
+        attack_attempted=attacks_found,
+        # submission data
+        data_present=data_present,
+        field_count=field_count,
+        target_fields=target_fields,
+        data_payload_id=data_payload_id,
+        **geo,
+    )
+    bot_event.set_category(save=False)
+    for attack in attacks_to_create:
+        attack.bot_event = bot_event
+    _save_event(bot_event, attacks_to_create, payload_values)
+
+    sketches.record_event(
+        bot_event.ip_address,
+        request_path,
+        [attack.category for attack in attacks_to_create],
+    )
+    distinct.record_event(bot_event, meta_data["agent"], request_path)
+
+    # Invalidate cached analytics responses
+    bump_data_version()
+
+    return bot_event
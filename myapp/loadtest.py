@@ -0,0 +1,293 @@
+"""
+Load testing for the honeypot endpoints (`loadtest` command).
+
+A seeded mix of scan GETs, spam POSTs and attack payloads (form fields and
+query strings) is spread over the FAKE_URLS paths and replayed with N
+threads against either:
+
+- the WSGI app in-process (`InProcessTarget`, through django.test.Client):
+  each thread has its own database connection, so SQL statements are
+  counted per request and database errors (SQLite "database is locked")
+  are reported by message;
+- a running server (`HttpTarget`, plain urllib): what a deployment sees,
+  including the server's own worker and connection limits. SQL counts are
+  not visible from outside.
+
+Source IPs are sent as X-Forwarded-For from a Zipf-weighted pool, so the
+per-IP sketches and counters do the same work as under real traffic.
+Errors that the app logs and swallows (e.g. a heavy-hitter flush that hit
+a locked database) are counted from the `myapp` loggers as well.
+Requests write real events: point the app at a scratch database.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client
+
+from .fake_urls import FAKE_URLS
+from .synthetic import (
+    AGENTS,
+    ATTACK_FIELDS,
+    DETECTED_PAYLOADS,
+    SPAM_MESSAGES,
+    SPAM_NAMES,
+    EventGenerator,
+    _weighted,
+    _zipf,
+)
+
+KINDS = ("scan", "spam", "attack")
+
+
+class PlannedRequest(NamedTuple):
+    kind: str
+    method: str
+    path: str
+    data: dict | None
+    headers: dict
+
+
+class Result(NamedTuple):
+    kind: str
+    status: int | None
+    seconds: float
+    queries: int | None
+    error: str | None
+
+
+def build_plan(count, seed=0, mix=(0.5, 0.3, 0.2)):
+    """
+    `count` requests drawn from a seeded RNG; `mix` is the (scan, spam,
+    attack) share.
+    """
+    rng = random.Random(seed)
+    paths = _zipf(["/" + url for url in FAKE_URLS])
+    agents = _weighted([(agent, weight) for agent, weight in AGENTS if agent])
+    ips = _zipf(EventGenerator._ip_pool(max(100, count // 20)))
+
+    def pick(distribution):
+        values, cumulative = distribution
+        return rng.choices(values, cum_weights=cumulative)[0]
+
+    plan = []
+    for _ in range(count):
+        kind = rng.choices(KINDS, weights=mix)[0]
+        headers = {"User-Agent": pick(agents), "X-Forwarded-For": pick(ips)}
+        path = pick(paths)
+        if kind == "scan":
+            plan.append(PlannedRequest(kind, "GET", path, None, headers))
+        elif kind == "spam":
+            name = rng.choice(SPAM_NAMES)
+            data = {
+                "name": name,
+                "email": f"{name.split()[0].lower()}{rng.randrange(1000)}@example.com",
+                "message": rng.choice(SPAM_MESSAGES),
+            }
+            plan.append(PlannedRequest(kind, "POST", path, data, headers))
+        else:
+            payload, _ = rng.choice(DETECTED_PAYLOADS)
+            data = {rng.choice(ATTACK_FIELDS): payload}
+            # Probes come both as form posts and in the query string
+            method = "POST" if rng.random() < 0.7 else "GET"
+            plan.append(PlannedRequest(kind, method, path, data, headers))
+    return plan
+
+
+def _error_label(exc):
+    message = str(exc)
+    if "database is locked" in message:
+        return "database is locked"
+    return f"{type(exc).__name__}: {message[:80]}"
+
+
+def local_client(**kwargs):
+    """A test Client whose Host header passes ALLOWED_HOSTS outside tests."""
+    hosts = [host for host in settings.ALLOWED_HOSTS if "*" not in host]
+    return Client(HTTP_HOST=hosts[0].lstrip(".") if hosts else "localhost", **kwargs)
+
+
+class InProcessTarget:
+    """Requests through the WSGI handler, one Client per thread."""
+
+    name = "wsgi"
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def _client(self):
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = local_client(raise_request_exception=False)
+        return client
+
+    def send(self, request):
+        client = self._client()
+        headers = {name.lower().replace("-", "_"): value for name, value in request.headers.items()}
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count):
+            if request.method == "GET":
+                response = client.get(request.path, request.data, headers=headers)
+            else:
+                response = client.post(request.path, request.data, headers=headers)
+        seconds = time.perf_counter() - start
+
+        error = None
+        if response.exc_info is not None:
+            error = _error_label(response.exc_info[1])
+        elif response.status_code >= 400:
+            error = f"HTTP {response.status_code}"
+        return Result(request.kind, response.status_code, seconds, queries, error)
+
+    def finish_thread(self):
+        connections.close_all()
+
+
+class HttpTarget:
+    """Requests to a running server over HTTP (keep-alive is not used)."""
+
+    name = "http"
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def send(self, request):
+        url = self.base_url + request.path
+        body = None
+        if request.data and request.method == "GET":
+            url += "?" + urllib.parse.urlencode(request.data)
+        elif request.data:
+            body = urllib.parse.urlencode(request.data).encode()
+        http_request = urllib.request.Request(
+            url, data=body, headers=request.headers, method=request.method
+        )
+
+        status = error = None
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+            text = exc.read().decode("utf-8", "replace")
+            if "database is locked" in text:
+                error = "database is locked"
+            else:
+                error = f"HTTP {status}"
+        except OSError as exc:
+            error = _error_label(exc)
+        seconds = time.perf_counter() - start
+        return Result(request.kind, status, seconds, None, error)
+
+    def finish_thread(self):
+        pass
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted `values`."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+class _LoggedErrors(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.counts = Counter()
+
+    def emit(self, record):
+        label = record.getMessage()
+        if record.exc_info:
+            label = _error_label(record.exc_info[1])
+        self.counts[label] += 1  # handle() holds the handler lock
+
+
+def run(target, plan, concurrency=1):
+    """
+    Replay `plan` with `concurrency` threads.
+    Returns (results, wall seconds, Counter of errors logged by the app).
+    """
+    queue = iter(plan)
+    lock = threading.Lock()
+    results = []
+    logged = _LoggedErrors()
+
+    def worker():
+        done = []
+        try:
+            while True:
+                with lock:
+                    request = next(queue, None)
+                if request is None:
+                    break
+                done.append(target.send(request))
+        finally:
+            target.finish_thread()
+        with lock:
+            results.extend(done)
+
+    app_logger = logging.getLogger("myapp")
+    app_logger.addHandler(logged)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+    finally:
+        app_logger.removeHandler(logged)
+    return results, time.perf_counter() - start, logged.counts
+
+
+def summarize(results, elapsed, logged_errors=None):
+    """Throughput, latency percentiles (ms), SQL per request and errors."""
+    latencies = sorted(result.seconds * 1000 for result in results)
+    queries = [result.queries for result in results if result.queries is not None]
+
+    def latency(values):
+        values = sorted(values)
+        return {
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else None,
+        }
+
+    return {
+        "requests": len(results),
+        "seconds": elapsed,
+        "throughput": len(results) / elapsed if elapsed else 0.0,
+        "latency_ms": latency(latencies),
+        "latency_ms_by_kind": {
+            kind: latency(r.seconds * 1000 for r in results if r.kind == kind)
+            for kind in KINDS
+        },
+        "sql_per_request": {
+            "mean": sum(queries) / len(queries),
+            "max": max(queries),
+        }
+        if queries
+        else None,
+        "status_codes": dict(Counter(str(result.status) for result in results)),
+        "errors": dict(Counter(result.error for result in results if result.error)),
+        "logged_errors": dict(logged_errors or {}),
+    }
@@ -0,0 +1,75 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from myapp.archive import ArchiveError, archive, delete_archived
+from myapp.caching import bump_data_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive events (and their attacks) older than a cutoff to gzipped NDJSON "
+        "with a manifest, verify, then delete them in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=getattr(settings, "ARCHIVE_AFTER_DAYS", 30),
+            help="Archive events older than this many days",
+        )
+        parser.add_argument(
+            "--before",
+            help="Archive events before this date (YYYY-MM-DD); overrides --older-than-days",
+        )
+        parser.add_argument(
+            "--output",
+            default=str(getattr(settings, "ARCHIVE_DIR", "archive")),
+            help="Directory that receives the archive run",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows deleted per transaction"
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Write and verify the archive but do not delete anything",
+        )
+
+    def _cutoff(self, options):
+        if options["before"]:
+            day = parse_date(options["before"])
+            if day is None:
+                raise CommandError("--before must be a date (YYYY-MM-DD).")
+            return timezone.make_aware(datetime.combine(day, time.min))
+        return timezone.now() - timedelta(days=options["older_than_days"])
+
+    def handle(self, *args, **options):
+        cutoff = self._cutoff(options)
+        root = f"{options['output']}/{timezone.now():%Y%m%dT%H%M%S}"
+        self.stdout.write(f"Archiving events before {cutoff.isoformat()} to {root}")
+
+        try:
+            manifest = archive(root, cutoff)
+        except ArchiveError as exc:
+            raise CommandError(f"Archive verification failed, nothing deleted: {exc}")
+
+        for table, info in manifest["tables"].items():
+            self.stdout.write(f"{table}: {info['rows']} rows in {len(info['files'])} files")
+
+        if options["keep"]:
+            self.stdout.write(self.style.SUCCESS("Archive written (--keep: no rows deleted)."))
+            return
+
+        deleted = delete_archived(cutoff, options["batch_size"])
+        bump_data_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Deleted "
+                + ", ".join(f"{count} {table}" for table, count in deleted.items())
+            )
+        )
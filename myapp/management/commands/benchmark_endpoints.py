@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.benchmarks import CASES, check_baseline, check_budgets, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the analytics endpoints on synthetic datasets of increasing size, "
+        "report the growth curve and query plans, and fail on budget regressions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Dataset sizes (events)",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed requests per case (median)"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+        parser.add_argument(
+            "--cases",
+            nargs="+",
+            choices=[case.name for case in CASES],
+            help="Only run these cases",
+        )
+        parser.add_argument(
+            "--budgets",
+            help='JSON file of latency budgets: {"case": ms} or {"case": {"size": ms}}',
+        )
+        parser.add_argument(
+            "--baseline", help="Results JSON of an earlier run to compare against"
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.5,
+            help="Fail when a case is this many times slower than the baseline",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the benchmark database, so the next run only seeds new rows",
+        )
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help="Seed the configured database instead of a separate benchmark one",
+        )
+
+    def _load(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+
+    def _progress(self, size, case, measured):
+        scans = ", ".join(measured["full_scans"]) or "-"
+        self.stdout.write(
+            f"{size:>10}  {case.name:<24}{measured['ms']:>9.1f}{measured['queries']:>6}"
+            f"  {scans}"
+        )
+
+    def handle(self, *args, **options):
+        budgets = self._load(options["budgets"]) if options["budgets"] else {}
+        baseline = self._load(options["baseline"]) if options["baseline"] else None
+        cases = [case for case in CASES if case.name in (options["cases"] or [case.name])]
+
+        old_name = connection.settings_dict["NAME"]
+        if not options["current_db"]:
+            # A separate database; for SQLite a file, not the in-memory default
+            test_settings = connection.settings_dict.setdefault("TEST", {})
+            if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+                test_settings["NAME"] = os.path.join(
+                    tempfile.gettempdir(), "botfarm_benchmark.sqlite3"
+                )
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=options["keepdb"], serialize=False
+            )
+
+        self.stdout.write(f"{'rows':>10}  {'case':<24}{'ms':>9}{'sql':>6}  full scans")
+        try:
+            results = run_suite(
+                options["sizes"],
+                cases,
+                repeat=options["repeat"],
+                seed=options["seed"],
+                progress=self._progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if not options["current_db"]:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=options["keepdb"]
+                )
+
+        self.stdout.write("\nGrowth (time ~ rows^k):")
+        for name, entry in results["cases"].items():
+            exponents = " ".join(
+                "   -" if k is None else f"{k:>4.2f}" for k in entry["growth"]
+            )
+            self.stdout.write(f"  {name:<24}{exponents}")
+
+        if options["output"]:
+            results["database"] = connection.vendor
+            with open(options["output"], "w") as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        violations = check_budgets(results, budgets)
+        if baseline is not None:
+            violations += check_baseline(results, baseline, options["tolerance"])
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f"{len(violations)} latency budget(s) exceeded")
@@ -0,0 +1,108 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.models import BotEvent, AttackType
+from myapp.views import BotEventViewSet, AttackTypeViewSet
+from myapp.serializers import (
+    BotEventListSerializer,
+    AttackTypeListSerializer,
+    BotEventListRowSerializer,
+    AttackTypeListRowSerializer,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark list serialization: ModelSerializer vs values() row serializers "
+        "(rows/sec at page sizes 25 and 100)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Create this many fake events first (rolled back afterwards)",
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=50, help="Pages serialized per case"
+        )
+        parser.add_argument(
+            "--page-sizes",
+            type=int,
+            nargs="+",
+            default=[25, 100],
+            help="Page sizes to benchmark",
+        )
+
+    def _time(self, func, iterations):
+        start = time.perf_counter()
+        rows = 0
+        for _ in range(iterations):
+            rows += len(func())
+        elapsed = time.perf_counter() - start
+        return rows / elapsed if elapsed else 0.0
+
+    def _seed(self, count):
+        from myapp.tests.factories import BotEventFactory, AttackTypeFactory
+
+        for i in range(count):
+            bot_event = BotEventFactory()
+            if i % 3 == 0:
+                AttackTypeFactory(bot_event=bot_event)
+
+    def _run(self, options):
+        # Same base querysets the list views use (annotations included)
+        bot_events = BotEventViewSet().get_queryset().order_by("-created_at")
+        attacks = AttackTypeViewSet.queryset.order_by("-created_at")
+
+        cases = [
+            ("bot-events", bot_events, BotEventListSerializer, BotEventListRowSerializer),
+            ("attacks", attacks, AttackTypeListSerializer, AttackTypeListRowSerializer),
+        ]
+
+        self.stdout.write(
+            f"BotEvents: {BotEvent.objects.count()}  Attacks: {AttackType.objects.count()}"
+        )
+        self.stdout.write(
+            f"{'endpoint':<12}{'page':>6}{'drf rows/s':>14}{'fast rows/s':>14}{'speedup':>10}"
+        )
+        for name, queryset, serializer_class, row_serializer_class in cases:
+            rows = queryset.select_related(None).prefetch_related(None).values(
+                *row_serializer_class.get_columns()
+            )
+            for page_size in options["page_sizes"]:
+                drf = self._time(
+                    lambda: serializer_class(
+                        list(queryset[:page_size]), many=True
+                    ).data,
+                    options["iterations"],
+                )
+                fast = self._time(
+                    lambda: row_serializer_class(list(rows[:page_size])).data,
+                    options["iterations"],
+                )
+                speedup = fast / drf if drf else 0.0
+                self.stdout.write(
+                    f"{name:<12}{page_size:>6}{drf:>14.0f}{fast:>14.0f}{speedup:>9.1f}x"
+                )
+
+    def handle(self, *args, **options):
+        if not options["seed"]:
+            self._run(options)
+            return
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {options['seed']} events...")
+                self._seed(options["seed"])
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Seed data rolled back."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.geoip import build_database, read_csv_ranges
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a geo range database (see myapp/geoip.py) from a CSV with "
+        "network or start_ip,end_ip columns plus country,city,asn,as_org"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv", help="Input CSV file")
+        parser.add_argument("output", help="Database file to write (point GEOIP_DATABASE at it)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["csv"], newline="", encoding="utf-8") as handle:
+                v4, v6, records = build_database(read_csv_ranges(handle), options["output"])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {options['output']}: {v4} IPv4 and {v6} IPv6 ranges, {records} records."
+            )
+        )
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp import geoip
+from myapp.caching import bump_data_version
+from myapp.models import BotEvent
+
+ENRICHED_FIELDS = ["country", "city", "asn", "as_org", "geo_location"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill country, city, ASN (and a missing geo_location) of existing events "
+        "from GEOIP_DATABASE, in keyset batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=2000, help="Events updated per transaction"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-enrich every event, not just those without country and ASN",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if geoip.get_lookup() is None:
+                raise CommandError("GEOIP_DATABASE is not set.")
+        except geoip.GeoDatabaseError as exc:
+            raise CommandError(str(exc)) from exc
+
+        queryset = BotEvent.objects.filter(ip_address__isnull=False)
+        if not options["all"]:
+            queryset = queryset.filter(country__isnull=True, asn__isnull=True)
+
+        scanned = updated = 0
+        last_pk = None
+        while True:
+            batch = queryset.order_by("pk").only("pk", "ip_address", *ENRICHED_FIELDS)
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            events = list(batch[: options["batch_size"]])
+            if not events:
+                break
+            changed = []
+            for event in events:
+                record = geoip.lookup(event.ip_address)
+                if record is None:
+                    continue
+                event.country, event.city = record.country, record.city
+                event.asn, event.as_org = record.asn, record.as_org
+                event.geo_location = event.geo_location or record.location
+                changed.append(event)
+            if changed:
+                with transaction.atomic():
+                    BotEvent.objects.bulk_update(changed, ENRICHED_FIELDS)
+            scanned += len(events)
+            updated += len(changed)
+            last_pk = events[-1].pk
+
+        if updated:
+            bump_data_version()
+        self.stdout.write(
+            self.style.SUCCESS(f"Enriched {updated} of {scanned} events.")
+        )
@@ -1,5 +1,13 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import connection, connections
 from myapp.models import BotEvent, AttackType
+from myapp import synthetic
+from myapp.caching import bump_data_version
 from myapp.tests.factories import BotEventFactory, AttackTypeFactory
 import random
 from faker import Faker
@@ -21,6 +29,35 @@ class Command(BaseCommand):
             default=0.3,
             help="Percentage of bots that will attempt attacks",
         )
+        parser.add_argument(
+            "--fast",
+            action="store_true",
+            help=(
+                "Build rows in memory and bulk insert them (COPY on PostgreSQL) "
+                "instead of one factory call per row; for millions of rows"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="--fast: generator processes (PostgreSQL only; SQLite uses 1)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="--fast: RNG seed; same seed and --workers give the same data",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="--fast: rows per insert"
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="--fast: spread created_at over this many past days",
+        )
 
     def _create_scan_event(self, ip=None):
         """Create a scan event (no data, no attack)."""
@@ -53,7 +90,55 @@ class Command(BaseCommand):
 
         return bot_event
 
+    def _handle_fast(self, options):
+        total = options["bots"]
+        workers = max(1, options["workers"])
+        if connection.vendor != "postgresql" and workers > 1:
+            self.stdout.write("SQLite allows one writer at a time; using 1 worker.")
+            workers = 1
+
+        # Shard i gets seed + i and an equal share of the rows
+        shards = [
+            (total // workers + (1 if i < total % workers else 0), options["seed"] + i)
+            for i in range(workers)
+        ]
+        kwargs = dict(
+            total=total,
+            attack_rate=options["attacks"],
+            days=options["days"],
+            batch_size=options["batch_size"],
+        )
+        started = time.perf_counter()
+        if workers == 1:
+            results = [synthetic.generate(count, seed, **kwargs) for count, seed in shards]
+        else:
+            # Children must not share the parent's database connection
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                futures = [
+                    pool.submit(synthetic.generate, count, seed, **kwargs)
+                    for count, seed in shards
+                ]
+                results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        events = sum(result[0] for result in results)
+        attacks = sum(result[1] for result in results)
+        bump_data_version()
+        call_command("rebuild_heavy_hitters", stdout=self.stdout)
+        call_command("rebuild_distinct_counters", stdout=self.stdout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {events} events and {attacks} attacks in {elapsed:.1f}s "
+                f"({events / elapsed if elapsed else 0:.0f} events/s, {workers} worker(s))."
+            )
+        )
+
     def handle(self, *args, **options):
+        if options["fast"]:
+            return self._handle_fast(options)
+
         num_bots = options["bots"]
         attack_rate = options["attacks"]
 
@@ -83,6 +168,11 @@ class Command(BaseCommand):
             if (i + 1) % 10 == 0:
                 self.stdout.write(f"Created {i + 1}/{num_bots} bots...")
 
+        bump_data_version()
+        # Factories bypass ingest, so reseed the sketches from the table
+        call_command("rebuild_heavy_hitters", stdout=self.stdout)
+        call_command("rebuild_distinct_counters", stdout=self.stdout)
+
         self.stdout.write(
             self.style.SUCCESS(
                 f"\nSuccessfully created {num_bots} bot events!\n"
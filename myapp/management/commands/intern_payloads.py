@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.models import AttackType, BotEvent, Payload
+from myapp.payloads import intern_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Move inline data_details / full_value values into the shared payload "
+        "store, in keyset batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows converted per transaction"
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help=(
+                "Also delete payloads no event or attack references. Ingest "
+                "re-stores a pruned payload that a worker still had cached."
+            ),
+        )
+
+    def _convert(self, queryset, column, fk, empty, batch_size):
+        total, last_pk = 0, None
+        while True:
+            batch = queryset.order_by("pk")
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            rows = list(batch.values_list("pk", column)[:batch_size])
+            if not rows:
+                return total
+            digests = intern_values(value for _, value in rows)
+            objects = [
+                queryset.model(pk=pk, **{column: empty, f"{fk}_id": digest})
+                for (pk, _), digest in zip(rows, digests)
+            ]
+            with transaction.atomic():
+                queryset.model.objects.bulk_update(objects, [column, fk])
+            total += len(rows)
+            last_pk = rows[-1][0]
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        events = self._convert(
+            BotEvent.objects.filter(data_details__isnull=False, data_payload__isnull=True),
+            "data_details",
+            "data_payload",
+            None,
+            batch_size,
+        )
+        attacks = self._convert(
+            AttackType.objects.filter(full_value_payload__isnull=True).exclude(
+                full_value=""
+            ),
+            "full_value",
+            "full_value_payload",
+            "",
+            batch_size,
+        )
+        self.stdout.write(f"Interned {events} event payloads, {attacks} attack values")
+
+        if options["prune"]:
+            pruned, _ = Payload.objects.filter(
+                bot_events__isnull=True, attacks__isnull=True
+            ).delete()
+            self.stdout.write(f"Pruned {pruned} unreferenced payloads")
+
+        self.stdout.write(self.style.SUCCESS("Payload store up to date."))
@@ -0,0 +1,103 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from myapp.loadtest import HttpTarget, InProcessTarget, build_plan, run, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a mix of scan/spam/attack requests against the honeypot URLs "
+        "(in-process WSGI or a running server) and report throughput, latency "
+        "percentiles, SQL per request and errors. Writes real events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Requests to send"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1],
+            help="Thread counts; one run per value (e.g. 1 4 16)",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server (e.g. http://127.0.0.1:8000); "
+            "default is the in-process WSGI app",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Request mix seed")
+        parser.add_argument(
+            "--mix",
+            default="50,30,20",
+            help="scan,spam,attack shares (default 50,30,20)",
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=50, help="Untimed requests sent first"
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+
+    def handle(self, *args, **options):
+        try:
+            mix = tuple(float(share) for share in options["mix"].split(","))
+        except ValueError:
+            mix = ()
+        if len(mix) != 3 or min(mix) < 0 or not sum(mix):
+            raise CommandError("--mix takes three non-negative shares, e.g. 50,30,20")
+        if min(options["concurrency"]) < 1 or options["requests"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        if options["url"]:
+            target = HttpTarget(options["url"])
+        else:
+            target = InProcessTarget()
+
+        if options["warmup"]:
+            run(target, build_plan(options["warmup"], options["seed"] - 1, mix))
+
+        runs = []
+        self.stdout.write(
+            f"{'threads':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'sql/req':>9}{'errors':>8}"
+        )
+        for concurrency in options["concurrency"]:
+            plan = build_plan(options["requests"], options["seed"], mix)
+            results, elapsed, logged = run(target, plan, concurrency)
+            summary = {"concurrency": concurrency, **summarize(results, elapsed, logged)}
+            runs.append(summary)
+
+            latency = summary["latency_ms"]
+            sql = summary["sql_per_request"]
+            sql_mean = f"{sql['mean']:.1f}" if sql else "-"
+            self.stdout.write(
+                f"{concurrency:>8}{summary['throughput']:>10.1f}{latency['p50']:>9.1f}"
+                f"{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                f"{sql_mean:>9}"
+                f"{sum(summary['errors'].values()):>8}"
+            )
+            for error, count in summary["errors"].items():
+                self.stdout.write(self.style.WARNING(f"    {count} x {error}"))
+            for error, count in summary["logged_errors"].items():
+                self.stdout.write(self.style.WARNING(f"    {count} x {error} (logged)"))
+
+        if options["output"]:
+            report = {
+                "target": options["url"] or target.name,
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "started": datetime.now(timezone.utc).isoformat(),
+                "requests": options["requests"],
+                "seed": options["seed"],
+                "mix": dict(zip(("scan", "spam", "attack"), mix)),
+                "runs": runs,
+            }
+            with open(options["output"], "w") as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from myapp.partitioning import (
+    PARTITIONED_MODELS,
+    REFERENCING_MODELS,
+    PartitionManager,
+    add_months,
+    convert_sql,
+    create_partition_sql,
+    expired_partitions,
+    month_start,
+    orphaned_attacks_sql,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly partitions of the event tables (PostgreSQL): convert, "
+        "create upcoming months, detach or drop expired ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="One-time: turn the event tables into partitioned tables",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=getattr(settings, "EVENT_PARTITION_MONTHS_AHEAD", 3),
+            help="Months of partitions to create after the current one",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=getattr(settings, "EVENT_RETENTION_MONTHS", 0),
+            help="Detach partitions older than this many months (0 = keep all)",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop expired partitions instead of leaving them detached",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Print the SQL without running it"
+        )
+
+    def _run(self, manager, statements, dry_run):
+        for statement in statements:
+            self.stdout.write(f"{statement};")
+        if not dry_run:
+            manager.execute(statements)
+
+    def _convert(self, manager, first_month, dry_run):
+        botevent = PARTITIONED_MODELS[0]._meta.db_table
+        statements = [
+            f'ALTER TABLE "{model._meta.db_table}" DROP CONSTRAINT "{name}"'
+            for model in REFERENCING_MODELS
+            for (name,) in manager.foreign_keys_to(botevent, model._meta.db_table)
+        ]
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if manager.is_partitioned(table):
+                raise CommandError(f"{table} is already partitioned.")
+            statements += convert_sql(
+                table,
+                manager.indexes(table),
+                manager.primary_key(table),
+                first_month,
+                # Keys into BotEvent are dropped above
+                manager.foreign_keys_from(table, exclude=[botevent]),
+            )
+        self._run(manager, statements, dry_run)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning requires PostgreSQL.")
+
+        manager = PartitionManager(connection)
+        dry_run = options["dry_run"]
+        current = month_start(timezone.now())
+
+        with transaction.atomic():
+            if options["convert"]:
+                # The legacy table keeps everything up to the end of this month
+                self._convert(manager, add_months(current, 1), dry_run)
+            elif not dry_run:
+                for model in PARTITIONED_MODELS:
+                    if not manager.is_partitioned(model._meta.db_table):
+                        raise CommandError(
+                            f"{model._meta.db_table} is not partitioned; run with --convert first."
+                        )
+
+            # Current month plus the lookahead, skipping months already covered
+            statements = []
+            for model in PARTITIONED_MODELS:
+                table = model._meta.db_table
+                if options["convert"]:
+                    covered = add_months(current, 1)
+                else:
+                    covered = max(
+                        (p.upper for p in manager.partitions(table) if p.upper),
+                        default=None,
+                    )
+                for offset in range(options["ahead"] + 1):
+                    start = add_months(current, offset)
+                    if covered is None or start >= covered:
+                        statements.append(create_partition_sql(table, start))
+            self._run(manager, statements, dry_run)
+
+            if options["retain_months"] > 0:
+                cutoff = add_months(current, -options["retain_months"])
+                expired, kept = {}, {}
+                for model in PARTITIONED_MODELS:
+                    partitions = manager.partitions(model._meta.db_table)
+                    expired[model] = expired_partitions(partitions, cutoff)
+                    kept[model] = [p for p in partitions if p not in expired[model]]
+                event_model, attack_model = PARTITIONED_MODELS
+                # Attacks filed in a later month than their event would outlive it
+                statements = orphaned_attacks_sql(expired[event_model], kept[attack_model])
+                # Attacks first: they reference events
+                for model in reversed(PARTITIONED_MODELS):
+                    table = model._meta.db_table
+                    for partition in expired[model]:
+                        statements.append(
+                            f'ALTER TABLE "{table}" DETACH PARTITION "{partition.name}"'
+                        )
+                        if options["drop"]:
+                            statements.append(f'DROP TABLE "{partition.name}"')
+                self._run(manager, statements, dry_run)
+
+        self.stdout.write(self.style.SUCCESS("Partitions up to date."))
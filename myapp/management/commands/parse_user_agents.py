@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.caching import bump_data_version
+from myapp.models import UserAgent
+
+PARSED_FIELDS = ["family", "version", "os", "is_automation_tool"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Classify interned user agents (family, version, OS, automation tool), "
+        "in keyset batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Agents classified per transaction"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-classify every agent, not just unparsed ones (after rule changes)",
+        )
+
+    def handle(self, *args, **options):
+        queryset = UserAgent.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(family__isnull=True)
+
+        total, last_pk = 0, None
+        while True:
+            batch = queryset.order_by("pk").only("pk", "value")
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            agents = list(batch[: options["batch_size"]])
+            if not agents:
+                break
+            for agent in agents:
+                agent.set_parsed()
+            with transaction.atomic():
+                UserAgent.objects.bulk_update(agents, PARSED_FIELDS)
+            total += len(agents)
+            last_pk = agents[-1].pk
+
+        if total:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"Classified {total} user agents."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from myapp.archive import ArchiveError, restore
+from myapp.caching import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Re-import an archived range written by archive_events"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Archive run directory (holds manifest.json)")
+        parser.add_argument("--start", help="First day to restore (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day to restore (YYYY-MM-DD)")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Rows inserted per transaction"
+        )
+
+    def _date(self, value, name):
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"--{name} must be a date (YYYY-MM-DD).")
+        return parsed
+
+    def handle(self, *args, **options):
+        start = self._date(options["start"], "start")
+        end = self._date(options["end"], "end")
+        try:
+            inserted = restore(options["archive"], start, end, options["batch_size"])
+        except (ArchiveError, FileNotFoundError) as exc:
+            raise CommandError(str(exc))
+
+        bump_data_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Restored "
+                + ", ".join(f"{count} {table}" for table, count in inserted.items())
+            )
+        )
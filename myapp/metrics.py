@@ -0,0 +1,350 @@
+"""
+Per-route request metrics: Server-Timing headers and Prometheus `/metrics`.
+
+RequestMetricsMiddleware times each request (wall time, time and count of
+SQL statements, and named phases such as `detect`, `serialize` and
+`render`) and records it in this worker's registry under the view name,
+so the ~100 honeypot paths are one `honeypot` route and unresolved
+scanner paths one `unmatched` route.
+
+Workers do not share memory. With METRICS_DIR set, each worker writes its
+registry to `<METRICS_DIR>/metrics-<pid>-<start ns>.json` at most every
+METRICS_FLUSH_INTERVAL seconds (write to a temp file, then rename), and
+`/metrics` adds up the files of every worker. On scrape, the files of
+workers that have exited are folded into `retired.json` and deleted, so the
+counters stay monotonic when gunicorn recycles workers and the directory
+does not grow. Liveness is checked by pid, so METRICS_DIR must be local to
+one host. Without METRICS_DIR, `/metrics` shows only the worker that
+answers.
+
+Recording a request (two clock reads, a context variable, one lock, one
+dict lookup and one bisect into a per-bucket count) costs a few
+microseconds. SQL statements are timed by an execute wrapper installed once
+per connection (MyappConfig.ready), not per request.
+"""
+
+import bisect
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Upper bounds of the latency histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """What one request spent, filled in while it runs."""
+
+    __slots__ = ("db", "queries", "phases")
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper: time the statement into the current request, if any."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.record_query(execute, sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    connection_created receiver: wrap the connection once, for good, so the
+    middleware does not look up the thread's connection on every request.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    """The RequestTimings of the request being handled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timer(phase):
+    """Add the block's wall time to `phase` of the current request, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+class _Route:
+    __slots__ = ("buckets", "count", "seconds", "db", "queries", "phases")
+
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)  # the last is +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.phases = {}
+
+    def to_dict(self):
+        return {
+            "buckets": list(self.buckets),
+            "count": self.count,
+            "seconds": self.seconds,
+            "db": self.db,
+            "queries": self.queries,
+            "phases": dict(self.phases),
+        }
+
+
+class Registry:
+    """Counters and histograms of one worker, keyed by (route, method, status)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.routes = {}
+        self.last_flush = time.monotonic()
+        # Names this process's file: a recycled pid never overwrites a dead worker's counts
+        self.started = time.time_ns()
+
+    def observe(self, route, method, status, seconds, timings):
+        key = (route, method, status)
+        with self.lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = _Route()
+            stats.buckets[bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+            stats.count += 1
+            stats.seconds += seconds
+            stats.db += timings.db
+            stats.queries += timings.queries
+            for phase, spent in timings.phases.items():
+                stats.phases[phase] = stats.phases.get(phase, 0.0) + spent
+
+    def snapshot(self):
+        """[[route, method, status, stats dict]] (JSON-serializable)."""
+        with self.lock:
+            return [[*key, stats.to_dict()] for key, stats in self.routes.items()]
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def _file_path(directory, pid, started):
+    return os.path.join(directory, f"metrics-{pid}-{started}.json")
+
+
+def _own_file(directory):
+    return _file_path(directory, os.getpid(), registry.started)
+
+
+def flush(force=True):
+    """Write this worker's registry to METRICS_DIR (at most once per interval)."""
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return
+    interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+    now = time.monotonic()
+    with registry.lock:
+        if not force and now - registry.last_flush < interval:
+            return
+        registry.last_flush = now
+    path = _own_file(directory)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(registry.snapshot(), handle)
+    os.replace(temporary, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+
+def _read(path, default):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return default
+    except ValueError:
+        return default  # half-written by a worker that died mid-write
+
+
+def _merge(entries):
+    merged = {}
+    for route, method, status, stats in entries:
+        key = (route, method, status)
+        total = merged.get(key)
+        if total is None:
+            merged[key] = stats
+            continue
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], stats["buckets"])]
+        for name in ("count", "seconds", "db", "queries"):
+            total[name] += stats[name]
+        for phase, spent in stats["phases"].items():
+            total["phases"][phase] = total["phases"].get(phase, 0.0) + spent
+    return merged
+
+
+def _retire_dead_workers(directory, paths):
+    """
+    Fold the files of exited workers into `retired.json` and delete them, so
+    the directory stays one file per live worker. Call with the lock held.
+
+    retired.json lists the files it already holds until they are deleted, so a
+    crash between the two steps neither loses nor double counts them.
+    """
+    retired_path = os.path.join(directory, "retired.json")
+    retired = _read(retired_path, {"files": [], "entries": []})
+    done = {os.path.join(directory, name) for name in retired["files"]}
+    for path in done:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+    paths = [path for path in paths if path not in done]
+
+    dead = [
+        path
+        for path in paths
+        if path != _own_file(directory)
+        and not _alive(int(os.path.basename(path).split("-")[1]))
+    ]
+    if not dead and not done:
+        return retired["entries"], paths
+    entries = retired["entries"]
+    for path in dead:
+        entries.extend(_read(path, []))
+    retired = {
+        "files": [os.path.basename(path) for path in dead],
+        "entries": [[*key, stats] for key, stats in _merge(entries).items()],
+    }
+    temporary = f"{retired_path}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(retired, handle)
+    os.replace(temporary, retired_path)
+
+    for path in dead:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+    return retired["entries"], [path for path in paths if path not in dead]
+
+
+def collect():
+    """Merged stats of every worker: {(route, method, status): stats dict}."""
+    entries = registry.snapshot()
+    directory = getattr(settings, "METRICS_DIR", None)
+    if directory:
+        own = _own_file(directory)
+        # One scrape at a time, so two scrapes never retire the same file twice
+        with open(os.path.join(directory, "retired.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            paths = glob.glob(os.path.join(directory, "metrics-*-*.json"))
+            retired, paths = _retire_dead_workers(directory, paths)
+            entries.extend(retired)
+            for path in paths:
+                if path != own:  # the live registry is newer
+                    entries.extend(_read(path, []))
+    return _merge(entries)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def render():
+    """The merged registry in the Prometheus text exposition format."""
+    merged = sorted(collect().items())
+    lines = [
+        "# HELP botfarm_request_duration_seconds Request wall time by route.",
+        "# TYPE botfarm_request_duration_seconds histogram",
+    ]
+    for (route, method, status), stats in merged:
+        labels = _labels(route=route, method=method, status=status)
+        cumulative = 0
+        for bound, count in zip((*DURATION_BUCKETS, "+Inf"), stats["buckets"]):
+            cumulative += count
+            lines.append(
+                f'botfarm_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(f"botfarm_request_duration_seconds_sum{{{labels}}} {stats['seconds']}")
+        lines.append(f"botfarm_request_duration_seconds_count{{{labels}}} {stats['count']}")
+
+    counters = [
+        ("db_seconds", "db", "Time spent in SQL statements by route."),
+        ("queries", "queries", "SQL statements executed by route."),
+    ]
+    for name, field, description in counters:
+        lines.append(f"# HELP botfarm_request_{name}_total {description}")
+        lines.append(f"# TYPE botfarm_request_{name}_total counter")
+        for (route, method, status), stats in merged:
+            labels = _labels(route=route, method=method, status=status)
+            lines.append(f"botfarm_request_{name}_total{{{labels}}} {stats[field]}")
+
+    lines.append(
+        "# HELP botfarm_request_phase_seconds_total Time spent in named phases "
+        "(detect, serialize, render) by route."
+    )
+    lines.append("# TYPE botfarm_request_phase_seconds_total counter")
+    for (route, method, status), stats in merged:
+        for phase, spent in sorted(stats["phases"].items()):
+            labels = _labels(route=route, method=method, status=status, phase=phase)
+            lines.append(f"botfarm_request_phase_seconds_total{{{labels}}} {spent}")
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(seconds, timings):
+    """Server-Timing header value (durations in ms)."""
+    parts = [
+        f"total;dur={seconds * 1000:.2f}",
+        f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+    ]
+    parts.extend(
+        f"{phase};dur={spent * 1000:.2f}" for phase, spent in timings.phases.items()
+    )
+    return ", ".join(parts)
@@ -0,0 +1,161 @@
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from . import decoys, honeypot, metrics
+from .correlation import issue_token, parse_token, record_submission
+from .fake_urls import FAKE_URLS
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request into myapp.metrics (wall, SQL, named phases) and
+    send a Server-Timing header to staff users (everyone with DEBUG on).
+    Goes first in MIDDLEWARE so the other middleware is timed too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Read once: settings lookups go through LazySettings on every access
+        self.debug = settings.DEBUG
+        self.flush = bool(getattr(settings, "METRICS_DIR", None))
+
+    def __call__(self, request):
+        # SQL is timed by metrics.record_query, installed on each connection
+        timings, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.end_request(token)
+
+        match = request.resolver_match
+        # Scanners send arbitrary paths and verbs; keep label cardinality bounded
+        route = match.view_name if match else "unmatched"
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        metrics.registry.observe(route, method, response.status_code, seconds, timings)
+
+        if self.debug or getattr(getattr(request, "user", None), "is_staff", False):
+            response["Server-Timing"] = metrics.server_timing(seconds, timings)
+        if self.flush:
+            metrics.flush(force=False)
+        return response
+
+    def process_template_response(self, request, response):
+        """DRF and template responses render after the view: time that as `render`."""
+        timings = metrics.current()
+        if timings is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add("render", time.perf_counter() - start)
+            )
+        return response
+
+
+class HoneypotFastPathMiddleware:
+    """
+    Answer honeypot hits before sessions, auth, messages and DRF dispatch.
+
+    Decoy paths are matched with one dict lookup. The request is parsed by
+    `honeypot.request_params` and logged by `honeypot.log_event`, exactly
+    as HoneypotView does, and the decoy response is built here (GETs get a
+    pre-rendered page from myapp/decoys.py). Anything
+    the fast path does not handle (HEAD/OPTIONS, unusual bodies) falls
+    through to HoneypotView unchanged. Goes right after SecurityMiddleware;
+    disable with HONEYPOT_FAST_PATH=False.
+    """
+
+    METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+    ALLOW = "GET, POST, PUT, PATCH, DELETE, HEAD, OPTIONS"
+    OK = b'{"status":"ok"}'
+    DENIED = b'{"error":"Permission denied"}'
+
+    def __init__(self, get_response):
+        if not getattr(settings, "HONEYPOT_FAST_PATH", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.routes = None
+        decoys.registry.load()
+
+    def _routes(self):
+        """{path_info: ResolverMatch} of the decoy paths, resolved once."""
+        routes = {}
+        for url in FAKE_URLS:
+            path = f"/{url}"
+            try:
+                match = resolve(path)
+            except Resolver404:
+                continue
+            if match.url_name == "honeypot":
+                routes[path] = match
+        return routes
+
+    def __call__(self, request):
+        if self.routes is None:
+            self.routes = self._routes()
+        match = self.routes.get(request.path_info)
+        if match is None or request.method not in self.METHODS:
+            return self.get_response(request)
+        params = honeypot.request_params(request)
+        if params is None:
+            return self.get_response(request)
+
+        request.resolver_match = match  # route label for RequestMetricsMiddleware
+        if request.method == "GET":
+            ctoken, signed_ctoken = issue_token()
+            honeypot.log_event(request, "GET", params, ctoken)
+            response = decoys.response(request.path_info, signed_ctoken)
+        elif request.method == "POST":
+            ctoken, issued_at = parse_token(params.get("ctoken"))
+            from_form = ctoken is not None
+            if not from_form:
+                ctoken = uuid4()
+            bot_event = honeypot.log_event(request, "POST", params, ctoken)
+            if from_form:
+                record_submission(ctoken, issued_at, bot_event, params, request.path)
+            response = HttpResponse(self.OK, content_type="application/json")
+        else:
+            honeypot.log_event(request, request.method, params, None)
+            response = HttpResponse(self.DENIED, status=403, content_type="application/json")
+
+        # What HoneypotView's responses carry from the rest of the stack
+        response["Allow"] = self.ALLOW
+        response["X-Frame-Options"] = "DENY"
+        response["Content-Length"] = str(len(response.content))
+        return response
+
+
+class CatchAllCaptureMiddleware:
+    """
+    Record hits on paths no URL pattern matches (`/wp-login.php`, `/.env`,
+    `/vendor/phpunit/...`) as honeypot events under a normalized, bounded path
+    (see myapp/honeypot.py). The response is the usual 404. Goes right after
+    HoneypotFastPathMiddleware; disable with HONEYPOT_CATCH_ALL=False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "HONEYPOT_CATCH_ALL", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Unresolved only: a 404 from a matched route (unknown id) is not a probe
+        if response.status_code == 404 and request.resolver_match is None:
+            # HEAD is logged as GET, like HoneypotView does; other verbs are not stored
+            method = "GET" if request.method == "HEAD" else request.method
+            if method in HoneypotFastPathMiddleware.METHODS:
+                params = request.GET if method == "GET" else honeypot.request_params(request)
+                honeypot.log_event(
+                    request, method, params or {}, None, path=honeypot.capture_path(request.path)
+                )
+        return response
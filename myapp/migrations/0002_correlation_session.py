@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:09
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorrelationSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('token', models.UUIDField(unique=True)),
+                ('ip_address', models.GenericIPAddressField(blank=True, db_index=True, null=True)),
+                ('request_path', models.CharField(db_index=True, max_length=500)),
+                ('issued_at', models.DateTimeField(blank=True, help_text='When the form (and token) was served', null=True)),
+                ('first_submitted_at', models.DateTimeField(db_index=True)),
+                ('last_submitted_at', models.DateTimeField()),
+                ('submit_count', models.PositiveIntegerField(default=1)),
+                ('time_to_submit_ms', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('fields_filled', models.IntegerField(default=0)),
+                ('chars_submitted', models.IntegerField(default=0)),
+                ('chars_per_second', models.FloatField(blank=True, db_index=True, help_text='Characters submitted per second between GET and first POST', null=True)),
+                ('post_event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='myapp.botevent')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ip_address', 'first_submitted_at'], name='session_ip_submitted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0002_correlation_session'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='botevent',
+            name='botevent_ip_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['ip_address', 'created_at', 'id'], include=('method', 'request_path', 'event_category', 'attack_attempted'), name='botevent_ip_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_ip_timeline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyHitter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('ip', 'IP address'), ('path', 'Request path'), ('category', 'Attack category')], max_length=20)),
+                ('item', models.CharField(max_length=500)),
+                ('count', models.BigIntegerField(default=0)),
+                ('error', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dimension', '-count'], name='heavyhitter_dim_count_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'item'), name='heavyhitter_dim_item_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_heavy_hitter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistinctCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('ip', 'Unique IPs'), ('email', 'Unique emails'), ('agent', 'Unique user agents'), ('path_ip', 'Unique IPs per path')], max_length=20)),
+                ('key', models.CharField(blank=True, default='', max_length=500)),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'day'), name='distinct_dim_key_day_uniq')],
+            },
+        ),
+    ]
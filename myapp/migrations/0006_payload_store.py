@@ -0,0 +1,44 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_distinct_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Payload',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.BinaryField()),
+                ('compressed', models.BooleanField(default=False)),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='attacktype',
+            name='full_value',
+            field=models.TextField(default='', help_text='Inline value (rows written before full_value_payload)'),
+        ),
+        migrations.AlterField(
+            model_name='botevent',
+            name='data_details',
+            field=models.JSONField(blank=True, help_text='Inline payload (rows written before data_payload)', null=True),
+        ),
+        migrations.AddField(
+            model_name='attacktype',
+            name='full_value_payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attacks', to='myapp.payload'),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='data_payload',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bot_events', to='myapp.payload'),
+        ),
+    ]
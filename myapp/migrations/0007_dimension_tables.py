@@ -0,0 +1,78 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_payload_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Origin',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=40, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Referer',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=40, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestPath',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=40, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAgent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('value', models.TextField()),
+                ('value_hash', models.CharField(max_length=40, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='origin_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bot_events', to='myapp.origin'),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='referer_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bot_events', to='myapp.referer'),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='request_path_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bot_events', to='myapp.requestpath'),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='agent_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bot_events', to='myapp.useragent'),
+        ),
+    ]
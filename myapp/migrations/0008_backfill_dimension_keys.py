@@ -0,0 +1,68 @@
+import hashlib
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+# BotEvent text column -> (key column, dimension model)
+COLUMNS = {
+    "agent": ("agent_ref", "UserAgent"),
+    "referer": ("referer_ref", "Referer"),
+    "origin": ("origin_ref", "Origin"),
+    "request_path": ("request_path_ref", "RequestPath"),
+}
+
+
+def intern(model, values, known):
+    missing = {
+        hashlib.sha1(value.encode("utf-8")).hexdigest(): value
+        for value in values
+        if value not in known
+    }
+    if not missing:
+        return
+    model.objects.bulk_create(
+        [model(value=value, value_hash=digest) for digest, value in missing.items()],
+        ignore_conflicts=True,
+    )
+    for key, digest in model.objects.filter(value_hash__in=list(missing)).values_list(
+        "id", "value_hash"
+    ):
+        known[missing[digest]] = key
+
+
+def backfill(apps, schema_editor):
+    """Give existing events their dimension keys, in keyset batches of BATCH_SIZE."""
+    BotEvent = apps.get_model("myapp", "BotEvent")
+    models = {column: apps.get_model("myapp", name) for column, (_, name) in COLUMNS.items()}
+    known = {column: {} for column in COLUMNS}
+    last = None
+    while True:
+        queryset = BotEvent.objects.order_by("id").only("id", *COLUMNS)
+        if last is not None:
+            queryset = queryset.filter(id__gt=last)
+        batch = list(queryset[:BATCH_SIZE])
+        if not batch:
+            break
+        with transaction.atomic():
+            for column, (key_column, _) in COLUMNS.items():
+                values = {getattr(event, column) for event in batch} - {None}
+                intern(models[column], values, known[column])
+                for event in batch:
+                    value = getattr(event, column)
+                    setattr(event, f"{key_column}_id", known[column].get(value))
+            BotEvent.objects.bulk_update(batch, [key for key, _ in COLUMNS.values()])
+        last = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so a large table is not one long transaction
+    atomic = False
+
+    dependencies = [
+        ("myapp", "0007_dimension_tables"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_backfill_dimension_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useragent',
+            name='family',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='useragent',
+            name='is_automation_tool',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='useragent',
+            name='os',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='useragent',
+            name='version',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
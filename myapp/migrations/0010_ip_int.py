@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_user_agent_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botevent',
+            name='ip_int',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='ip_version',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['ip_version', 'ip_int'], name='botevent_ip_int_idx'),
+        ),
+    ]
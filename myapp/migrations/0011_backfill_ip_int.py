@@ -0,0 +1,40 @@
+from django.db import migrations, transaction
+
+from myapp.subnets import ip_key
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    """Give existing events their integer IP key, in keyset batches of BATCH_SIZE."""
+    BotEvent = apps.get_model("myapp", "BotEvent")
+    last = None
+    while True:
+        queryset = (
+            BotEvent.objects.filter(ip_address__isnull=False, ip_int__isnull=True)
+            .order_by("id")
+            .only("id", "ip_address")
+        )
+        if last is not None:
+            queryset = queryset.filter(id__gt=last)
+        batch = list(queryset[:BATCH_SIZE])
+        if not batch:
+            break
+        for event in batch:
+            event.ip_version, event.ip_int = ip_key(event.ip_address)
+        with transaction.atomic():
+            BotEvent.objects.bulk_update(batch, ["ip_version", "ip_int"])
+        last = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so a large table is not one long transaction
+    atomic = False
+
+    dependencies = [
+        ("myapp", "0010_ip_int"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop, elidable=True),
+    ]
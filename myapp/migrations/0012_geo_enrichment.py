@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_backfill_ip_int'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botevent',
+            name='as_org',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='asn',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='city',
+            field=models.CharField(blank=True, max_length=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='botevent',
+            name='country',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from myapp import distinct
+
+
+def seed(apps, schema_editor):
+    """
+    Sketch the events that predate the counters, merged into any buckets
+    ingest already wrote, one day per transaction.
+    """
+    distinct.rebuild(
+        event_model=apps.get_model("myapp", "BotEvent"),
+        counter_model=apps.get_model("myapp", "DistinctCounter"),
+        replace=False,
+    )
+
+
+class Migration(migrations.Migration):
+    # Each day commits on its own so a large table is not one long transaction
+    atomic = False
+
+    dependencies = [
+        ("myapp", "0012_geo_enrichment"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # No backfill: 0015 drops the column again
+
+    dependencies = [
+        ('myapp', '0013_seed_distinct_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payload',
+            name='search_text',
+            field=models.TextField(default='', help_text='Decoded content, uncompressed so ?search= and ?bot_data= match it'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 12:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Search reads the payload content itself (see payloads.ContainsText)
+
+    dependencies = [
+        ('myapp', '0014_payload_search_text'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='payload',
+            name='search_text',
+        ),
+    ]
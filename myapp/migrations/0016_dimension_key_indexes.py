@@ -0,0 +1,61 @@
+# Generated by Django 6.1.2 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Paths are grouped and filtered by key; the text columns are emptied by 0017
+
+    dependencies = [
+        ('myapp', '0015_remove_payload_search_text'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='botevent',
+            name='botevent_atk_meth_path_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='botevent',
+            name='botevent_path_attack_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='botevent',
+            name='botevent_ip_path_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='botevent',
+            name='botevent_ip_timeline_idx',
+        ),
+        migrations.AlterField(
+            model_name='botevent',
+            name='origin',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='botevent',
+            name='referer',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='botevent',
+            name='request_path',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['attack_attempted', 'method', 'request_path_ref'], name='botevent_atk_meth_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['ip_address', 'created_at', 'id'], include=('method', 'request_path_ref', 'event_category', 'attack_attempted'), name='botevent_ip_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['request_path_ref', 'attack_attempted'], name='botevent_path_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='botevent',
+            index=models.Index(fields=['ip_address', 'request_path_ref'], name='botevent_ip_path_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 2000
+
+# BotEvent text column -> (key column, dimension model)
+COLUMNS = {
+    "agent": ("agent_ref", "UserAgent"),
+    "referer": ("referer_ref", "Referer"),
+    "origin": ("origin_ref", "Origin"),
+    "request_path": ("request_path_ref", "RequestPath"),
+}
+
+
+def batches(BotEvent):
+    """Event ids in keyset batches of BATCH_SIZE."""
+    last = None
+    while True:
+        queryset = BotEvent.objects.order_by("id")
+        if last is not None:
+            queryset = queryset.filter(id__gt=last)
+        batch = list(queryset.values_list("id", flat=True)[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def clear_text(apps, schema_editor):
+    """Empty the text columns whose key is set: the dimension tables hold the text."""
+    BotEvent = apps.get_model("myapp", "BotEvent")
+    for batch in batches(BotEvent):
+        with transaction.atomic():
+            for column, (key_column, _) in COLUMNS.items():
+                BotEvent.objects.filter(
+                    id__in=batch,
+                    **{f"{key_column}__isnull": False, f"{column}__isnull": False},
+                ).update(**{column: None})
+
+
+def restore_text(apps, schema_editor):
+    """Copy the text back from the dimension tables."""
+    BotEvent = apps.get_model("myapp", "BotEvent")
+    for batch in batches(BotEvent):
+        with transaction.atomic():
+            for column, (key_column, name) in COLUMNS.items():
+                values = apps.get_model("myapp", name).objects.filter(pk=OuterRef(key_column))
+                BotEvent.objects.filter(
+                    id__in=batch,
+                    **{f"{key_column}__isnull": False, f"{column}__isnull": True},
+                ).update(**{column: Subquery(values.values("value")[:1])})
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own so a large table is not one long transaction
+    atomic = False
+
+    dependencies = [
+        ("myapp", "0016_dimension_key_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_text, restore_text, elidable=True),
+    ]
@@ -2,6 +2,83 @@
 import uuid
 from django.db import models
 
+from .agents import parse_agent
+from .subnets import ip_key
+
+
+class Payload(models.Model):
+    """
+    A stored payload, keyed by the sha256 of its uncompressed bytes (see
+    myapp/payloads.py). Shared by every event/attack with the same content.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    content = models.BinaryField()
+    compressed = models.BooleanField(default=False)
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes{', zlib' if self.compressed else ''})"
+
+
+class InternedValue(models.Model):
+    """
+    A dimension table: each distinct text value once, under a small integer
+    key (see myapp/dimensions.py). Unique on a hash so long values can be
+    indexed.
+    """
+
+    id = models.AutoField(primary_key=True)
+    value = models.TextField()
+    value_hash = models.CharField(max_length=40, unique=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def for_value(cls, value, value_hash):
+        """Unsaved row for a newly interned value."""
+        return cls(value=value, value_hash=value_hash)
+
+
+class UserAgent(InternedValue):
+    """Distinct User-Agent strings, classified once (see myapp/agents.py)."""
+
+    # Null until parsed (rows interned before classification existed)
+    family = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    version = models.CharField(max_length=32, blank=True, default="")
+    os = models.CharField(max_length=32, blank=True, default="", db_index=True)
+    is_automation_tool = models.BooleanField(default=False, db_index=True)
+
+    def set_parsed(self):
+        parsed = parse_agent(self.value)
+        self.family = parsed.family
+        self.version = parsed.version
+        self.os = parsed.os
+        self.is_automation_tool = parsed.is_automation_tool
+
+    @classmethod
+    def for_value(cls, value, value_hash):
+        row = super().for_value(value, value_hash)
+        row.set_parsed()
+        return row
+
+
+class RequestPath(InternedValue):
+    pass
+
+
+class Referer(InternedValue):
+    pass
+
+
+class Origin(InternedValue):
+    pass
+
 
 class BotEvent(models.Model):
     class MethodChoice(models.TextChoices):
@@ -23,15 +100,43 @@ class BotEvent(models.Model):
     geo_location = models.CharField(
         max_length=255, null=True, blank=True, db_index=True
     )
+    # Offline enrichment from the local geo database (myapp/geoip.py)
+    country = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    city = models.CharField(max_length=128, null=True, blank=True)
+    asn = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    as_org = models.CharField(max_length=255, null=True, blank=True)
+    # Integer key of ip_address for CIDR scans and subnet grouping (myapp/subnets.py)
+    ip_version = models.PositiveSmallIntegerField(null=True, blank=True)
+    ip_int = models.BigIntegerField(null=True, blank=True)
+    # Text of rows written before the dimension tables; read agent_ref etc.
     agent = models.TextField(null=True, blank=True)
-    referer = models.TextField(null=True, blank=True, db_index=True)
-    origin = models.TextField(null=True, blank=True, db_index=True)
+    referer = models.TextField(null=True, blank=True)
+    origin = models.TextField(null=True, blank=True)
     language = models.CharField(max_length=100, null=True, blank=True)
-    request_path = models.CharField(max_length=500, db_index=True)
+    request_path = models.CharField(max_length=500, null=True, blank=True)
     email = models.EmailField(null=True, blank=True, db_index=True)
     # Correlation token
     correlation_token = models.UUIDField(null=True, blank=True, db_index=True)
 
+    # Interned keys of agent / referer / origin / request_path (filled on save,
+    # the only copy for rows ingested since; see myapp/dimensions.py)
+    agent_ref = models.ForeignKey(
+        UserAgent, related_name="bot_events", on_delete=models.PROTECT, null=True, blank=True
+    )
+    referer_ref = models.ForeignKey(
+        Referer, related_name="bot_events", on_delete=models.PROTECT, null=True, blank=True
+    )
+    origin_ref = models.ForeignKey(
+        Origin, related_name="bot_events", on_delete=models.PROTECT, null=True, blank=True
+    )
+    request_path_ref = models.ForeignKey(
+        RequestPath,
+        related_name="bot_events",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     attack_attempted = models.BooleanField(default=False, db_index=True)
@@ -59,7 +164,16 @@ class BotEvent(models.Model):
         blank=True,
         help_text="List of field names (stored as JSON for SQLite compatibility)",
     )
-    data_details = models.JSONField(null=True, blank=True)
+    data_details = models.JSONField(
+        null=True, blank=True, help_text="Inline payload (rows written before data_payload)"
+    )
+    data_payload = models.ForeignKey(
+        Payload,
+        related_name="bot_events",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         indexes = [
@@ -69,24 +183,45 @@ class BotEvent(models.Model):
             ),
             # Composite index for scan_bot filter (attack_attempted=False, method=GET)
             models.Index(
-                fields=["attack_attempted", "method", "request_path"],
+                fields=["attack_attempted", "method", "request_path_ref"],
                 name="botevent_atk_meth_path_idx",
             ),
-            # Composite index for IP aggregations with ordering
+            # Composite index for IP aggregations with ordering. Also serves the
+            # per-IP timeline: keyset on (created_at, id), with the rendered
+            # columns included so PostgreSQL can answer it with an index-only scan
+            # (INCLUDE is ignored on other backends).
             models.Index(
-                fields=["ip_address", "created_at"], name="botevent_ip_created_idx"
+                fields=["ip_address", "created_at", "id"],
+                include=["method", "request_path_ref", "event_category", "attack_attempted"],
+                name="botevent_ip_timeline_idx",
             ),
             # Composite index for path aggregations with attack filtering
             models.Index(
-                fields=["request_path", "attack_attempted"],
+                fields=["request_path_ref", "attack_attempted"],
                 name="botevent_path_attack_idx",
             ),
             # Composite index for common filter combinations
             models.Index(
-                fields=["ip_address", "request_path"], name="botevent_ip_path_idx"
+                fields=["ip_address", "request_path_ref"], name="botevent_ip_path_idx"
             ),
+            # CIDR range scans (ip_version = v AND ip_int BETWEEN lo AND hi)
+            models.Index(fields=["ip_version", "ip_int"], name="botevent_ip_int_idx"),
         ]
 
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields([self])
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def fill_derived_fields(events):
+        """Set the dimension and integer IP keys save() fills (call before bulk_create)."""
+        from .dimensions import assign_dimensions
+
+        assign_dimensions(events)
+        for event in events:
+            if event.ip_address and event.ip_int is None:
+                event.ip_version, event.ip_int = ip_key(event.ip_address)
+
     def set_category(self, save=True):
         """
         Determine and set the event_category based on current instance attributes.
@@ -109,7 +244,8 @@ class BotEvent(models.Model):
             self.save(update_fields=["event_category"])
 
     def __str__(self):
-        return f"{self.method} | {self.request_path} | XSS: {self.attack_attempted}"
+        path = self.request_path_ref.value if self.request_path_ref_id else self.request_path
+        return f"{self.method} | {path} | XSS: {self.attack_attempted}"
 
 
 class AttackType(models.Model):
@@ -140,7 +276,16 @@ class AttackType(models.Model):
     )
 
     raw_value = models.TextField()
-    full_value = models.TextField(default="")
+    full_value = models.TextField(
+        default="", help_text="Inline value (rows written before full_value_payload)"
+    )
+    full_value_payload = models.ForeignKey(
+        Payload,
+        related_name="attacks",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+    )
 
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
@@ -160,3 +305,117 @@ class AttackType(models.Model):
 
     def __str__(self):
         return f"{self.category} ({self.pattern}) in '{self.target_field}'"
+
+
+class CorrelationSession(models.Model):
+    """
+    A GET→POST chain on a honeypot form, joined through the correlation token.
+    Created at POST time; timing comes from the issue timestamp signed into
+    the token, so no lookup of the GET event is needed.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    token = models.UUIDField(unique=True)
+    post_event = models.ForeignKey(
+        BotEvent,
+        related_name="sessions",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    ip_address = models.GenericIPAddressField(null=True, blank=True, db_index=True)
+    request_path = models.CharField(max_length=500, db_index=True)
+
+    # Timing
+    issued_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the form (and token) was served"
+    )
+    first_submitted_at = models.DateTimeField(db_index=True)
+    last_submitted_at = models.DateTimeField()
+    submit_count = models.PositiveIntegerField(default=1)
+    time_to_submit_ms = models.IntegerField(null=True, blank=True, db_index=True)
+
+    # Form fill
+    fields_filled = models.IntegerField(default=0)
+    chars_submitted = models.IntegerField(default=0)
+    chars_per_second = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Characters submitted per second between GET and first POST",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["ip_address", "first_submitted_at"],
+                name="session_ip_submitted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.token} | {self.request_path} | {self.time_to_submit_ms} ms"
+
+
+class HeavyHitter(models.Model):
+    """
+    Merged Space-Saving summary of the most frequent items per dimension
+    (see myapp/sketches.py). `count` is an upper bound on the true count and
+    `count - error` a lower bound.
+    """
+
+    class Dimension(models.TextChoices):
+        IP = "ip", "IP address"
+        PATH = "path", "Request path"
+        CATEGORY = "category", "Attack category"
+
+    dimension = models.CharField(max_length=20, choices=Dimension.choices)
+    item = models.CharField(max_length=500)
+    count = models.BigIntegerField(default=0)
+    error = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "item"], name="heavyhitter_dim_item_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["dimension", "-count"], name="heavyhitter_dim_count_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} | {self.item} | {self.count} (±{self.error})"
+
+
+class DistinctCounter(models.Model):
+    """
+    HyperLogLog registers for one (dimension, key, day) bucket (see
+    myapp/distinct.py). `key` is the request path for PATH_IP, empty otherwise.
+    """
+
+    class Dimension(models.TextChoices):
+        IP = "ip", "Unique IPs"
+        EMAIL = "email", "Unique emails"
+        AGENT = "agent", "Unique user agents"
+        PATH_IP = "path_ip", "Unique IPs per path"
+
+    dimension = models.CharField(max_length=20, choices=Dimension.choices)
+    key = models.CharField(max_length=500, blank=True, default="")
+    day = models.DateField()
+    registers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "key", "day"], name="distinct_dim_key_day_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} | {self.key or '*'} | {self.day}"
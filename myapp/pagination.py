@@ -1,7 +1,172 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timezone as dt_timezone
+from uuid import UUID
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner's row estimate instead of COUNT(*) for
+    unfiltered querysets on PostgreSQL (e.g. the admin changelist).
+    Falls back to an exact count for filtered querysets, small tables and
+    other databases.
+    """
+
+    exact_count_threshold = 10000
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query") or queryset.query.where:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if not row or row[0] < self.exact_count_threshold:
+            return None
+        return int(row[0])
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is not None:
+            return estimate
+        return super().count
+
+
+class TimelineKeysetPagination:
+    """
+    Keyset (seek) pagination over (created_at, id), newest first.
+
+    `?before=<cursor>` returns events older than the cursor and `?after=<cursor>`
+    events newer than it, so every page is an index range scan instead of an
+    OFFSET. Cursors are opaque; a plain ISO datetime is accepted as well.
+    """
+
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ""))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(created_at, pk):
+        raw = f"{created_at.isoformat()}|{pk}".encode("utf-8")
+        return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(value):
+        """Return (created_at, pk or None); raise ValidationError on garbage."""
+        try:
+            padded = value + "=" * (-len(value) % 4)
+            created_at, pk = urlsafe_b64decode(padded).decode("utf-8").split("|")
+            return datetime.fromisoformat(created_at), UUID(pk)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            pass
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValidationError({"cursor": [f"Invalid cursor: {value}"]})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed, None
+
+    @staticmethod
+    def _older(created_at, pk):
+        older = Q(created_at__lt=created_at)
+        if pk is not None:
+            older |= Q(created_at=created_at, id__lt=pk)
+        return older
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Return one page of rows (dicts with created_at/id), newest first.
+        Sets `self.predecessor` to the created_at of the row just older than
+        the page (None if there is none), for gap computations. An `after`
+        page looks it up with one extra LIMIT 1 query.
+        """
+        self.request = request
+        size = self.get_page_size(request)
+        before = request.query_params.get("before")
+        after = request.query_params.get("after")
+        self.predecessor = None
+
+        if after:
+            created_at, pk = self.decode_cursor(after)
+            newer = Q(created_at__gt=created_at)
+            if pk is not None:
+                newer |= Q(created_at=created_at, id__gt=pk)
+            rows = list(
+                queryset.filter(newer).order_by("created_at", "id")[: size + 1]
+            )
+            self.has_newer = len(rows) > size
+            rows = rows[:size]
+            rows.reverse()
+            # The cursor row may be gone (or an ISO time): look the real one up
+            if rows:
+                created_at, pk = rows[-1]["created_at"], rows[-1]["id"]
+            predecessor = (
+                queryset.filter(self._older(created_at, pk))
+                .order_by("-created_at", "-id")
+                .values_list("created_at", flat=True)
+                .first()
+            )
+            self.has_older = predecessor is not None
+            self.predecessor = predecessor
+        else:
+            if before:
+                created_at, pk = self.decode_cursor(before)
+                queryset = queryset.filter(self._older(created_at, pk))
+            rows = list(queryset.order_by("-created_at", "-id")[: size + 1])
+            self.has_older = len(rows) > size
+            if self.has_older:
+                self.predecessor = rows[size]["created_at"]
+            rows = rows[:size]
+            self.has_newer = bool(before)
+
+        self.rows = rows
+        return rows
+
+    def _link(self, param, row):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(remove_query_param(url, "before"), "after")
+        return replace_query_param(
+            url, param, self.encode_cursor(row["created_at"], row["id"])
+        )
+
+    def get_paginated_response(self, data, **extra):
+        rows = self.rows
+        return Response(
+            {
+                **extra,
+                "next": self._link("before", rows[-1]) if rows and self.has_older else None,
+                "previous": self._link("after", rows[0]) if rows and self.has_newer else None,
+                "results": data,
+            }
+        )
@@ -0,0 +1,222 @@
+"""
+Monthly range partitioning of the event tables on PostgreSQL.
+
+`manage_partitions --convert` turns myapp_botevent and myapp_attacktype into
+tables partitioned by RANGE (created_at). The existing table is renamed to
+`<table>_legacy` and attached as the partition for everything up to the end
+of the current month, so no rows are copied. Later rows land in one partition
+per month (`<table>_pYYYY_MM`) plus a DEFAULT partition for stragglers.
+
+Retention then becomes DETACH/DROP of whole partitions, which is O(1) instead
+of DELETE + vacuum. PostgreSQL cannot enforce a foreign key into a
+partitioned table on `id` alone (the key must include created_at), so the
+attack → event and session → event constraints are dropped on conversion and
+enforced by the ORM only. `LIKE` does not copy foreign keys, so the
+tables' own keys (payloads, dimension tables) are re-created on the
+partitioned parent; every partition inherits them, and the legacy table's
+existing constraints are reused on ATTACH instead of being re-validated.
+
+Attack partitions are bounded by the attack's own created_at, which can
+fall in a later month than its event's (a request straddling midnight, a
+restored archive). Before event partitions are detached, the attacks left
+in the kept attack partitions that point into them are deleted
+(`orphaned_attacks_sql`), so expiring a month never leaves attacks
+without their event.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from .models import AttackType, BotEvent, CorrelationSession
+
+# Parents first when creating, children first when dropping
+PARTITIONED_MODELS = [BotEvent, AttackType]
+# Tables whose FK into BotEvent must go when BotEvent is partitioned
+REFERENCING_MODELS = [AttackType, CorrelationSession]
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+@dataclass
+class Partition:
+    name: str
+    upper: datetime | None  # None for DEFAULT / MAXVALUE partitions
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y_%m}"
+
+
+def _literal(value: datetime) -> str:
+    return f"'{value.isoformat()}'"
+
+
+def create_partition_sql(table: str, start: datetime) -> str:
+    end = add_months(start, 1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, start)}" '
+        f'PARTITION OF "{table}" '
+        f"FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})"
+    )
+
+
+def convert_sql(
+    table: str, indexes, pk_name: str, first_month: datetime, foreign_keys=()
+):
+    """
+    Statements that turn `table` into a partitioned table in place.
+
+    Args:
+        table: Table to convert.
+        indexes: [(name, definition)] of its non-primary-key indexes, as
+            returned by pg_indexes.
+        pk_name: Name of its primary key constraint.
+        first_month: First month that gets its own partition; everything
+            earlier stays in the attached legacy table.
+        foreign_keys: [(name, definition)] of its outgoing foreign keys, as
+            returned by pg_get_constraintdef, to re-create on the parent.
+    """
+    legacy = f"{table}_legacy"
+    statements = [
+        f'ALTER TABLE "{table}" RENAME TO "{legacy}"',
+        f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{pk_name}" TO "{legacy}_pkey"',
+    ]
+    statements += [
+        f'ALTER INDEX "{name}" RENAME TO "{name[:56]}_legacy"' for name, _ in indexes
+    ]
+    statements += [
+        f'CREATE TABLE "{table}" '
+        f'(LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f"PARTITION BY RANGE (created_at)",
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, created_at)',
+    ]
+    # Recreated on the parent with the original names; the legacy copies are
+    # picked up on ATTACH instead of being rebuilt
+    statements += [
+        re.sub(
+            rf'ON (?:ONLY )?(?:\S+\.)?"?{re.escape(table)}"? ',
+            f'ON "{table}" ',
+            definition,
+            count=1,
+        )
+        for _, definition in indexes
+    ]
+    statements += [
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'
+        for name, definition in foreign_keys
+    ]
+    statements += [
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" '
+        f"FOR VALUES FROM (MINVALUE) TO ({_literal(first_month)})",
+        f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT',
+    ]
+    return statements
+
+
+def expired_partitions(partitions, cutoff: datetime):
+    """Partitions holding only rows older than `cutoff`."""
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def orphaned_attacks_sql(event_partitions, attack_partitions):
+    """
+    DELETEs of the attacks in `attack_partitions` (the kept ones) whose
+    event lives in one of `event_partitions` (the expiring ones). Each kept
+    partition is addressed by name, so the expiring attack partitions are
+    never scanned.
+    """
+    if not event_partitions:
+        return []
+    column = AttackType._meta.get_field("bot_event").column
+    events = " UNION ALL ".join(f'SELECT id FROM "{p.name}"' for p in event_partitions)
+    return [
+        f'DELETE FROM "{p.name}" WHERE "{column}" IN ({events})'
+        for p in attack_partitions
+    ]
+
+
+class PartitionManager:
+    """Inspects and changes partitions through a PostgreSQL connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _fetch(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def execute(self, statements):
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def is_partitioned(self, table) -> bool:
+        return bool(
+            self._fetch(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+                [table],
+            )
+        )
+
+    def partitions(self, table):
+        rows = self._fetch(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s ORDER BY child.relname",
+            [table],
+        )
+        partitions = []
+        for name, bound in rows:
+            match = _UPPER_BOUND.search(bound or "")
+            upper = datetime.fromisoformat(match.group(1)) if match else None
+            if upper is not None and upper.tzinfo is None:
+                upper = upper.replace(tzinfo=dt_timezone.utc)
+            partitions.append(Partition(name, upper))
+        return partitions
+
+    def indexes(self, table):
+        return self._fetch(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = %s AND indexname <> %s",
+            [table, self.primary_key(table)],
+        )
+
+    def primary_key(self, table):
+        return self._fetch(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'p'",
+            [table],
+        )[0][0]
+
+    def foreign_keys_from(self, table, exclude=()):
+        """[(name, definition)] of the foreign keys `table` holds, except into `exclude`."""
+        return self._fetch(
+            "SELECT c.conname, pg_get_constraintdef(c.oid) FROM pg_constraint c "
+            "JOIN pg_class target ON target.oid = c.confrelid "
+            "WHERE c.conrelid = %s::regclass AND c.contype = 'f' "
+            "AND NOT target.relname::text = ANY(%s::text[]) ORDER BY c.conname",
+            [table, list(exclude)],
+        )
+
+    def foreign_keys_to(self, table, referencing):
+        return self._fetch(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND confrelid = %s::regclass "
+            "AND contype = 'f'",
+            [referencing, table],
+        )
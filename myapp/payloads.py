@@ -0,0 +1,213 @@
+"""
+Content-addressed payload store.
+
+Event payloads (`BotEvent.data_details`) and attack field values
+(`AttackType.full_value`) are stored once in Payload, keyed by the sha256 of
+their bytes, and referenced by digest. Values of at least
+PAYLOAD_COMPRESSION_THRESHOLD bytes are zlib-compressed when that helps.
+Text search goes through the `contains_text` lookup on the payload foreign
+keys: uncompressed payloads are matched in SQL on their bytes, and the few
+compressed ones are decompressed and matched here, so nothing is stored twice.
+
+Ingest keeps an in-process LRU of digests known to exist (added once the
+inserting transaction commits), so a repeated payload costs a hash and no
+query. Rows written before the store existed
+keep their inline column; readers go through `resolve_payload()` /
+`iter_resolved_rows()` and get the same value either way.
+"""
+
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, Func, Lookup, Q, TextField, When
+from django.db.models.lookups import In
+
+from .models import AttackType, BotEvent, Payload
+
+# Model -> {inline column: payload FK}
+PAYLOAD_COLUMNS = {
+    BotEvent: {"data_details": "data_payload"},
+    AttackType: {"full_value": "full_value_payload"},
+}
+
+
+def encode_value(value) -> bytes:
+    """Bytes stored for a value: JSON for dict/list payloads, UTF-8 for text."""
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+
+
+def decode_content(content, compressed, as_json):
+    data = bytes(content)
+    if compressed:
+        data = zlib.decompress(data)
+    text = data.decode("utf-8")
+    return json.loads(text) if as_json else text
+
+
+def build_payload(data: bytes) -> Payload:
+    digest = hashlib.sha256(data).hexdigest()
+    threshold = getattr(settings, "PAYLOAD_COMPRESSION_THRESHOLD", 1024)
+    content, compressed = data, False
+    if threshold and len(data) >= threshold:
+        packed = zlib.compress(data)
+        if len(packed) < len(data):
+            content, compressed = packed, True
+    return Payload(digest=digest, content=content, compressed=compressed, size=len(data))
+
+
+class _DigestCache:
+    """LRU of digests this worker has seen stored."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.digests = OrderedDict()
+
+    def __contains__(self, digest):
+        with self.lock:
+            if digest in self.digests:
+                self.digests.move_to_end(digest)
+                return True
+            return False
+
+    def add(self, digests):
+        limit = getattr(settings, "PAYLOAD_CACHE_SIZE", 10000)
+        with self.lock:
+            for digest in digests:
+                self.digests[digest] = None
+                self.digests.move_to_end(digest)
+            while len(self.digests) > limit:
+                self.digests.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.digests.clear()
+
+
+_cache = _DigestCache()
+
+
+def intern_values(values, use_cache=True):
+    """
+    Store each value (str or JSON-serializable) once; return their digests in
+    order. New payloads are written with one INSERT ... ON CONFLICT DO NOTHING.
+    Without `use_cache` every value is written, which restores payloads that
+    `intern_payloads --prune` deleted after this worker cached them.
+    """
+    digests, new = [], {}
+    for value in values:
+        data = encode_value(value)
+        digest = hashlib.sha256(data).hexdigest()
+        digests.append(digest)
+        if digest not in new and not (use_cache and digest in _cache):
+            new[digest] = build_payload(data)
+    if new:
+        Payload.objects.bulk_create(new.values(), ignore_conflicts=True)
+        transaction.on_commit(lambda: _cache.add(new))
+    return digests
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def resolve_payload(obj, column):
+    """Value of `column` on a model instance, from its payload if it has one."""
+    fk = PAYLOAD_COLUMNS[type(obj)][column]
+    if getattr(obj, f"{fk}_id") is None:
+        return getattr(obj, column)
+    payload = getattr(obj, fk)
+    as_json = obj._meta.get_field(column).get_internal_type() == "JSONField"
+    return decode_content(payload.content, payload.compressed, as_json)
+
+
+def iter_resolved_rows(queryset, fields, chunk_size):
+    """
+    `queryset.values_list(*fields).iterator()` with payload-backed columns
+    resolved: each such column also selects its payload's content.
+    """
+    model = queryset.model
+    columns = list(fields)
+    resolvers = []
+    for index, name in enumerate(fields):
+        fk = PAYLOAD_COLUMNS.get(model, {}).get(name)
+        if fk is None:
+            continue
+        as_json = model._meta.get_field(name).get_internal_type() == "JSONField"
+        resolvers.append((index, len(columns), as_json))
+        columns += [f"{fk}__content", f"{fk}__compressed"]
+
+    width = len(fields)
+    for row in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        if not resolvers:
+            yield row
+            continue
+        values = list(row[:width])
+        for index, extra, as_json in resolvers:
+            content = row[extra]
+            if content is not None:
+                values[index] = decode_content(content, row[extra + 1], as_json)
+        yield tuple(values)
+
+
+class DecodedContent(Func):
+    """Payload bytes as UTF-8 text in SQL (uncompressed payloads only)."""
+
+    template = "CAST(%(expressions)s AS TEXT)"
+    output_field = TextField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="convert_from(%(expressions)s, 'UTF8')", **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, template="CONVERT(%(expressions)s USING utf8mb4)", **extra_context
+        )
+
+
+def matching_payloads(value):
+    """
+    Payloads whose decoded text contains `value`, case-insensitively. The
+    CASE keeps compressed bytes away from the UTF-8 decode.
+    """
+    compressed = [
+        digest
+        for digest, content in Payload.objects.filter(compressed=True, size__gte=len(value))
+        .values_list("digest", "content")
+        .iterator()
+        if value.casefold() in decode_content(content, True, as_json=False).casefold()
+    ]
+    text = Case(When(compressed=False, then=DecodedContent("content")), output_field=TextField())
+    return Payload.objects.alias(text=text).filter(
+        Q(text__icontains=value) | Q(digest__in=compressed)
+    )
+
+
+class ContainsText(Lookup):
+    """`<payload fk>__contains_text=value`: the referenced payload contains `value`."""
+
+    lookup_name = "contains_text"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        # Built once: the count and page queries share this lookup
+        if not hasattr(self, "_payloads"):
+            self._payloads = matching_payloads(str(self.rhs)).values("digest").query
+        subquery = self._payloads.resolve_expression(compiler.query)
+        return compiler.compile(In(self.lhs, subquery))
+
+
+def register_lookups():
+    """Add `contains_text` to the payload foreign keys (MyappConfig.ready)."""
+    for model, columns in PAYLOAD_COLUMNS.items():
+        for fk in columns.values():
+            model._meta.get_field(fk).register_lookup(ContainsText)
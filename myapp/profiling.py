@@ -0,0 +1,212 @@
+"""
+On-demand profiling of single API requests for staff users.
+
+A staff user adds `?_profile=1` (or an `X-Profile: 1` header) to a request
+on a view using ProfilingMixin. The view then runs the request, including
+response rendering, under cProfile and records every SQL statement with
+its time. Once the request is done, it EXPLAINs the slowest SELECTs. The
+result is stored in PROFILE_DIR under a random ID that is returned in the
+`X-Profile-Id` header:
+
+    GET /api/profiles/<id>/            JSON: request, SQL with plans, hot functions
+    GET /api/profiles/<id>/download/   raw cProfile stats (snakeviz, pstats)
+
+Profiled requests skip the response cache, so they measure the real work.
+Each user may profile PROFILE_RATE_LIMIT requests per hour. Only the
+newest PROFILE_KEEP profiles are kept.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied, Throttled
+
+from .benchmarks import explain
+
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "X-Profile"
+
+# Statements EXPLAINed per profile (the slowest) and functions listed
+EXPLAIN_LIMIT = 10
+FUNCTION_LIMIT = 40
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+_TRUE = {"1", "true", "yes", "on"}
+
+
+def requested(request):
+    """Did the request ask to be profiled?"""
+    flag = request.query_params.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+    return (flag or "").lower() in _TRUE
+
+
+def allow(user):
+    """Count one profile against the user's hourly allowance."""
+    limit = getattr(settings, "PROFILE_RATE_LIMIT", 10)
+    key = f"botfarm:profile-rate:{user.pk}:{int(time.time() // 3600)}"
+    cache.add(key, 0, timeout=3600)
+    try:
+        return cache.incr(key) <= limit
+    except ValueError:  # evicted in between
+        return True
+
+
+class Profile:
+    """cProfile plus SQL capture around one request."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.statements = []
+        self._wrapper = None
+
+    def _record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((sql, params, many, time.perf_counter() - start))
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._wrapper = connection.execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self._wrapper.__exit__(None, None, None)
+        self.duration = time.perf_counter() - self.start_time
+
+    def sql(self):
+        """Captured statements, with plans for the slowest SELECTs."""
+        slowest = sorted(
+            (
+                index
+                for index, (sql, _, many, _) in enumerate(self.statements)
+                if not many and sql.lstrip()[:6].upper() in ("SELECT", "WITH")
+            ),
+            key=lambda index: self.statements[index][3],
+            reverse=True,
+        )[:EXPLAIN_LIMIT]
+        entries = []
+        for index, (sql, params, many, seconds) in enumerate(self.statements):
+            entry = {"sql": sql, "params": params, "many": many, "ms": seconds * 1000}
+            if index in slowest:
+                try:
+                    entry["explain"] = explain(sql, params)
+                except Exception as exc:  # noqa: BLE001 - a plan is best effort
+                    entry["explain_error"] = f"{type(exc).__name__}: {exc}"
+            entries.append(entry)
+        return entries
+
+    def functions(self):
+        """Top functions by cumulative time."""
+        stats = pstats.Stats(self.profiler)
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append(
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "total_ms": total * 1000,
+                    "cumulative_ms": cumulative * 1000,
+                }
+            )
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:FUNCTION_LIMIT]
+
+
+def _directory():
+    return Path(getattr(settings, "PROFILE_DIR", settings.BASE_DIR / "profiles"))
+
+
+def save(profile, request, response):
+    """Write the profile to PROFILE_DIR and return its ID."""
+    directory = _directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+
+    sql = profile.sql()
+    report = {
+        "id": profile_id,
+        "created_at": timezone.now().isoformat(),
+        "user": request.user.get_username(),
+        "method": request.method,
+        "path": request.path,
+        "query": {
+            key: values
+            for key, values in request.query_params.lists()
+            if key != PROFILE_PARAM
+        },
+        "status": response.status_code,
+        "duration_ms": profile.duration * 1000,
+        "sql_count": len(sql),
+        "sql_ms": sum(entry["ms"] for entry in sql),
+        "sql": sql,
+        "functions": profile.functions(),
+    }
+    profile.profiler.dump_stats(directory / f"{profile_id}.prof")
+    with open(directory / f"{profile_id}.json", "w") as handle:
+        json.dump(report, handle, default=str, indent=1)  # params may hold dates, bytes
+
+    _prune(directory, getattr(settings, "PROFILE_KEEP", 100))
+    return profile_id
+
+
+def _prune(directory, keep):
+    reports = sorted(directory.glob("*.json"), key=os.path.getmtime, reverse=True)
+    for path in reports[keep:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def stored_file(profile_id, suffix):
+    """Path of a stored profile file, or None if the ID is unknown."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    candidate = _directory() / f"{profile_id}{suffix}"
+    return candidate if candidate.exists() else None
+
+
+class ProfilingMixin:
+    """
+    Let staff users profile a request with `?_profile=1` or `X-Profile: 1`
+    (see module docstring). Other users get 403; over the hourly limit, 429.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.profile = None
+        super().initial(request, *args, **kwargs)
+        if not requested(request):
+            return
+        if not request.user.is_staff:
+            raise PermissionDenied("Profiling is limited to staff users.")
+        if not allow(request.user):
+            raise Throttled(detail="Profiling limit reached for this hour.")
+        self.profile = Profile()
+        self.profile.start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profile = getattr(self, "profile", None)
+        if profile is None:
+            return response
+        self.profile = None
+        try:
+            # Rendering is usually part of the slow path: profile it too
+            if hasattr(response, "render"):
+                response.render()
+        finally:
+            profile.stop()
+        response["X-Profile-Id"] = save(profile, request, response)
+        return response
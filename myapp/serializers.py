@@ -1,7 +1,11 @@
 # myapp/serializers.py
+from operator import itemgetter
+
 from rest_framework import serializers
-from .models import BotEvent, AttackType
+from .models import BotEvent, AttackType, CorrelationSession
 from .aggregates import LISTAGG_DELIMITER
+from .payloads import resolve_payload
+from .subnets import format_subnet
 
 
 def normalize_listagg(value):
@@ -17,8 +21,30 @@ def normalize_listagg(value):
     return value if isinstance(value, list) else []
 
 
+def serializer_field_names(serializer_class):
+    """Output field names of a serializer class, without instantiating it."""
+    meta = getattr(serializer_class, "Meta", None)
+    if meta is not None and isinstance(getattr(meta, "fields", None), (list, tuple)):
+        return list(meta.fields)
+    return list(serializer_class._declared_fields)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin taking an optional `fields` argument that lists the
+    fields to keep (sparse fieldsets via `?fields=` / `?omit=`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 ##### Attack Serializers (defined first to avoid circular dependencies) #####
-class AttackTypeDetailSerializer(serializers.ModelSerializer):
+class AttackTypeDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for AttackType (nested in BotEvent or standalone)."""
 
     bot_event_id = serializers.UUIDField(source="bot_event.id", read_only=True)
@@ -26,8 +52,13 @@ class AttackTypeDetailSerializer(serializers.ModelSerializer):
         source="bot_event.ip_address", read_only=True, allow_null=True
     )
     request_path = serializers.CharField(
-        source="bot_event.request_path", read_only=True
+        source="bot_event.request_path_ref.value", read_only=True, allow_null=True
     )
+    full_value = serializers.SerializerMethodField()
+
+    def get_full_value(self, obj):
+        """Inline value or the shared payload it points to."""
+        return resolve_payload(obj, "full_value")
 
     class Meta:
         model = AttackType
@@ -46,7 +77,7 @@ class AttackTypeDetailSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class AttackTypeListSerializer(serializers.ModelSerializer):
+class AttackTypeListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for AttackType list view (summary)."""
 
     bot_event_id = serializers.UUIDField(source="bot_event.id", read_only=True)
@@ -54,7 +85,7 @@ class AttackTypeListSerializer(serializers.ModelSerializer):
         source="bot_event.ip_address", read_only=True, allow_null=True
     )
     request_path = serializers.CharField(
-        source="bot_event.request_path", read_only=True
+        source="bot_event.request_path_ref.value", read_only=True, allow_null=True
     )
 
     class Meta:
@@ -73,7 +104,7 @@ class AttackTypeListSerializer(serializers.ModelSerializer):
 
 
 ##### APIList Serializers #####
-class PathAnalyticsSerializer(serializers.Serializer):
+class PathAnalyticsSerializer(DynamicFieldsMixin, serializers.Serializer):
     """Serializer for path analytics aggregated data."""
 
     request_path = serializers.CharField()  # BotEventList filter on path
@@ -100,8 +131,36 @@ class PathAnalyticsSerializer(serializers.Serializer):
         return normalize_listagg(getattr(obj, 'attacks_used', None))
 
 
+class SubnetAnalyticsSerializer(DynamicFieldsMixin, serializers.Serializer):
+    """Serializer for events aggregated by subnet (masked integer IP key)."""
+
+    subnet = serializers.SerializerMethodField()  # BotEventList filter on cidr
+    ip_version = serializers.IntegerField()
+    traffic_count = serializers.IntegerField()
+    ip_count = serializers.IntegerField(allow_null=True)
+    attack_count = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField(allow_null=True)
+
+    def get_subnet(self, obj):
+        """CIDR of the group, for the prefix length the view grouped on."""
+        prefix = self.context["prefixes"][obj["ip_version"]]
+        return format_subnet(obj["ip_version"], obj["subnet_key"], prefix)
+
+
+class AgentAnalyticsSerializer(DynamicFieldsMixin, serializers.Serializer):
+    """Serializer for events aggregated by parsed user-agent family."""
+
+    family = serializers.CharField(allow_null=True)  # BotEventList agent_family
+    is_automation_tool = serializers.BooleanField()  # BotEventList automation_tool
+    traffic_count = serializers.IntegerField()
+    attack_count = serializers.IntegerField(allow_null=True)
+    agent_count = serializers.IntegerField(allow_null=True)  # distinct raw strings
+    ip_count = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField(allow_null=True)
+
+
 ##### IP Analytics Serializers #####
-class IPAnalyticsListSerializer(serializers.Serializer):
+class IPAnalyticsListSerializer(DynamicFieldsMixin, serializers.Serializer):
     """Simple list serializer for IP analytics - minimal fields."""
 
     ip_address = serializers.CharField()
@@ -136,7 +195,7 @@ class IPAnalyticsListSerializer(serializers.Serializer):
     )
 
 
-class IPAnalyticsDetailSerializer(serializers.Serializer):
+class IPAnalyticsDetailSerializer(DynamicFieldsMixin, serializers.Serializer):
     """Detailed serializer for IP analytics with full information and nested attacks."""
 
     ip_address = serializers.CharField()
@@ -166,11 +225,24 @@ class IPAnalyticsDetailSerializer(serializers.Serializer):
 
 
 ##### Bot Event Serializers #####
-class BotEventDetailSerializer(serializers.ModelSerializer):
+class BotEventDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for BotEvent detail view (full data)."""
 
     attack_categories = serializers.SerializerMethodField()
     attack_count = serializers.SerializerMethodField()
+    data_details = serializers.SerializerMethodField()
+    # Interned columns, read through their dimension keys
+    request_path = serializers.CharField(
+        source="request_path_ref.value", read_only=True, allow_null=True
+    )
+    agent = serializers.CharField(source="agent_ref.value", read_only=True, allow_null=True)
+    referer = serializers.CharField(
+        source="referer_ref.value", read_only=True, allow_null=True
+    )
+
+    def get_data_details(self, obj):
+        """Inline payload or the shared payload it points to."""
+        return resolve_payload(obj, "data_details")
 
     def get_attack_categories(self, obj):
         """Get list of unique attack categories (or normalize from annotation)."""
@@ -179,7 +251,9 @@ class BotEventDetailSerializer(serializers.ModelSerializer):
         return list(obj.attacks.values_list("category", flat=True).distinct())
 
     def get_attack_count(self, obj):
-        """Get attack count."""
+        """Get attack count, using annotation if available."""
+        if hasattr(obj, "attack_count"):
+            return obj.attack_count
         return obj.attacks.count()
 
     class Meta:
@@ -192,6 +266,10 @@ class BotEventDetailSerializer(serializers.ModelSerializer):
             "email",
             "ip_address",  # IPAnalyticsDetailSerializer filter on ip_address
             "geo_location",
+            "country",
+            "city",
+            "asn",  # BotEventList filter on asn
+            "as_org",
             "agent",
             "referer",
             "language",
@@ -205,12 +283,18 @@ class BotEventDetailSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class BotEventListSerializer(serializers.ModelSerializer):
+class BotEventListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for BotEvent list view (summary)."""
 
     attack_count = serializers.SerializerMethodField()
     attack_categories = serializers.SerializerMethodField()
     agent_snapshot = serializers.SerializerMethodField()
+    agent_family = serializers.CharField(
+        source="agent_ref.family", allow_null=True, read_only=True
+    )  # BotEventList filter on agent_family
+    request_path = serializers.CharField(
+        source="request_path_ref.value", allow_null=True, read_only=True
+    )
 
     class Meta:
         model = BotEvent
@@ -220,6 +304,7 @@ class BotEventListSerializer(serializers.ModelSerializer):
             "method",
             "request_path",
             "agent_snapshot",
+            "agent_family",
             "ip_address",  # IPAnalyticsListSerializer filter on ip_address
             "attack_count",  # AttackTypeList filter on bot_event_id
             "attack_categories",  # AttackTypeList filter on category
@@ -231,10 +316,11 @@ class BotEventListSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_agent_snapshot(self, obj):
-        """Get agent snapshot - first part of user agent string (e.g., 'Mozilla/5.0')."""
-        if obj.agent:
-            return obj.agent.split(" ")[0]
-        return None
+        """Get agent snapshot - parsed family and version (e.g., 'curl/8.4.0')."""
+        agent = obj.agent_ref
+        if agent is None:
+            return None
+        return _agent_snapshot((agent.family, agent.version))
 
     def get_attack_count(self, obj):
         """Get attack count, using annotation if available."""
@@ -247,3 +333,163 @@ class BotEventListSerializer(serializers.ModelSerializer):
         if hasattr(obj, "attack_categories"):
             return normalize_listagg(obj.attack_categories)
         return list(obj.attacks.values_list("category", flat=True).distinct())
+
+
+##### Correlation Session Serializers #####
+class CorrelationSessionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for GET→POST correlation sessions."""
+
+    post_event_id = serializers.UUIDField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = CorrelationSession
+        fields = [
+            "id",
+            "token",
+            "post_event_id",  # BotEventDetailSerializer filter on id
+            "ip_address",  # IPAnalyticsDetailSerializer filter on ip_address
+            "request_path",
+            "issued_at",
+            "first_submitted_at",
+            "last_submitted_at",
+            "submit_count",
+            "time_to_submit_ms",
+            "fields_filled",
+            "chars_submitted",
+            "chars_per_second",
+        ]
+        read_only_fields = fields
+
+
+##### Fast-path Row Serializers #####
+# DRF field instances used only for their to_representation (unbound, no context)
+_datetime_repr = serializers.DateTimeField().to_representation
+
+
+def _agent_snapshot(parsed):
+    """(family, version) from the UserAgent dimension as 'family/version'."""
+    family, version = parsed
+    if family is None:
+        return None
+    return f"{family}/{version}" if version else family
+
+
+class RowSerializer:
+    """
+    Serialize `.values()` rows into dicts identical to a ModelSerializer's output.
+
+    Each entry in `fields` is (output_name, source_column, converter); a tuple
+    of columns passes the converter a tuple of values. Converters run only on
+    non-null values, mirroring DRF which emits None for null attributes
+    without calling to_representation; fields listed in `method_fields` behave
+    like SerializerMethodFields and always convert. Accessors are resolved
+    once per instance, so serializing a row is a tight loop over tuples.
+    """
+
+    fields = ()
+    method_fields = ()
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self._accessors = [
+            (
+                name,
+                itemgetter(source) if isinstance(source, str) else itemgetter(*source),
+                convert,
+                name in self.method_fields,
+            )
+            for name, source, convert in self.fields
+            if fields is None or name in fields
+        ]
+
+    @classmethod
+    def get_field_names(cls):
+        return [name for name, _, _ in cls.fields]
+
+    @classmethod
+    def get_columns(cls, fields=None):
+        """Columns to pass to `.values()` for the given output fields (None = all)."""
+        return list(
+            dict.fromkeys(
+                column
+                for name, source, _ in cls.fields
+                if fields is None or name in fields
+                for column in ((source,) if isinstance(source, str) else source)
+            )
+        )
+
+    def to_representation(self, row):
+        ret = {}
+        for name, get, convert, convert_null in self._accessors:
+            value = get(row)
+            if convert is not None and (convert_null or value is not None):
+                value = convert(value)
+            ret[name] = value
+        return ret
+
+    @property
+    def data(self):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in self.rows]
+
+
+class BotEventListRowSerializer(RowSerializer):
+    """Fast-path equivalent of BotEventListSerializer."""
+
+    fields = (
+        ("id", "id", str),
+        ("created_at", "created_at", _datetime_repr),
+        ("method", "method", None),
+        ("request_path", "request_path_ref__value", str),
+        ("agent_snapshot", ("agent_ref__family", "agent_ref__version"), _agent_snapshot),
+        ("agent_family", "agent_ref__family", None),
+        ("ip_address", "ip_address", str),
+        ("attack_count", "attack_count", None),
+        ("attack_categories", "attack_categories", normalize_listagg),
+        ("attack_attempted", "attack_attempted", bool),
+        ("geo_location", "geo_location", str),
+        ("event_category", "event_category", None),
+        ("target_fields", "target_fields", None),
+    )
+    method_fields = ("agent_snapshot", "attack_categories")
+
+
+class AttackTypeListRowSerializer(RowSerializer):
+    """Fast-path equivalent of AttackTypeListSerializer."""
+
+    fields = (
+        ("id", "id", str),
+        ("bot_event_id", "bot_event_id", str),
+        ("ip_address", "bot_event__ip_address", str),
+        ("request_path", "bot_event__request_path_ref__value", str),
+        ("target_field", "target_field", str),
+        ("pattern", "pattern", str),
+        ("category", "category", None),
+        ("created_at", "created_at", _datetime_repr),
+    )
+
+
+class IPTimelineRowSerializer(RowSerializer):
+    """
+    One event in an IP's timeline. `attack_categories` and `gap_seconds` are
+    filled in on the rows by the view (they depend on neighbouring rows).
+    """
+
+    fields = (
+        ("id", "id", str),
+        ("created_at", "created_at", _datetime_repr),
+        ("method", "method", None),
+        ("request_path", "request_path_ref__value", str),
+        ("event_category", "event_category", None),
+        ("attack_categories", "attack_categories", None),
+        ("gap_seconds", "gap_seconds", None),
+    )
+    # Columns read from the database; the rest are computed per page
+    columns = (
+        "id",
+        "created_at",
+        "method",
+        "request_path_ref__value",
+        "event_category",
+        "attack_attempted",
+    )
@@ -0,0 +1,232 @@
+"""
+Streaming heavy-hitter sketches for top IPs, paths and attack categories.
+
+Each worker keeps a Space-Saving summary per dimension that is updated at
+ingest in O(1) (O(capacity) only when a new item evicts the minimum). At
+most every HEAVY_HITTER_FLUSH_INTERVAL seconds, once a response has been
+sent (request_finished, see MyappConfig.ready), the worker merges its
+pending summary into the HeavyHitter table; whatever is still pending is
+merged when the worker exits. The table is itself a Space-Saving summary of
+at most HEAVY_HITTER_CAPACITY rows per dimension, so `/api/top/` reads a
+handful of rows instead of scanning every event.
+
+Space-Saving guarantees for every monitored item:
+    count - error <= true count <= count
+and any unmonitored item occurred at most `floor` times (the minimum count
+of a full summary).
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import HeavyHitter
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = [choice.value for choice in HeavyHitter.Dimension]
+
+
+def get_capacity() -> int:
+    return getattr(settings, "HEAVY_HITTER_CAPACITY", 1000)
+
+
+class SpaceSaving:
+    """Space-Saving summary: at most `capacity` (count, error) counters."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}
+        # Occurrences any item may have had in summaries merged into this one
+        self.base = 0
+
+    def __len__(self):
+        return len(self.counters)
+
+    def offer(self, item, count=1, error=0):
+        """Add `count` occurrences of `item` (`error` carries a merged bound)."""
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+            counter[1] += error
+            return
+        if len(self.counters) < self.capacity:
+            floor = self.base
+        else:
+            # Replace the minimum; the newcomer may have been it all along
+            victim = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(victim)[0]
+        self.counters[item] = [floor + count, floor + error]
+
+    def merge(self, other):
+        """
+        Mergeable Space-Saving: an item missing from one summary may have
+        occurred up to that summary's floor times there, so the floor is
+        added to its count and error. The largest `capacity` sums are kept.
+        """
+        floor, other_floor = self.floor, other.floor
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(item, (floor, floor))
+            other_count, other_error = other.counters.get(item, (other_floor, other_floor))
+            merged[item] = [count + other_count, error + other_error]
+        if len(merged) > self.capacity:
+            kept = heapq.nlargest(self.capacity, merged, key=lambda key: merged[key][0])
+            merged = {item: merged[item] for item in kept}
+        self.counters = merged
+        self.base = floor + other_floor
+
+    @property
+    def floor(self):
+        """Upper bound on the count of any item not in the summary."""
+        if len(self.counters) < self.capacity:
+            return self.base
+        return min(count for count, _ in self.counters.values())
+
+    def top(self, k):
+        """Return [(item, count, error)] for the k largest counts."""
+        ranked = sorted(self.counters.items(), key=lambda entry: -entry[1][0])
+        return [(item, count, error) for item, (count, error) in ranked[:k]]
+
+
+class _Pending:
+    """This worker's summaries since the last flush."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.sketches = {dimension: SpaceSaving(get_capacity()) for dimension in DIMENSIONS}
+        self.last_flush = 0.0
+
+    def swap(self):
+        sketches = self.sketches
+        self.sketches = {dimension: SpaceSaving(get_capacity()) for dimension in DIMENSIONS}
+        self.last_flush = time.monotonic()
+        return sketches
+
+
+_pending = _Pending()
+
+
+def record_event(ip_address, request_path, attack_categories=()):
+    """Count one ingested event (and its attacks) in this worker's summaries."""
+    with _pending.lock:
+        sketches = _pending.sketches
+        if ip_address:
+            sketches[HeavyHitter.Dimension.IP].offer(ip_address)
+        if request_path:
+            sketches[HeavyHitter.Dimension.PATH].offer(request_path)
+        for category in attack_categories:
+            sketches[HeavyHitter.Dimension.CATEGORY].offer(category)
+
+
+def flush_after_request(**kwargs):
+    """request_finished receiver: merge outside the ingest request."""
+    flush(force=False)
+
+
+def flush(force=True):
+    """
+    Merge pending summaries into the HeavyHitter table.
+    Without `force` this only runs once per HEAVY_HITTER_FLUSH_INTERVAL.
+    """
+    interval = getattr(settings, "HEAVY_HITTER_FLUSH_INTERVAL", 10)
+    with _pending.lock:
+        if not force and time.monotonic() - _pending.last_flush < interval:
+            return
+        sketches = _pending.swap()
+
+    for dimension, sketch in sketches.items():
+        if not sketch:
+            continue
+        try:
+            _merge_into_table(dimension, sketch)
+        except DatabaseError:
+            logger.exception("Heavy-hitter flush failed for %s; retrying later", dimension)
+            with _pending.lock:
+                _pending.sketches[dimension].merge(sketch)
+
+
+def _merge_into_table(dimension, sketch, retries=1):
+    try:
+        with transaction.atomic():
+            rows = {
+                row.item: row
+                for row in HeavyHitter.objects.select_for_update().filter(
+                    dimension=dimension
+                )
+            }
+            table = SpaceSaving(get_capacity())
+            table.counters = {item: [row.count, row.error] for item, row in rows.items()}
+            table.merge(sketch)
+
+            now = timezone.now()
+            evicted = [row.pk for item, row in rows.items() if item not in table.counters]
+            changed, created = [], []
+            for item, (count, error) in table.counters.items():
+                row = rows.get(item)
+                if row is None:
+                    created.append(
+                        HeavyHitter(dimension=dimension, item=item, count=count, error=error)
+                    )
+                elif (row.count, row.error) != (count, error):
+                    row.count, row.error, row.updated_at = count, error, now
+                    changed.append(row)
+
+            if evicted:
+                HeavyHitter.objects.filter(pk__in=evicted).delete()
+            HeavyHitter.objects.bulk_update(changed, ["count", "error", "updated_at"])
+            HeavyHitter.objects.bulk_create(created)
+    except IntegrityError:
+        # Another worker inserted one of our new items first; re-read and retry
+        if not retries:
+            raise
+        _merge_into_table(dimension, sketch, retries - 1)
+
+
+def reset():
+    """Drop this worker's pending counts (tests, rebuilds)."""
+    with _pending.lock:
+        _pending.reset()
+
+
+def top(dimension, limit):
+    """
+    Return the table's top `limit` items for a dimension with error bounds.
+
+    `guaranteed` marks items whose lower bound beats the next item's upper
+    bound (and the bound on unmonitored items), i.e. that certainly belong in
+    the top `limit`.
+    """
+    queryset = HeavyHitter.objects.filter(dimension=dimension)
+    rows = list(
+        queryset.order_by("-count", "item").values_list(
+            "item", "count", "error", "updated_at"
+        )[: limit + 1]
+    )
+    stats = queryset.aggregate(stored=Count("id"), floor=Min("count"))
+    floor = stats["floor"] if stats["stored"] >= get_capacity() else 0
+    runner_up = max(rows[limit][1] if len(rows) > limit else 0, floor)
+    rows = rows[:limit]
+    return {
+        "items": [
+            {
+                "item": item,
+                "count": count,
+                "error": error,
+                "min_count": count - error,
+                "guaranteed": count - error >= runner_up,
+            }
+            for item, count, error, _ in rows
+        ],
+        "max_error": floor,
+        "updated_at": max((row[3] for row in rows), default=None),
+    }
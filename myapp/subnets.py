@@ -0,0 +1,73 @@
+"""
+Integer keys for IP addresses, for CIDR range scans and subnet grouping.
+
+Every event stores `ip_version` and a signed 64-bit `ip_int`:
+
+- IPv4: the address as an integer (0 .. 2**32 - 1).
+- IPv6: the top 64 bits (the /64 network) with the sign bit flipped, so the
+  signed column sorts in address order. The interface half is dropped:
+  IPv6 hosts rotate freely within their /64, so that is the finest subnet
+  that carries signal, and it keeps the key in a plain BIGINT.
+
+A CIDR becomes `ip_version = v AND ip_int BETWEEN lo AND hi` (one index
+range scan), and a subnet is `ip_int & mask` for the prefix's mask, which
+both PostgreSQL and SQLite evaluate on the integer without touching text.
+IPv6 prefixes are therefore limited to /64.
+"""
+
+import ipaddress
+
+SIGN_BIT = 1 << 63
+MAX_PREFIX = {4: 32, 6: 64}
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= SIGN_BIT else value
+
+
+def ip_key(address):
+    """(ip_version, ip_int) for an address string, or (None, None) if invalid."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return None, None
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    if ip.version == 4:
+        return 4, int(ip)
+    return 6, _to_signed((int(ip) >> 64) ^ SIGN_BIT)
+
+
+def _key_to_int(version, key):
+    if version == 4:
+        return key
+    return ((key & ((1 << 64) - 1)) ^ SIGN_BIT) << 64
+
+
+def subnet_mask(version, prefix) -> int:
+    """Mask keeping the top `prefix` bits of an ip_int."""
+    bits = MAX_PREFIX[version]
+    if not 0 <= prefix <= bits:
+        raise ValueError(f"IPv{version} prefix must be between 0 and {bits}")
+    mask = ((1 << bits) - 1) ^ ((1 << (bits - prefix)) - 1)
+    return mask if version == 4 else _to_signed(mask)
+
+
+def network_range(cidr):
+    """
+    (ip_version, lowest ip_int, highest ip_int) covered by `cidr`.
+    Raises ValueError for an invalid network or an IPv6 prefix longer than /64.
+    """
+    network = ipaddress.ip_network(cidr, strict=False)
+    version = network.version
+    if version == 6 and network.prefixlen > MAX_PREFIX[6]:
+        raise ValueError("IPv6 networks are matched at /64 at most")
+    _, low = ip_key(str(network.network_address))
+    _, high = ip_key(str(network.broadcast_address))
+    return version, low, high
+
+
+def format_subnet(version, key, prefix) -> str:
+    """CIDR string for a masked ip_int."""
+    address = ipaddress.ip_address(_key_to_int(version, key))
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
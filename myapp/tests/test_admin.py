@@ -0,0 +1,87 @@
+"""
+Tests for the admin changelists and detail views: fixed query counts per page.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from myapp.models import AttackType
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+def _create_events(count):
+    for _ in range(count):
+        bot_event = BotEventFactory()
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.XSS)
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.SQLI)
+
+
+def _query_count(client, url, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params or {})
+    assert response.status_code == status.HTTP_200_OK
+    return len(context.captured_queries), response
+
+
+@pytest.mark.django_db
+class TestAdminQueryBudget:
+    """Test admin pages run a fixed number of queries regardless of row count."""
+
+    @pytest.mark.parametrize(
+        "url", ["/admin/myapp/botevent/", "/admin/myapp/attacktype/"]
+    )
+    def test_changelist_query_count_is_constant(self, admin_client, url):
+        _create_events(1)
+        small, _ = _query_count(admin_client, url)
+
+        _create_events(9)
+        large, _ = _query_count(admin_client, url)
+
+        assert large == small
+        assert large <= 8
+
+    def test_changelist_uses_annotations(self, admin_client):
+        """Test attack count/categories come from the changelist annotations."""
+        _create_events(1)
+        _, response = _query_count(admin_client, "/admin/myapp/botevent/")
+        assert "SQLI, XSS" in response.content.decode()
+
+    def test_ip_filter_does_not_enumerate_ips(self, admin_client):
+        """Test the IP filter is an input and filters by exact match."""
+        BotEventFactory(ip_address="10.0.0.1")
+        BotEventFactory(ip_address="10.0.0.2")
+
+        _, response = _query_count(
+            admin_client, "/admin/myapp/botevent/", {"ip_address": "10.0.0.1"}
+        )
+        content = response.content.decode()
+        assert 'name="ip_address" value="10.0.0.1"' in content
+        assert "10.0.0.2" not in content
+
+    def test_change_view_renders(self, admin_client):
+        bot_event = BotEventFactory()
+        AttackTypeFactory(bot_event=bot_event)
+        _query_count(admin_client, f"/admin/myapp/botevent/{bot_event.id}/change/")
+
+
+@pytest.mark.django_db
+class TestDetailQueryBudget:
+    """Test API detail views run a single query."""
+
+    def test_bot_event_detail_single_query(self, api_client, django_assert_num_queries):
+        bot_event = BotEventFactory()
+        AttackTypeFactory(bot_event=bot_event)
+        AttackTypeFactory(bot_event=bot_event)
+
+        with django_assert_num_queries(1):
+            response = api_client.get(f"/api/bot-events/{bot_event.id}/")
+        assert response.data["attack_count"] == 2
+
+    def test_attack_detail_single_query(self, api_client, django_assert_num_queries):
+        attack = AttackTypeFactory()
+
+        with django_assert_num_queries(1):
+            response = api_client.get(f"/api/attacks/{attack.id}/")
+        assert response.data["ip_address"] == attack.bot_event.ip_address
@@ -0,0 +1,141 @@
+"""
+Tests for user-agent classification and the /api/agents/ aggregate.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from myapp.agents import parse_agent
+from myapp.models import UserAgent
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+CHROME = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+HEADLESS = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) HeadlessChrome/119.0.6045.105 Safari/537.36"
+)
+
+
+class TestParseAgent:
+    """Test the rule table."""
+
+    @pytest.mark.parametrize(
+        "agent, family, version, os_name, automation",
+        [
+            ("curl/8.4.0", "curl", "8.4.0", "", True),
+            ("python-requests/2.31.0", "python-requests", "2.31.0", "", True),
+            ("Mozilla/5.0 zgrab/0.x", "zgrab", "0", "", True),
+            (HEADLESS, "headless-chrome", "119.0.6045.105", "linux", True),
+            (CHROME, "chrome", "120.0.0.0", "windows", False),
+            (
+                "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_1) Gecko/20100101 Firefox/121.0",
+                "firefox",
+                "121.0",
+                "macos",
+                False,
+            ),
+            ("Googlebot/2.1 (+http://www.google.com/bot.html)", "crawler", "", "", True),
+            ("something else", "other", "", "", False),
+        ],
+    )
+    def test_classification(self, agent, family, version, os_name, automation):
+        parsed = parse_agent(agent)
+        assert parsed.family == family
+        assert parsed.version == version
+        assert parsed.os == os_name
+        assert parsed.is_automation_tool is automation
+
+
+@pytest.mark.django_db
+class TestIngestClassification:
+    """Test agents are classified once, when interned."""
+
+    def test_stored_on_dimension(self, api_client, honeypot_url):
+        api_client.post(honeypot_url, {"message": "hi"}, HTTP_USER_AGENT="curl/8.4.0")
+        agent = UserAgent.objects.get(value="curl/8.4.0")
+        assert (agent.family, agent.version, agent.is_automation_tool) == (
+            "curl",
+            "8.4.0",
+            True,
+        )
+
+    def test_list_filter_and_field(self, api_client):
+        BotEventFactory(agent="curl/8.4.0")
+        BotEventFactory(agent=CHROME)
+
+        response = api_client.get(
+            reverse("bot-event-list"), {"automation_tool": "true"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [row["agent_family"] for row in results] == ["curl"]
+
+        response = api_client.get(reverse("bot-event-list"), {"agent_family": "chrome"})
+        assert response.data["count"] == 1
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_snapshot_from_parsed_agent(self, api_client, settings, fast):
+        settings.FAST_LIST_SERIALIZATION = fast
+        BotEventFactory(agent="curl/8.4.0")
+        BotEventFactory(agent=CHROME)
+        BotEventFactory(agent=None)
+
+        response = api_client.get(
+            reverse("bot-event-list"), {"fields": "agent_snapshot", "ordering": "created_at"}
+        )
+        assert [row["agent_snapshot"] for row in response.data["results"]] == [
+            "curl/8.4.0",
+            "chrome/120.0.0.0",
+            None,
+        ]
+
+    def test_backfill_command(self):
+        BotEventFactory(agent="python-requests/2.31.0")
+        UserAgent.objects.update(family=None, is_automation_tool=False)
+
+        out = StringIO()
+        call_command("parse_user_agents", stdout=out)
+        agent = UserAgent.objects.get()
+        assert agent.family == "python-requests"
+        assert agent.is_automation_tool
+        assert "Classified 1 user agents" in out.getvalue()
+
+        call_command("parse_user_agents", stdout=out)
+        assert "Classified 0 user agents" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestAgentAggregate:
+    """Test /api/agents/ groups events by family."""
+
+    def test_grouped_by_family(self, api_client):
+        BotEventFactory.create_batch(2, agent="curl/8.4.0", ip_address="10.0.0.1")
+        BotEventFactory(agent="curl/7.88.1", ip_address="10.0.0.2")
+        # The attack factory marks its event as an attack
+        AttackTypeFactory(bot_event=BotEventFactory(agent=CHROME))
+
+        response = api_client.get(reverse("agent-list"))
+        assert response.status_code == status.HTTP_200_OK
+        rows = {row["family"]: row for row in response.data["results"]}
+        assert rows["curl"]["traffic_count"] == 3
+        assert rows["curl"]["agent_count"] == 2
+        assert rows["curl"]["ip_count"] == 2
+        assert rows["curl"]["is_automation_tool"] is True
+        assert rows["chrome"]["attack_count"] == 1
+
+    def test_filter_and_sparse_fields(self, api_client):
+        BotEventFactory(agent="curl/8.4.0")
+        BotEventFactory(agent=CHROME)
+
+        response = api_client.get(
+            reverse("agent-list"),
+            {"is_automation_tool": "false", "fields": "family,traffic_count"},
+        )
+        assert response.data["results"] == [{"family": "chrome", "traffic_count": 1}]
@@ -0,0 +1,177 @@
+"""
+Tests for archive_events / restore_events.
+"""
+
+import gzip
+import hashlib
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from myapp.archive import MANIFEST_NAME, ArchiveError, archive, verify
+from myapp.models import AttackType, BotEvent, CorrelationSession
+from myapp.payloads import resolve_payload
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+# Columns added after the first archives were written (payloads and interned
+# text are always inline)
+NEWER_COLUMNS = ["ip_version", "ip_int"]
+
+
+def _strip_newer_columns(run):
+    """Rewrite an archive as if it predated NEWER_COLUMNS."""
+    manifest = json.loads((run / MANIFEST_NAME).read_text())
+    for info in manifest["tables"].values():
+        for entry in info["files"]:
+            path = run / entry["path"]
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                rows = [json.loads(line) for line in handle]
+            with gzip.open(path, "wt", encoding="utf-8") as handle:
+                for row in rows:
+                    handle.write(
+                        json.dumps({k: v for k, v in row.items() if k not in NEWER_COLUMNS})
+                        + "\n"
+                    )
+            entry["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+    (run / MANIFEST_NAME).write_text(json.dumps(manifest))
+
+
+def _age(bot_event, days):
+    created_at = timezone.now() - timedelta(days=days)
+    BotEvent.objects.filter(pk=bot_event.pk).update(created_at=created_at)
+    return created_at
+
+
+@pytest.mark.django_db
+class TestArchive:
+    """Test old rows are archived, verified, deleted and restorable."""
+
+    @pytest.fixture
+    def old_events(self):
+        events = [BotEventFactory() for _ in range(3)]
+        for days, bot_event in zip([40, 40, 50], events):
+            _age(bot_event, days)
+        AttackTypeFactory(bot_event=events[0], category="XSS")
+        return events
+
+    def _run(self, tmp_path, *args):
+        call_command("archive_events", "--output", str(tmp_path), *args, stdout=StringIO())
+        (run,) = tmp_path.iterdir()
+        return run
+
+    def test_archive_and_delete(self, tmp_path, old_events):
+        recent = BotEventFactory()
+        AttackTypeFactory(bot_event=recent)
+
+        run = self._run(tmp_path, "--batch-size", "2")
+
+        manifest = json.loads((run / MANIFEST_NAME).read_text())
+        assert manifest["tables"]["bot_events"]["rows"] == 3
+        assert manifest["tables"]["attacks"]["rows"] == 1
+        # One file per day: two days of old events
+        assert len(manifest["tables"]["bot_events"]["files"]) == 2
+        assert list(BotEvent.objects.values_list("id", flat=True)) == [recent.id]
+        assert AttackType.objects.count() == 1
+
+    def test_keep_and_restore(self, tmp_path, old_events):
+        original = BotEvent.objects.get(pk=old_events[0].pk)
+        run = self._run(tmp_path, "--keep")
+        assert BotEvent.objects.count() == 3
+
+        AttackType.objects.all().delete()
+        BotEvent.objects.all().delete()
+        call_command("restore_events", str(run), stdout=StringIO())
+
+        restored = BotEvent.objects.get(pk=original.pk)
+        assert restored.created_at == original.created_at
+        assert resolve_payload(restored, "data_details") == resolve_payload(
+            original, "data_details"
+        )
+        assert BotEvent.objects.count() == 3
+        assert AttackType.objects.get().bot_event_id == original.pk
+
+        # Restoring again skips rows that already exist
+        call_command("restore_events", str(run), stdout=StringIO())
+        assert BotEvent.objects.count() == 3
+
+    def test_restore_old_archive_fills_keys(self, api_client, tmp_path, old_events):
+        BotEvent.objects.filter(pk=old_events[0].pk).update(
+            data_details={"name": "x"}, ip_address="10.1.2.3"
+        )
+        AttackType.objects.update(full_value="<script>alert(1)</script>")
+        run = self._run(tmp_path)
+        _strip_newer_columns(run)
+
+        call_command("restore_events", str(run), stdout=StringIO())
+
+        restored = BotEvent.objects.get(pk=old_events[0].pk)
+        assert restored.agent_ref_id is not None
+        assert restored.request_path_ref_id is not None
+        assert (restored.ip_version, restored.ip_int) == (4, 0x0A010203)
+        assert restored.data_details is None
+        assert resolve_payload(restored, "data_details") == {"name": "x"}
+        attack = AttackType.objects.get()
+        assert attack.full_value == ""
+        assert resolve_payload(attack, "full_value") == "<script>alert(1)</script>"
+        response = api_client.get("/api/bot-events/", {"cidr": "10.1.2.0/24"})
+        assert [row["id"] for row in response.data["results"]] == [str(restored.id)]
+
+    def test_interned_text_round_trips(self, tmp_path, old_events):
+        BotEvent.objects.filter(pk=old_events[0].pk).update(
+            request_path=None, agent=None
+        )
+        original = BotEvent.objects.get(pk=old_events[0].pk)
+        run = self._run(tmp_path)
+
+        manifest = json.loads((run / MANIFEST_NAME).read_text())
+        for entry in manifest["tables"]["bot_events"]["files"]:
+            with gzip.open(run / entry["path"], "rt", encoding="utf-8") as handle:
+                for row in map(json.loads, handle):
+                    assert "request_path_ref_id" not in row
+                    assert row["request_path"] is not None
+
+        call_command("restore_events", str(run), stdout=StringIO())
+        restored = BotEvent.objects.get(pk=original.pk)
+        assert restored.request_path_ref.value == original.request_path_ref.value
+        assert restored.agent_ref.value == original.agent_ref.value
+        assert (restored.request_path, restored.agent) == (None, None)
+
+    def test_restore_range(self, tmp_path, old_events):
+        run = self._run(tmp_path)
+        day_40 = timezone.localdate(timezone.now() - timedelta(days=40))
+
+        call_command(
+            "restore_events", str(run), "--start", day_40.isoformat(), stdout=StringIO()
+        )
+
+        assert BotEvent.objects.count() == 2
+
+    def test_sessions_survive_event_deletion(self, tmp_path, old_events):
+        now = timezone.now()
+        CorrelationSession.objects.create(
+            token=old_events[1].id,
+            post_event=old_events[1],
+            request_path="/contact/",
+            first_submitted_at=now,
+            last_submitted_at=now,
+        )
+
+        self._run(tmp_path)
+
+        assert CorrelationSession.objects.get().post_event is None
+
+    def test_tampered_archive_is_rejected(self, tmp_path, old_events):
+        manifest = archive(tmp_path, timezone.now() - timedelta(days=30))
+        manifest["tables"]["bot_events"]["files"][0]["rows"] += 1
+
+        with pytest.raises(ArchiveError):
+            verify(tmp_path, manifest)
+
+    def test_invalid_date(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command("archive_events", "--output", str(tmp_path), "--before", "soon")
@@ -0,0 +1,94 @@
+"""
+Tests for the analytics endpoint scale benchmarks.
+"""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from myapp.benchmarks import (
+    CASES,
+    check_baseline,
+    check_budgets,
+    full_scans,
+    growth,
+    run_suite,
+)
+from myapp.models import BotEvent
+
+
+class TestReport:
+    """Test growth exponents, plan parsing and budget checks."""
+
+    def test_growth(self):
+        constant, linear = growth([1000, 10000, 100000], [2.0, 2.0, 200.0])
+        assert constant == pytest.approx(0)
+        assert linear == pytest.approx(2)
+
+    def test_full_scans(self):
+        plan = [
+            "SCAN myapp_botevent USING INDEX sqlite_autoindex_myapp_botevent_1",
+            "SEARCH myapp_useragent USING INTEGER PRIMARY KEY (rowid=?)",
+            "SEARCH myapp_attacktype USING INDEX myapp_attacktype_bot_event_id (bot_event_id=?)",
+            "SCAN CONSTANT ROW",
+            "->  Seq Scan on myapp_heavyhitter  (cost=0.00..1.00 rows=1 width=8)",
+        ]
+        assert full_scans(plan) == ["myapp_botevent", "myapp_heavyhitter"]
+
+    def test_budgets(self):
+        results = {"sizes": [10, 100], "cases": {"snapshot": {"ms": [5.0, 50.0]}}}
+        assert check_budgets(results, {"snapshot": 60}) == []
+        assert len(check_budgets(results, {"snapshot": 20})) == 1
+        assert check_budgets(results, {"snapshot": {"10": 1}}) == [
+            "snapshot @ 10 rows: 5.0 ms > budget 1 ms"
+        ]
+
+    def test_baseline(self):
+        before = {"sizes": [10], "cases": {"snapshot": {"ms": [5.0]}}}
+        after = {"sizes": [10, 100], "cases": {"snapshot": {"ms": [9.0, 90.0]}}}
+        assert len(check_baseline(after, before, tolerance=1.5)) == 1
+        assert check_baseline(after, before, tolerance=2) == []
+
+
+@pytest.mark.django_db
+class TestSuite:
+    """Test seeding and timing every case end to end."""
+
+    def test_run_suite(self, api_client):
+        # 500 rows is the smallest size with a 20th page of events
+        results = run_suite([600, 500], repeat=1)
+
+        assert BotEvent.objects.count() == 600
+        assert results["sizes"] == [500, 600]
+        assert set(results["cases"]) == {case.name for case in CASES}
+        for entry in results["cases"].values():
+            assert len(entry["ms"]) == 2
+            assert len(entry["growth"]) == 1
+            assert entry["plans"][0]["plan"] or entry["queries"][0] == 0
+
+        # The search case times a query that matches synthetic payloads
+        search = next(case for case in CASES if case.name == "bot-events:search")
+        assert api_client.get(reverse(search.url_name), search.params).data["count"] > 0
+
+    def test_command_budget_exceeded(self, tmp_path):
+        budgets = tmp_path / "budgets.json"
+        budgets.write_text(json.dumps({"snapshot": 0}))
+        output = tmp_path / "results.json"
+
+        with pytest.raises(CommandError, match="1 latency budget"):
+            call_command(
+                "benchmark_endpoints",
+                sizes=[50],
+                repeat=1,
+                cases=["snapshot"],
+                current_db=True,
+                budgets=str(budgets),
+                output=str(output),
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+        assert json.loads(output.read_text())["cases"]["snapshot"]["ms"][0] > 0
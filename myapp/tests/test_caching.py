@@ -0,0 +1,115 @@
+"""
+Tests for the versioned analytics response cache.
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from myapp.caching import get_data_version
+from myapp.checks import check_response_cache
+from myapp.models import AttackType
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    """Test ETag/304 handling and invalidation on ingest."""
+
+    def test_snapshot_returns_etag(self, api_client):
+        """Test cached endpoints emit a strong ETag."""
+        BotEventFactory()
+
+        response = api_client.get("/api/snapshot/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"].startswith('"')
+        assert response["Cache-Control"] == "no-cache"
+
+    def test_if_none_match_returns_304(self, api_client, django_assert_num_queries):
+        """Test a matching If-None-Match is answered without queries."""
+        BotEventFactory()
+        etag = api_client.get("/api/aggregate-paths/")["ETag"]
+
+        with django_assert_num_queries(0):
+            response = api_client.get(
+                "/api/aggregate-paths/", HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+
+    def test_query_params_are_normalized(self, api_client):
+        """Test param order and blank values do not change the cache key."""
+        BotEventFactory(ip_address="192.168.1.1")
+
+        first = api_client.get("/api/aggregate-ips/?ordering=ip_address&page_size=10")
+        second = api_client.get(
+            "/api/aggregate-ips/?page_size=10&search=&ordering=ip_address"
+        )
+        assert first["ETag"] == second["ETag"]
+
+    def test_ingest_bumps_data_version(self, api_client, honeypot_url):
+        """Test a honeypot hit invalidates cached responses."""
+        response = api_client.get("/api/snapshot/")
+        etag = response["ETag"]
+        assert response.data["total_events"] == 0
+        version = get_data_version()
+
+        api_client.get(honeypot_url)
+
+        assert get_data_version() > version
+        response = api_client.get("/api/snapshot/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["total_events"] == 1
+
+    def test_admin_delete_bumps_data_version(
+        self, admin_client, django_capture_on_commit_callbacks
+    ):
+        """Test deleting attacks through the admin action invalidates responses."""
+        attack = AttackTypeFactory()
+        version = get_data_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(
+                "/admin/myapp/attacktype/",
+                {"action": "delete_selected", "_selected_action": [attack.pk], "post": "yes"},
+            )
+        assert response.status_code == status.HTTP_302_FOUND
+        assert not AttackType.objects.exists()
+        assert get_data_version() > version
+
+    @pytest.mark.parametrize(
+        "command", ["rebuild_heavy_hitters", "rebuild_distinct_counters"]
+    )
+    def test_rebuild_commands_bump_data_version(self, command):
+        """Test rebuilt sketches are not hidden behind cached responses."""
+        version = get_data_version()
+        call_command(command, stdout=StringIO())
+        assert get_data_version() > version
+
+
+class TestResponseCacheCheck:
+    """Test the system check for a per-process response cache."""
+
+    def test_warns_on_locmem(self, settings):
+        settings.RESPONSE_CACHE_ENABLED = True
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        }
+        assert [error.id for error in check_response_cache(None)] == ["myapp.W001"]
+
+    def test_silent_on_shared_cache_or_when_disabled(self, settings, tmp_path):
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": str(tmp_path),
+            }
+        }
+        assert check_response_cache(None) == []
+
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        }
+        settings.RESPONSE_CACHE_ENABLED = False
+        assert check_response_cache(None) == []
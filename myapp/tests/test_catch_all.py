@@ -0,0 +1,91 @@
+"""
+Tests for catch-all capture of unmatched paths and path normalization.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from myapp import honeypot
+from myapp.models import BotEvent, RequestPath
+
+
+class TestNormalizePath:
+    """Test collapsing variable path segments."""
+
+    @pytest.mark.parametrize(
+        "path, expected",
+        [
+            ("/wp-login.php", "/wp-login.php"),
+            ("/.env", "/.env"),
+            ("/user/123/profile/", "/user/{n}/profile/"),
+            ("//admin///config.php", "/admin/config.php"),
+            ("/static/0123456789abcdef0123.js", "/static/{hash}.js"),
+            ("/files/123e4567-e89b-12d3-a456-426614174000", "/files/{hash}"),
+            ("/reset/Zm9vYmFyYmF6cXV4MTIzNDU2Nzg5MDEyMzQ1Njc4", "/reset/{token}"),
+            ("/vendor/phpunit/src/Util/PHP/eval-stdin.php", "/vendor/phpunit/src/Util/PHP/eval-stdin.php"),
+            ("/", "/"),
+        ],
+    )
+    def test_normalize(self, path, expected):
+        assert honeypot.normalize_path(path) == expected
+
+    def test_max_length(self, settings):
+        settings.HONEYPOT_PATH_MAX_LENGTH = 30
+        normalized = honeypot.normalize_path("/aaaaaaaaaa/bbbbbbbbbb/cccccccccc/dddddddddd")
+        assert normalized == "/aaaaaaaaaa/bbbbbbbbbb/{more}"
+        assert len(normalized) <= 30
+
+
+@pytest.mark.django_db
+class TestCatchAll:
+    """Test unmatched paths are recorded and answered with 404."""
+
+    def test_captured(self, client):
+        response = client.get("/wp-login.php", {"redirect_to": "<script>alert(1)</script>"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        event = BotEvent.objects.get()
+        assert event.request_path_ref.value == "/wp-login.php"
+        assert event.method == "GET"
+        assert event.attack_attempted is True
+
+    def test_post_and_head(self, client):
+        client.post("/xmlrpc.php", {"method": "system.listMethods"})
+        client.head("/.git/config")
+        client.options("/.env")
+
+        events = BotEvent.objects.values_list(
+            "method", "request_path_ref__value", "event_category"
+        )
+        assert sorted(events) == [("GET", "/.git/config", "scan"), ("POST", "/xmlrpc.php", "spam")]
+
+    def test_normalized(self, client):
+        for number in range(5):
+            client.get(f"/cgi-bin/{number}/luci")
+        assert set(BotEvent.objects.values_list("request_path_ref__value", flat=True)) == {
+            "/cgi-bin/{n}/luci"
+        }
+        assert RequestPath.objects.filter(value__startswith="/cgi-bin").count() == 1
+
+    def test_cardinality_limit(self, client, settings):
+        settings.HONEYPOT_CATCH_ALL_MAX_PATHS = 2
+        for path in ("/a.php", "/b.php", "/c.php", "/d.php", "/a.php"):
+            client.get(path)
+
+        paths = list(
+            BotEvent.objects.order_by("created_at").values_list("request_path_ref__value", flat=True)
+        )
+        assert paths == ["/a.php", "/b.php", "/{other}", "/{other}", "/a.php"]
+        assert RequestPath.objects.count() == 3
+
+    def test_matched_routes_not_captured(self, client):
+        missing = reverse("bot-event-detail", args=["00000000-0000-0000-0000-000000000000"])
+        assert client.get(missing).status_code == status.HTTP_404_NOT_FOUND
+        assert client.get(reverse("honeypot")).status_code == status.HTTP_200_OK
+        assert list(BotEvent.objects.values_list("request_path_ref__value", flat=True)) == [reverse("honeypot")]
+
+    def test_disabled(self, client, settings):
+        settings.HONEYPOT_CATCH_ALL = False
+        assert client.get("/wp-login.php").status_code == status.HTTP_404_NOT_FOUND
+        assert not BotEvent.objects.exists()
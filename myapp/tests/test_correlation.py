@@ -0,0 +1,98 @@
+"""
+Tests for correlation tokens and GET→POST sessions.
+"""
+
+import re
+from datetime import timedelta
+from uuid import UUID
+
+import pytest
+from rest_framework import status
+
+from myapp.correlation import issue_token, parse_token
+from myapp.models import BotEvent, CorrelationSession
+
+
+def _form_token(response):
+    return re.search(r'name="ctoken" value="([^"]+)"', response.content.decode()).group(1)
+
+
+@pytest.mark.django_db
+class TestCorrelationTokens:
+    """Test signed tokens round-trip without a database lookup."""
+
+    def test_signed_token_round_trip(self):
+        token, signed = issue_token()
+        parsed, issued_at = parse_token(signed)
+        assert parsed == token
+        assert issued_at is not None
+
+    def test_plain_uuid_has_no_timing(self, test_correlation_token):
+        assert parse_token(str(test_correlation_token)) == (test_correlation_token, None)
+
+    def test_tampered_token_drops_timing(self):
+        token, signed = issue_token()
+        assert parse_token(signed[:-1] + "x") == (token, None)
+
+    def test_expired_token_drops_timing(self, settings):
+        settings.CORRELATION_TOKEN_MAX_AGE = -1
+        token, signed = issue_token()
+        assert parse_token(signed) == (token, None)
+
+    def test_garbage_token(self):
+        assert parse_token("not-a-token") == (None, None)
+
+
+@pytest.mark.django_db
+class TestCorrelationSessions:
+    """Test the honeypot records sessions and the API lists them."""
+
+    def test_get_then_post_creates_session(
+        self, api_client, request_headers, honeypot_url
+    ):
+        signed = _form_token(api_client.get(honeypot_url, **request_headers))
+        get_event = BotEvent.objects.get()
+
+        api_client.post(
+            honeypot_url,
+            data={"ctoken": signed, "username": "bot", "message": "hello"},
+            **request_headers,
+        )
+
+        session = CorrelationSession.objects.get()
+        post_event = BotEvent.objects.get(method="POST")
+        assert session.token == get_event.correlation_token
+        assert post_event.correlation_token == get_event.correlation_token
+        assert session.post_event == post_event
+        assert session.fields_filled == 2
+        assert session.chars_submitted == len("bot") + len("hello")
+        assert session.time_to_submit_ms is not None
+        assert session.chars_per_second is not None
+
+    def test_resubmission_bumps_counter(self, api_client, honeypot_url):
+        signed = _form_token(api_client.get(honeypot_url))
+        for _ in range(2):
+            api_client.post(honeypot_url, data={"ctoken": signed, "message": "hi"})
+
+        session = CorrelationSession.objects.get()
+        assert session.submit_count == 2
+
+    def test_direct_post_without_token_has_no_session(self, api_client, honeypot_url):
+        api_client.post(honeypot_url, data={"message": "hi"})
+        assert CorrelationSession.objects.count() == 0
+
+    def test_session_list_api(self, api_client, honeypot_url):
+        signed = _form_token(api_client.get(honeypot_url))
+        api_client.post(honeypot_url, data={"ctoken": signed, "message": "hi"})
+        session = CorrelationSession.objects.get()
+        session.issued_at = session.first_submitted_at - timedelta(seconds=10)
+        session.time_to_submit_ms = 10000
+        session.save()
+
+        response = api_client.get("/api/sessions/", {"max_time_to_submit_ms": 20000})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["token"] == str(session.token)
+        assert UUID(response.data["results"][0]["post_event_id"])
+
+        response = api_client.get("/api/sessions/", {"max_time_to_submit_ms": 5000})
+        assert response.data["results"] == []
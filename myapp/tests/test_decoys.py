@@ -0,0 +1,86 @@
+"""
+Tests for the pre-rendered decoy pages.
+"""
+
+import re
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import Client
+
+from myapp import decoys
+from myapp.correlation import issue_token
+from myapp.models import BotEvent, CorrelationSession
+from myapp.payloads import resolve_payload
+
+
+def _ctoken(response):
+    return re.search(rb'name="ctoken" value="([^"]+)"', response.content).group(1).decode()
+
+
+class TestPages:
+    """Test the byte templates match the Django templates."""
+
+    @pytest.mark.parametrize("variant", sorted(decoys.TEMPLATES))
+    def test_same_as_template(self, variant):
+        _, token = issue_token()
+        path = next(
+            (path for path, name in decoys._VARIANT_BY_PATH.items() if name == variant),
+            "/contact/",
+        )
+        expected = render_to_string(decoys.TEMPLATES[variant], {"ctoken": token})
+        assert decoys.response(path, token).content == expected.encode()
+
+    def test_variants(self):
+        assert decoys.variant_for("/login.php") == "login"
+        assert decoys.variant_for("/upload/image/") == "upload"
+        assert decoys.variant_for("/contact/") == "contact"
+        assert decoys.variant_for("/search/") == "contact"
+
+    def test_slot_required(self, monkeypatch):
+        monkeypatch.setattr(decoys, "render_to_string", lambda *args, **kwargs: "<form></form>")
+        with pytest.raises(ImproperlyConfigured):
+            decoys.render_page("fake_form.html")
+
+
+@pytest.mark.django_db
+class TestServing:
+    """Test decoy GETs through the fast path and HoneypotView."""
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_headers_and_variant(self, settings, fast):
+        settings.HONEYPOT_FAST_PATH = fast
+        response = Client().get("/login.php")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/html; charset=utf-8"
+        assert response["Cache-Control"] == "no-store"
+        assert b"<title>Sign In</title>" in response.content
+        assert int(response["Content-Length"]) == len(response.content)
+
+    def test_fresh_token_per_request(self, client):
+        assert _ctoken(client.get("/contact/")) != _ctoken(client.get("/contact/"))
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_upload_round_trip(self, settings, fast):
+        settings.HONEYPOT_FAST_PATH = fast
+        client = Client()
+        form = client.get("/upload/")
+        assert b'enctype="multipart/form-data"' in form.content
+
+        response = client.post(
+            "/upload/",
+            {
+                "ctoken": _ctoken(form),
+                "title": "invoice",
+                "file": SimpleUploadedFile("shell.php", b"<?php system($_GET['c']); ?>"),
+            },
+        )
+        assert response.status_code == 200
+
+        event = BotEvent.objects.get(method="POST")
+        assert resolve_payload(event, "data_details")["file"] == ["shell.php"]
+        assert "file" in event.target_fields
+        assert CorrelationSession.objects.get().post_event == event
@@ -0,0 +1,199 @@
+"""
+Tests for the interned dimension tables.
+"""
+
+import importlib
+
+import pytest
+from django.apps import apps
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from myapp import dimensions
+from myapp.models import BotEvent, Referer, RequestPath, UserAgent
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+@pytest.mark.django_db
+class TestInterning:
+    """Test events get integer keys for their repeated text."""
+
+    def test_save_assigns_keys(self):
+        first = BotEventFactory(request_path="/login", agent="curl/8.0", referer=None)
+        second = BotEventFactory(request_path="/login", agent="curl/8.0", referer=None)
+
+        assert first.request_path_ref_id == second.request_path_ref_id
+        assert first.agent_ref_id == second.agent_ref_id
+        assert first.referer_ref_id is None
+        assert RequestPath.objects.get(pk=first.request_path_ref_id).value == "/login"
+        assert UserAgent.objects.filter(value="curl/8.0").count() == 1
+
+    def test_known_values_cost_no_queries(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            dimensions.intern(RequestPath, ["/a", "/b"])
+        with CaptureQueriesContext(connection) as ctx:
+            keys = dimensions.intern(RequestPath, ["/a", "/b"])
+        assert len(ctx.captured_queries) == 0
+        assert set(keys) == {"/a", "/b"}
+
+    def test_miss_after_cache_clear_reuses_row(self):
+        keys = dimensions.intern(Referer, ["https://example.com"])
+        dimensions.clear_cache()
+        assert dimensions.intern(Referer, ["https://example.com"]) == keys
+        assert Referer.objects.count() == 1
+
+    def test_rolled_back_keys_are_not_cached(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                dimensions.intern(RequestPath, ["/gone"])
+                raise RuntimeError
+
+        keys = dimensions.intern(RequestPath, ["/gone"])
+        assert RequestPath.objects.get(pk=keys["/gone"]).value == "/gone"
+
+    def test_ingest_assigns_keys(self, api_client, honeypot_url):
+        api_client.post(
+            honeypot_url, {"message": "hi"}, HTTP_USER_AGENT="bot/1.0", REMOTE_ADDR="10.0.0.1"
+        )
+        event = BotEvent.objects.get()
+        assert event.agent_ref.value == "bot/1.0"
+        assert event.request_path_ref.value == honeypot_url
+        # Only the keys are stored
+        assert (event.agent, event.request_path) == (None, None)
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Test the data migration keys rows written before the dimension tables."""
+
+    def test_backfill(self):
+        events = BotEventFactory.create_batch(3, request_path="/old", agent="old-agent")
+        BotEvent.objects.update(agent_ref=None, request_path_ref=None)
+        RequestPath.objects.all().delete()
+        UserAgent.objects.all().delete()
+
+        migration = importlib.import_module("myapp.migrations.0008_backfill_dimension_keys")
+        migration.backfill(apps, None)
+
+        keys = set(
+            BotEvent.objects.filter(pk__in=[e.pk for e in events]).values_list(
+                "request_path_ref__value", "agent_ref__value"
+            )
+        )
+        assert keys == {("/old", "old-agent")}
+
+
+@pytest.mark.django_db
+class TestGroupedByKey:
+    """Test path aggregates group on the interned key."""
+
+    def test_path_aggregate(self, api_client):
+        BotEventFactory.create_batch(3, request_path="/wp-login.php")
+        BotEventFactory(request_path="/admin")
+
+        response = api_client.get(reverse("aggregate-path-list"))
+        assert response.status_code == status.HTTP_200_OK
+        counts = {
+            row["request_path"]: row["traffic_count"]
+            for row in response.data["results"]
+        }
+        assert counts == {"/wp-login.php": 3, "/admin": 1}
+
+    def test_path_without_events_is_hidden(self, api_client):
+        dimensions.intern(RequestPath, ["/archived"])
+        BotEventFactory(request_path="/live")
+
+        response = api_client.get(reverse("aggregate-path-list"))
+        assert [row["request_path"] for row in response.data["results"]] == ["/live"]
+
+    def test_snapshot_top_paths(self, api_client):
+        BotEventFactory.create_batch(2, request_path="/x")
+        BotEventFactory(request_path="/y")
+
+        response = api_client.get(reverse("snapshot"), {"fields": "top_three_paths"})
+        assert response.data["top_three_paths"] == [
+            {"request_path": "/x", "total_count": 2},
+            {"request_path": "/y", "total_count": 1},
+        ]
+
+
+@pytest.fixture
+def key_only_event():
+    """An event stored the way ingest stores it: text only in the dimension tables."""
+    event = BotEventFactory(
+        request_path="/wp-login.php",
+        agent="bot/2.0",
+        referer="https://ref.example",
+        origin="https://origin.example",
+        ip_address="10.0.0.7",
+    )
+    BotEvent.objects.update(agent=None, referer=None, origin=None, request_path=None)
+    return event
+
+
+@pytest.mark.django_db
+class TestKeyOnlyRows:
+    """Test readers get interned text through the keys, not the event columns."""
+
+    @pytest.mark.parametrize(
+        "param, value",
+        [
+            ("request_path", "/wp-login.php"),
+            ("exact_request_path", "/wp-login.php"),
+            ("agent", "bot/2.0"),
+            ("referer", "https://ref.example"),
+            ("origin", "https://origin.example"),
+        ],
+    )
+    def test_filters(self, api_client, key_only_event, param, value):
+        BotEventFactory(request_path="/other", agent="other", referer=None, origin=None)
+        url = reverse("bot-event-list")
+
+        response = api_client.get(url, {param: value})
+        assert [row["id"] for row in response.data["results"]] == [str(key_only_event.pk)]
+        assert api_client.get(url, {param: "unknown"}).data["results"] == []
+
+    def test_attack_filter(self, api_client, key_only_event):
+        AttackTypeFactory(bot_event=key_only_event)
+
+        response = api_client.get("/api/attacks/", {"request_path": "/wp-login.php"})
+        assert [row["request_path"] for row in response.data["results"]] == ["/wp-login.php"]
+
+    def test_search_and_detail(self, api_client, key_only_event):
+        response = api_client.get(reverse("bot-event-list"), {"search": "wp-login"})
+        assert [row["request_path"] for row in response.data["results"]] == ["/wp-login.php"]
+
+        detail = api_client.get(reverse("bot-event-detail", args=[key_only_event.pk])).data
+        assert (detail["request_path"], detail["agent"], detail["referer"]) == (
+            "/wp-login.php",
+            "bot/2.0",
+            "https://ref.example",
+        )
+
+    def test_aggregate_ip(self, api_client, key_only_event):
+        response = api_client.get("/api/aggregate-ips/10.0.0.7/")
+        assert (response.data["agent"], response.data["referer"]) == (
+            "bot/2.0",
+            "https://ref.example",
+        )
+
+    def test_export(self, api_client, key_only_event):
+        response = api_client.get("/api/bot-events/export/", {"format": "csv"})
+        body = b"".join(response.streaming_content).decode()
+        assert "/wp-login.php" in body
+        assert "bot/2.0" in body
+
+    def test_clear_and_restore_migration(self):
+        event = BotEventFactory(request_path="/old", agent="old-agent", referer=None)
+        migration = importlib.import_module("myapp.migrations.0017_clear_dimension_text")
+
+        migration.clear_text(apps, None)
+        event.refresh_from_db()
+        assert (event.request_path, event.agent, event.referer) == (None, None, None)
+        assert event.request_path_ref.value == "/old"
+
+        migration.restore_text(apps, None)
+        event.refresh_from_db()
+        assert (event.request_path, event.agent) == ("/old", "old-agent")
@@ -0,0 +1,174 @@
+"""
+Tests for the HyperLogLog distinct counters and /api/uniques/.
+"""
+
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+from rest_framework import status
+
+from myapp import distinct
+from myapp.models import BotEvent, DistinctCounter
+from myapp.tests.factories import BotEventFactory
+
+
+@pytest.fixture(autouse=True)
+def fresh_counters(settings):
+    settings.DISTINCT_COUNTER_FLUSH_INTERVAL = 0
+    distinct.reset()
+    yield
+    distinct.reset()
+
+
+class TestHyperLogLog:
+    """Test the estimator and register merge."""
+
+    @pytest.mark.parametrize("size", [10, 1000, 50000])
+    def test_estimate_within_error(self, size):
+        sketch = distinct.HyperLogLog()
+        for i in range(size):
+            sketch.add(f"10.{i}")
+
+        # 3 standard errors
+        assert abs(sketch.count() - size) <= max(1, 3 * distinct.RELATIVE_ERROR * size)
+
+    def test_merge_is_union(self):
+        left, right = distinct.HyperLogLog(), distinct.HyperLogLog()
+        for i in range(3000):
+            left.add(i)
+        for i in range(2000, 5000):
+            right.add(i)
+        left.merge(right)
+        twice = distinct.HyperLogLog(bytearray(left.registers))
+        twice.merge(right)
+
+        assert abs(left.count() - 5000) <= 3 * distinct.RELATIVE_ERROR * 5000
+        assert twice.count() == left.count()
+
+    def test_serialized_size(self):
+        sketch = distinct.HyperLogLog()
+        sketch.add("10.0.0.1")
+
+        assert len(sketch.to_bytes()) < 100
+        assert distinct.HyperLogLog.from_bytes(sketch.to_bytes()).count() == 1
+
+
+@pytest.mark.django_db
+class TestUniquesEndpoint:
+    """Test ingest feeds the day buckets and the endpoints read them."""
+
+    def _ingest(self, api_client, honeypot_url):
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.1"]:
+            api_client.get(honeypot_url, REMOTE_ADDR=ip, HTTP_USER_AGENT=f"agent-{ip}")
+
+    def test_ingest_and_query(self, api_client, honeypot_url):
+        self._ingest(api_client, honeypot_url)
+
+        response = api_client.get("/api/uniques/", {"dimension": "ip"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["approximate"] is True
+        assert response.data["total"] == 2
+        assert response.data["days"] == [
+            {"day": timezone.localdate(), "count": 2}
+        ]
+        agents = api_client.get("/api/uniques/", {"dimension": "agent"}).data
+        assert agents["total"] == 2
+
+    def test_path_dimension(self, api_client, honeypot_url):
+        self._ingest(api_client, honeypot_url)
+
+        response = api_client.get(
+            "/api/uniques/", {"dimension": "path_ip", "path": honeypot_url}
+        )
+        assert response.data["total"] == 2
+        missing = api_client.get("/api/uniques/", {"dimension": "path_ip"})
+        assert missing.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_exact_fallback(self, api_client, settings):
+        BotEventFactory.create_batch(3, email="a@example.com")
+        # No sketches yet: exact DISTINCT answers
+        response = api_client.get("/api/uniques/", {"dimension": "email"})
+        assert (response.data["total"], response.data["approximate"]) == (1, False)
+
+        call_command("rebuild_distinct_counters", stdout=StringIO())
+        assert DistinctCounter.objects.filter(dimension="email").exists()
+        settings.APPROXIMATE_DISTINCT_COUNTS = False
+        assert distinct.distinct_count("email") == (1, False)
+
+    def test_snapshot_total_ips_uses_sketch(self, api_client, honeypot_url):
+        self._ingest(api_client, honeypot_url)
+        # Events created outside ingest are not in the sketch until rebuilt
+        BotEventFactory(ip_address="10.0.0.3")
+
+        assert api_client.get("/api/snapshot/").data["total_ips"] == 2
+        call_command("rebuild_distinct_counters", stdout=StringIO())
+        assert distinct.distinct_count("ip") == (3, True)
+
+    def test_events_before_first_ingest(self, api_client, honeypot_url):
+        for ip in ["10.0.0.7", "10.0.0.8"]:
+            event = BotEventFactory(ip_address=ip)
+            BotEvent.objects.filter(pk=event.pk).update(
+                created_at=timezone.now() - timedelta(days=3)
+            )
+        # Deploy: the migration sketches the existing events
+        seed = import_module("myapp.migrations.0013_seed_distinct_counters").seed
+        seed(apps, None)
+
+        api_client.get(honeypot_url, REMOTE_ADDR="10.0.0.9")
+
+        assert distinct.distinct_count("ip") == (3, True)
+        assert api_client.get("/api/snapshot/").data["total_ips"] == 3
+        days = api_client.get("/api/uniques/", {"dimension": "ip"}).data["days"]
+        assert [day["count"] for day in days] == [2, 1]
+
+    def test_seed_merges_into_ingested_buckets(self, api_client, honeypot_url):
+        self._ingest(api_client, honeypot_url)
+        BotEventFactory(ip_address="10.0.0.3")
+
+        seed = import_module("myapp.migrations.0013_seed_distinct_counters").seed
+        seed(apps, None)
+
+        assert distinct.distinct_count("ip") == (3, True)
+        assert DistinctCounter.objects.filter(dimension="ip").count() == 1
+
+    def test_exact_until_seeded(self, api_client, honeypot_url, monkeypatch):
+        self._ingest(api_client, honeypot_url)
+        BotEventFactory(ip_address="10.0.0.3")
+        # Deploy in progress: the seeding migration has not finished
+        app, name = distinct.SEED_MIGRATION
+        MigrationRecorder(connection).migration_qs.filter(app=app, name=name).delete()
+        monkeypatch.setattr(distinct, "_seeded", False)
+
+        assert distinct.distinct_count("ip") == (3, False)
+
+        MigrationRecorder(connection).record_applied(app, name)
+        assert distinct.distinct_count("ip") == (2, True)
+
+    def test_pending_hashes_flushed_at_exit(self, settings):
+        settings.DISTINCT_COUNTER_FLUSH_INTERVAL = 3600
+        with mock.patch("atexit.register") as register:
+            apps.get_app_config("myapp").ready()
+        exit_hooks = [call.args[0] for call in register.call_args_list]
+        assert distinct.flush in exit_hooks
+
+        distinct.flush()  # starts the interval
+        distinct.record_event(BotEventFactory.build(ip_address="10.0.0.1"), "bot/1.0", "/")
+        distinct.flush_after_request()
+        assert not DistinctCounter.objects.exists()
+
+        for hook in exit_hooks:
+            hook()
+        assert DistinctCounter.objects.filter(dimension="ip").exists()
+
+    def test_invalid_params(self, api_client):
+        assert api_client.get("/api/uniques/", {"dimension": "x"}).status_code == 400
+        assert api_client.get("/api/uniques/", {"start": "soon"}).status_code == 400
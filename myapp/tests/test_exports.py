@@ -0,0 +1,78 @@
+"""
+Tests for the streaming NDJSON/CSV export endpoints.
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+
+from myapp.models import AttackType, BotEvent
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+def _content(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+@pytest.mark.django_db
+class TestExports:
+    """Test export routes stream every matching row."""
+
+    def test_bot_event_export_ndjson(self, api_client):
+        """Test bot events stream as NDJSON, one object per line."""
+        BotEventFactory.create_spam_event(ip_address="10.0.0.1")
+        BotEventFactory.create_scan_event(ip_address="10.0.0.2")
+
+        response = api_client.get("/api/bot-events/export/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("application/x-ndjson")
+
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+        assert len(rows) == 2
+        assert {row["ip_address"] for row in rows} == {"10.0.0.1", "10.0.0.2"}
+        assert "data_details" in rows[0]
+
+    def test_bot_event_export_honours_filters(self, api_client):
+        """Test the export applies BotEventFilter params."""
+        BotEventFactory(method=BotEvent.MethodChoice.GET.value)
+        BotEventFactory(method=BotEvent.MethodChoice.POST.value)
+
+        response = api_client.get("/api/bot-events/export/", {"method": "POST"})
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+        assert [row["method"] for row in rows] == ["POST"]
+
+    def test_attack_export_csv(self, api_client):
+        """Test attacks stream as CSV with a header row."""
+        bot_event = BotEventFactory(ip_address="10.0.0.3")
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.XSS)
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.SQLI)
+
+        response = api_client.get(
+            "/api/attacks/export/", {"format": "csv", "attack_categories": "XSS"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        assert len(rows) == 1
+        assert rows[0]["category"] == "XSS"
+        assert rows[0]["ip_address"] == "10.0.0.3"
+
+    def test_admin_export_action(self, client):
+        """Test the admin action streams the selected rows."""
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        client.force_login(admin)
+        selected = BotEventFactory()
+        BotEventFactory()
+
+        response = client.post(
+            "/admin/myapp/botevent/",
+            {"action": "export_ndjson", "_selected_action": [str(selected.id)]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+        assert [row["id"] for row in rows] == [str(selected.id)]
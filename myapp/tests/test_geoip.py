@@ -0,0 +1,152 @@
+"""
+Tests for the offline geo/ASN range database and enrichment.
+"""
+
+import ipaddress
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from myapp import geoip
+from myapp.models import BotEvent
+from myapp.tests.factories import BotEventFactory
+
+CSV = """network,start_ip,end_ip,country,city,asn,as_org
+198.51.100.0/24,,,NL,Amsterdam,AS64500,Example Hosting
+,203.0.113.10,203.0.113.20,US,,64501,Example Cloud
+2001:db8::/32,,,DE,Berlin,64502,Example v6
+"""
+
+
+@pytest.fixture
+def geo_db(tmp_path):
+    source = tmp_path / "ranges.csv"
+    source.write_text(CSV)
+    path = tmp_path / "geo.bin"
+    call_command("build_geo_db", str(source), str(path), stdout=StringIO())
+    geoip.reset()
+    with override_settings(GEOIP_DATABASE=str(path)):
+        yield path
+    geoip.reset()
+
+
+class TestRangeDatabase:
+    """Test building and searching the range file."""
+
+    @pytest.mark.parametrize(
+        "address, expected",
+        [
+            ("198.51.100.0", ("NL", "Amsterdam", 64500, "Example Hosting")),
+            ("198.51.100.255", ("NL", "Amsterdam", 64500, "Example Hosting")),
+            ("203.0.113.15", ("US", None, 64501, "Example Cloud")),
+            ("::ffff:203.0.113.10", ("US", None, 64501, "Example Cloud")),
+            ("2001:db8:1::5", ("DE", "Berlin", 64502, "Example v6")),
+        ],
+    )
+    def test_hits(self, geo_db, address, expected):
+        assert tuple(geoip.lookup(address)) == expected
+
+    @pytest.mark.parametrize(
+        "address", ["198.51.101.0", "203.0.113.21", "1.1.1.1", "2001:db9::1", "bogus"]
+    )
+    def test_misses(self, geo_db, address):
+        assert geoip.lookup(address) is None
+
+    def test_location_label(self):
+        assert geoip.GeoRecord("NL", "Amsterdam", None, None).location == "NL, Amsterdam"
+        assert geoip.GeoRecord(None, None, 1, "x").location is None
+
+    def test_overlap_rejected(self, tmp_path):
+        net = ipaddress.ip_network("10.0.0.0/8")
+        record = geoip.GeoRecord("XX", None, None, None)
+        with pytest.raises(ValueError):
+            geoip.build_database(
+                [
+                    (net.network_address, net.broadcast_address, record),
+                    (ipaddress.ip_address("10.1.0.0"), ipaddress.ip_address("10.1.0.9"), record),
+                ],
+                tmp_path / "bad.bin",
+            )
+
+    def test_unset(self):
+        geoip.reset()
+        assert geoip.lookup("198.51.100.1") is None
+
+
+@pytest.mark.django_db
+class TestEnrichment:
+    """Test ingest and backfill fill the geo columns."""
+
+    def test_ingest_without_headers(self, geo_db, api_client, honeypot_url):
+        api_client.post(honeypot_url, {"message": "hi"}, REMOTE_ADDR="198.51.100.7")
+        event = BotEvent.objects.get()
+        assert (event.country, event.city, event.asn) == ("NL", "Amsterdam", 64500)
+        assert event.geo_location == "NL, Amsterdam"
+
+    def test_headers_win_for_geo_location(self, geo_db, api_client, honeypot_url):
+        api_client.post(
+            honeypot_url,
+            {"message": "hi"},
+            REMOTE_ADDR="198.51.100.7",
+            HTTP_CF_IPCOUNTRY="FR",
+        )
+        event = BotEvent.objects.get()
+        assert event.geo_location == "FR"
+        assert event.asn == 64500
+
+    def test_filter(self, geo_db, api_client):
+        BotEventFactory(ip_address="198.51.100.7")
+        BotEventFactory(ip_address="192.0.2.1")
+        call_command("enrich_geo", stdout=StringIO())
+
+        response = api_client.get(reverse("bot-event-list"), {"asn": 64500})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 1
+
+    def test_backfill_command(self, geo_db):
+        event = BotEventFactory(ip_address="2001:db8::9", geo_location=None)
+        other = BotEventFactory(ip_address="192.0.2.1")
+
+        out = StringIO()
+        call_command("enrich_geo", batch_size=1, stdout=out)
+        assert "Enriched 1 of 2 events" in out.getvalue()
+        event.refresh_from_db()
+        other.refresh_from_db()
+        assert (event.country, event.asn, event.geo_location) == ("DE", 64502, "DE, Berlin")
+        assert other.asn is None
+
+    @pytest.mark.parametrize("name, content", [("missing.bin", None), ("empty.bin", b"")])
+    def test_bad_database_falls_back_to_headers(
+        self, tmp_path, settings, caplog, client, honeypot_url, name, content
+    ):
+        path = tmp_path / name
+        if content is not None:
+            path.write_bytes(content)
+        settings.GEOIP_DATABASE = str(path)
+        geoip.reset()
+
+        response = client.get(honeypot_url, REMOTE_ADDR="198.51.100.7", HTTP_CF_IPCOUNTRY="FR")
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get("/wp-login.php", REMOTE_ADDR="198.51.100.7")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        events = BotEvent.objects.order_by("created_at")
+        assert [(event.geo_location, event.country) for event in events] == [
+            ("FR", None),
+            (None, None),
+        ]
+        errors = [record for record in caplog.records if record.name == "myapp.geoip"]
+        assert len(errors) == 1
+        with pytest.raises(CommandError):
+            call_command("enrich_geo", stdout=StringIO())
+        geoip.reset()
+
+    def test_backfill_requires_database(self):
+        geoip.reset()
+        with pytest.raises(CommandError):
+            call_command("enrich_geo", stdout=StringIO())
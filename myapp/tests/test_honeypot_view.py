@@ -2,10 +2,16 @@
 Simplified tests for HoneypotView.
 """
 
+import re
+
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import reverse
 from rest_framework import status
 
-from myapp.models import BotEvent, AttackType
+from myapp.models import BotEvent, AttackType, CorrelationSession
+from myapp.payloads import resolve_payload
 
 
 @pytest.mark.django_db
@@ -72,8 +78,122 @@ class TestHoneypotView:
         bot_event = BotEvent.objects.first()
 
         assert bot_event.ip_address == "192.168.1.100"
-        assert bot_event.agent == "Mozilla/5.0 (Test Browser)"
-        assert bot_event.referer == "example.com"
+        assert bot_event.agent_ref.value == "Mozilla/5.0 (Test Browser)"
+        assert bot_event.referer_ref.value == "example.com"
         assert bot_event.language == "en-US"
         assert "US" in bot_event.geo_location
         assert "New York" in bot_event.geo_location
+
+
+# (method, data, content type) sent to the honeypot by TestFastPath
+FAST_PATH_REQUESTS = [
+    ("get", {"username": "<script>alert(1)</script>", "email": "a@example.com"}, None),
+    ("post", {"message": "' OR 1=1 --", "email": "b@example.com"}, None),
+    ("post", '{"comment": "{{7*7}}", "tags": ["x", "y"]}', "application/json"),
+    ("post", {}, None),
+    ("put", "name=..%2F..%2Fetc%2Fpasswd", "application/x-www-form-urlencoded"),
+    ("delete", "", None),
+]
+
+# Left to HoneypotView: its response is the reference
+FALLBACK_REQUESTS = [
+    ("post", "hello", "text/plain"),
+    ("post", "{bad json", "application/json"),
+    ("post", '{"n": NaN}', "application/json"),
+    ("head", {}, None),
+    ("options", "", None),
+]
+
+
+def _send(client, method, data, content_type):
+    kwargs = {"REMOTE_ADDR": "203.0.113.9"}
+    if content_type:
+        kwargs["content_type"] = content_type
+    return getattr(client, method)(reverse("honeypot"), data, **kwargs)
+
+
+def _stored(seen):
+    event = BotEvent.objects.exclude(pk__in=seen).first()
+    if event is None:
+        return None
+    attacks = sorted(
+        (attack.target_field, attack.category, attack.pattern, attack.raw_value)
+        for attack in event.attacks.all()
+    )
+    return {
+        "method": event.method,
+        "path": event.request_path_ref.value,
+        "category": event.event_category,
+        "email": event.email,
+        "data": resolve_payload(event, "data_details"),
+        "target_fields": event.target_fields,
+        "field_count": event.field_count,
+        "correlated": event.correlation_token is not None,
+        "attacks": attacks,
+    }
+
+
+@pytest.mark.django_db
+class TestFastPath:
+    """Test HoneypotFastPathMiddleware against HoneypotView."""
+
+    def _both(self, settings, method, data, content_type):
+        results = []
+        for fast in (False, True):
+            seen = list(BotEvent.objects.values_list("pk", flat=True))
+            settings.HONEYPOT_FAST_PATH = fast
+            response = _send(Client(), method, data, content_type)
+            results.append((response, _stored(seen)))
+        return results
+
+    @pytest.mark.parametrize("method, data, content_type", FAST_PATH_REQUESTS)
+    def test_same_as_view(self, settings, method, data, content_type):
+        (view, view_event), (fast, fast_event) = self._both(settings, method, data, content_type)
+
+        assert fast.status_code == view.status_code
+        assert fast["Content-Type"] == view["Content-Type"]
+        if method != "get":  # the form embeds a fresh token
+            assert fast.content == view.content
+        assert fast_event == view_event is not None
+        # Answered before DRF (which adds Vary: Accept) and the session middleware
+        assert "Vary" in view and "Vary" not in fast
+
+    @pytest.mark.parametrize("method, data, content_type", FALLBACK_REQUESTS)
+    def test_fallback(self, settings, method, data, content_type):
+        (view, view_event), (fast, fast_event) = self._both(settings, method, data, content_type)
+
+        assert fast.status_code == view.status_code
+        assert fast.content == view.content
+        assert fast_event == view_event
+        assert fast["Vary"] == view["Vary"]
+
+    def test_upload(self, settings):
+        results = []
+        for fast in (False, True):
+            seen = list(BotEvent.objects.values_list("pk", flat=True))
+            settings.HONEYPOT_FAST_PATH = fast
+            upload = SimpleUploadedFile("shell.php", b"<?php system($_GET['c']); ?>")
+            response = _send(Client(), "post", {"name": "x", "file": upload}, None)
+            results.append((response.status_code, _stored(seen)))
+
+        (view_status, view_event), (fast_status, fast_event) = results
+        assert view_status == fast_status == status.HTTP_200_OK
+        assert fast_event == view_event
+        assert view_event["data"] == {"name": ["x"], "file": ["shell.php"]}
+
+    def test_form_round_trip(self, settings):
+        settings.HONEYPOT_FAST_PATH = True
+        client = Client()
+        form = client.get(reverse("honeypot"))
+        ctoken = re.search(rb'name="ctoken" value="([^"]+)"', form.content).group(1)
+        client.post(reverse("honeypot"), {"ctoken": ctoken.decode(), "email": "c@example.com"})
+
+        session = CorrelationSession.objects.get()
+        assert session.post_event.method == "POST"
+        assert session.time_to_submit_ms is not None
+
+    def test_other_paths_untouched(self, settings, client):
+        settings.HONEYPOT_FAST_PATH = True
+        assert client.get("/contact").status_code == 301  # APPEND_SLASH, then the fast path
+        assert client.get(reverse("bot-event-list")).status_code == status.HTTP_200_OK
+        assert not BotEvent.objects.exists()
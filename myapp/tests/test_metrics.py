@@ -0,0 +1,208 @@
+"""
+Tests for the request metrics middleware, Server-Timing and /metrics.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from myapp import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _write_worker(directory, pid, started, count):
+    other = metrics.Registry()
+    for _ in range(count):
+        other.observe("bot-event-list", "GET", 200, 0.01, metrics.RequestTimings())
+    (directory / f"metrics-{pid}-{started}.json").write_text(json.dumps(other.snapshot()))
+
+
+def _stats(route, method="GET", status=200):
+    return metrics.collect().get((route, method, status))
+
+
+class TestServerTiming:
+    """Test who gets the Server-Timing header."""
+
+    def test_staff(self, client):
+        client.force_login(User.objects.create_user("staff", password="pass", is_staff=True))
+        response = client.get(reverse("bot-event-list"))
+        header = response["Server-Timing"]
+        assert header.startswith("total;dur=")
+        assert 'db;dur=' in header and "queries" in header
+        assert "serialize;dur=" in header
+        assert "render;dur=" in header
+
+    def test_anonymous(self, client):
+        response = client.get(reverse("bot-event-list"))
+        assert "Server-Timing" not in response
+
+    def test_debug(self, client, settings):
+        settings.DEBUG = True
+        assert "Server-Timing" in client.get(reverse("bot-event-list"))
+
+
+class TestRegistry:
+    """Test what is recorded per route."""
+
+    def test_routes(self, client):
+        client.get(reverse("bot-event-list"))
+        client.get(reverse("bot-event-list"))
+        client.get("/no-such-path/")
+
+        stats = _stats("bot-event-list")
+        assert stats["count"] == 2
+        assert stats["queries"] > 0
+        assert sum(stats["buckets"]) == 2
+        assert _stats("unmatched", status=404)["count"] == 1
+
+    def test_honeypot_phases(self, client):
+        client.get(reverse("honeypot"), {"q": "<script>alert(1)</script>"})
+        client.get("/submit-form/", {"q": "' OR 1=1 --"})
+
+        stats = _stats("honeypot")
+        assert stats["count"] == 2
+        assert stats["phases"]["detect"] > 0
+
+    def test_unknown_method(self, client):
+        client.generic("PROPFIND", reverse("honeypot"))
+        assert [key[1] for key in metrics.collect()] == ["OTHER"]
+
+    def test_disabled(self, client, settings):
+        settings.METRICS_ENABLED = False
+        response = client.get(reverse("bot-event-list"))
+        assert "Server-Timing" not in response
+        assert metrics.collect() == {}
+
+
+class TestEndpoint:
+    """Test the Prometheus endpoint."""
+
+    def test_histogram(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = ["127.0.0.1"]
+        client.get(reverse("bot-event-list"))
+        response = client.get(reverse("metrics"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.content.decode()
+        labels = 'route="bot-event-list",method="GET",status="200"'
+        assert f'botfarm_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in body
+        assert f"botfarm_request_duration_seconds_count{{{labels}}} 1" in body
+        assert f"botfarm_request_queries_total{{{labels}}}" in body
+        assert f'botfarm_request_phase_seconds_total{{{labels},phase="serialize"}}' in body
+
+    def test_token(self, client, settings):
+        settings.METRICS_TOKEN = "secret"
+        assert client.get(reverse("metrics")).status_code == 401
+        assert client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code == 401
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        assert response.status_code == 200
+
+    def test_hidden_by_default(self, client, settings):
+        settings.METRICS_TOKEN = None
+        settings.METRICS_ALLOWED_IPS = []
+        assert client.get(reverse("metrics")).status_code == 404
+
+        client.force_login(User.objects.create_user("staff", password="pass", is_staff=True))
+        assert client.get(reverse("metrics")).status_code == 200
+
+    def test_allowed_ips(self, client, settings):
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+        assert client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3").status_code == 200
+        assert client.get(reverse("metrics"), REMOTE_ADDR="192.0.2.1").status_code == 404
+        # Forwarded headers are not trusted for the allow-list
+        response = client.get(
+            reverse("metrics"), REMOTE_ADDR="192.0.2.1", HTTP_X_FORWARDED_FOR="10.1.2.3"
+        )
+        assert response.status_code == 404
+
+
+class TestMultiprocess:
+    """Test merging the files of other workers."""
+
+    def test_merge(self, client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        client.get(reverse("bot-event-list"))
+        metrics.flush()
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 1
+
+        # Another (possibly dead) worker's registry
+        other = metrics.Registry()
+        timings = metrics.RequestTimings()
+        timings.queries = 3
+        other.observe("bot-event-list", "GET", 200, 0.2, timings)
+        (tmp_path / "metrics-1-0.json").write_text(json.dumps(other.snapshot()))
+        (tmp_path / f"metrics-{_dead_pid()}-0.json").write_text("[[")  # half-written
+
+        stats = _stats("bot-event-list")
+        assert stats["count"] == 2
+        assert stats["buckets"][metrics.DURATION_BUCKETS.index(0.25)] >= 1
+        settings.METRICS_TOKEN = "secret"
+        body = client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        ).content.decode()
+        labels = 'route="bot-event-list",method="GET",status="200"'
+        assert f"botfarm_request_duration_seconds_count{{{labels}}} 2" in body
+
+    def test_flush_interval(self, client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        settings.METRICS_FLUSH_INTERVAL = 3600
+        client.get(reverse("bot-event-list"))
+        assert list(tmp_path.glob("metrics-*.json")) == []
+        settings.METRICS_FLUSH_INTERVAL = 0
+        client.get(reverse("bot-event-list"))
+        assert len(list(tmp_path.glob("metrics-*.json"))) == 1
+
+    def test_dead_workers_are_retired(self, settings, tmp_path):
+        """Test exited workers' files are folded into retired.json, never lost."""
+        settings.METRICS_DIR = str(tmp_path)
+        _write_worker(tmp_path, 1, 0, 1)  # alive (init)
+        _write_worker(tmp_path, _dead_pid(), 0, 2)
+        _write_worker(tmp_path, _dead_pid(), 0, 3)
+
+        assert _stats("bot-event-list")["count"] == 6
+        assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == [
+            "metrics-1-0.json"
+        ]
+        assert (tmp_path / "retired.json").exists()
+        assert _stats("bot-event-list")["count"] == 6
+
+        _write_worker(tmp_path, _dead_pid(), 0, 4)
+        assert _stats("bot-event-list")["count"] == 10
+
+    def test_recycled_pid_keeps_both_files(self, settings, tmp_path):
+        """Test a new worker reusing a pid does not overwrite the old one's counts."""
+        settings.METRICS_DIR = str(tmp_path)
+        _write_worker(tmp_path, 1, 0, 1)
+        _write_worker(tmp_path, 1, 5, 2)
+        assert _stats("bot-event-list")["count"] == 3
+
+    def test_retired_files_listed_until_deleted(self, settings, tmp_path):
+        """Test a crash between writing retired.json and deleting does not double count."""
+        settings.METRICS_DIR = str(tmp_path)
+        pid = _dead_pid()
+        _write_worker(tmp_path, pid, 0, 2)
+        assert _stats("bot-event-list")["count"] == 2
+        retired = json.loads((tmp_path / "retired.json").read_text())
+        assert retired["files"] == [f"metrics-{pid}-0.json"]
+
+        _write_worker(tmp_path, pid, 0, 2)  # as if the delete had not happened
+        assert _stats("bot-event-list")["count"] == 2
+        assert list(tmp_path.glob("metrics-*.json")) == []
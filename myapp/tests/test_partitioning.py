@@ -0,0 +1,218 @@
+"""
+Tests for the monthly partitioning helpers and manage_partitions.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from myapp.models import AttackType, BotEvent
+from myapp.partitioning import (
+    PARTITIONED_MODELS,
+    Partition,
+    PartitionManager,
+    add_months,
+    convert_sql,
+    create_partition_sql,
+    expired_partitions,
+    month_start,
+    orphaned_attacks_sql,
+)
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class TestPartitionHelpers:
+    """Test month arithmetic and generated SQL."""
+
+    def test_month_arithmetic(self):
+        assert month_start(_utc(2026, 10, 19, 6, 30)) == _utc(2026, 10, 1)
+        assert add_months(_utc(2026, 11, 1), 2) == _utc(2027, 1, 1)
+        assert add_months(_utc(2026, 1, 1), -1) == _utc(2025, 12, 1)
+
+    def test_create_partition_sql(self):
+        sql = create_partition_sql("myapp_botevent", _utc(2026, 12, 1))
+
+        assert '"myapp_botevent_p2026_12" PARTITION OF "myapp_botevent"' in sql
+        assert "FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')" in sql
+
+    def test_convert_sql_keeps_index_names(self):
+        indexes = [
+            (
+                "botevent_attack_method_idx",
+                "CREATE INDEX botevent_attack_method_idx ON public.myapp_botevent "
+                "USING btree (attack_attempted, method)",
+            )
+        ]
+        statements = convert_sql(
+            "myapp_botevent", indexes, "myapp_botevent_pkey", _utc(2026, 11, 1)
+        )
+
+        assert statements[0] == 'ALTER TABLE "myapp_botevent" RENAME TO "myapp_botevent_legacy"'
+        assert (
+            'ALTER INDEX "botevent_attack_method_idx" '
+            'RENAME TO "botevent_attack_method_idx_legacy"'
+        ) in statements
+        assert (
+            'CREATE INDEX botevent_attack_method_idx ON "myapp_botevent" '
+            "USING btree (attack_attempted, method)"
+        ) in statements
+        assert any("PRIMARY KEY (id, created_at)" in s for s in statements)
+        assert any(
+            "ATTACH PARTITION \"myapp_botevent_legacy\" FOR VALUES FROM (MINVALUE)" in s
+            for s in statements
+        )
+
+    def test_convert_sql_recreates_foreign_keys(self):
+        foreign_key = (
+            "myapp_botevent_data_payload_id_fk",
+            "FOREIGN KEY (data_payload_id) REFERENCES myapp_payload(digest) "
+            "DEFERRABLE INITIALLY DEFERRED",
+        )
+        statements = convert_sql(
+            "myapp_botevent", [], "myapp_botevent_pkey", _utc(2026, 11, 1), [foreign_key]
+        )
+
+        add = (
+            'ALTER TABLE "myapp_botevent" ADD CONSTRAINT "myapp_botevent_data_payload_id_fk" '
+            + foreign_key[1]
+        )
+        attach = next(i for i, s in enumerate(statements) if "ATTACH PARTITION" in s)
+        # On the parent before ATTACH, so the legacy table's constraint is reused
+        assert statements.index(add) < attach
+
+    def test_expired_partitions(self):
+        partitions = [
+            Partition("myapp_botevent_legacy", _utc(2026, 1, 1)),
+            Partition("myapp_botevent_p2026_01", _utc(2026, 2, 1)),
+            Partition("myapp_botevent_p2026_02", _utc(2026, 3, 1)),
+            Partition("myapp_botevent_default", None),
+        ]
+
+        expired = expired_partitions(partitions, _utc(2026, 2, 1))
+
+        assert [p.name for p in expired] == [
+            "myapp_botevent_legacy",
+            "myapp_botevent_p2026_01",
+        ]
+
+    def test_orphaned_attacks_sql(self):
+        events = [
+            Partition("myapp_botevent_legacy", _utc(2026, 1, 1)),
+            Partition("myapp_botevent_p2026_01", _utc(2026, 2, 1)),
+        ]
+        kept = [
+            Partition("myapp_attacktype_p2026_02", _utc(2026, 3, 1)),
+            Partition("myapp_attacktype_default", None),
+        ]
+
+        statements = orphaned_attacks_sql(events, kept)
+
+        assert statements == [
+            f'DELETE FROM "{partition.name}" WHERE "bot_event_id" IN '
+            '(SELECT id FROM "myapp_botevent_legacy" '
+            'UNION ALL SELECT id FROM "myapp_botevent_p2026_01")'
+            for partition in kept
+        ]
+        assert orphaned_attacks_sql([], kept) == []
+
+
+@pytest.mark.django_db
+class TestPartitionCommand:
+    """Test the command and the time filters that enable pruning."""
+
+    def test_requires_postgresql(self):
+        with pytest.raises(CommandError, match="PostgreSQL"):
+            call_command("manage_partitions", "--dry-run")
+
+    def test_created_range_filter(self, api_client):
+        old = BotEventFactory()
+        BotEvent.objects.filter(pk=old.pk).update(created_at=_utc(2020, 1, 1))
+        recent = BotEventFactory()
+
+        response = api_client.get(
+            "/api/bot-events/", {"created_after": "2021-01-01T00:00:00Z"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in response.data["results"]] == [str(recent.id)]
+
+
+class _Rollback(Exception):
+    pass
+
+
+@pytest.mark.postgresql
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Partitioning requires PostgreSQL"
+)
+@pytest.mark.django_db(transaction=True)
+class TestConvert:
+    """Test --convert on a real PostgreSQL schema (rolled back afterwards)."""
+
+    def test_convert_keeps_outgoing_foreign_keys(self):
+        manager = PartitionManager(connection)
+        botevent = BotEvent._meta.db_table
+        tables = [model._meta.db_table for model in PARTITIONED_MODELS]
+        before = {
+            table: {fk for _, fk in manager.foreign_keys_from(table, exclude=[botevent])}
+            for table in tables
+        }
+        assert before[botevent]  # payload and dimension keys
+        old = BotEventFactory()
+
+        with pytest.raises(_Rollback), transaction.atomic():
+            call_command("manage_partitions", "--convert", stdout=StringIO())
+
+            for table in tables:
+                assert manager.is_partitioned(table)
+                after = {fk for _, fk in manager.foreign_keys_from(table)}
+                assert after == before[table]
+                # New partitions inherit them from the parent
+                partition = next(
+                    p.name for p in manager.partitions(table) if p.name.endswith("_default")
+                )
+                assert len(manager.foreign_keys_from(partition)) == len(before[table])
+
+            assert BotEvent.objects.filter(pk=old.pk).exists()
+            BotEventFactory()
+            assert BotEvent.objects.count() == 2
+            raise _Rollback
+
+        assert not manager.is_partitioned(botevent)
+
+    def test_expiring_events_take_later_attacks_along(self):
+        current = month_start(timezone.now())
+        later = add_months(current, 2)
+        old = BotEventFactory()
+
+        with pytest.raises(_Rollback), transaction.atomic():
+            call_command("manage_partitions", "--convert", stdout=StringIO())
+            # Filed two months after its event, in a partition that is kept
+            straggler = AttackTypeFactory(bot_event=old)
+            AttackType.objects.filter(pk=straggler.pk).update(created_at=later)
+            recent = AttackTypeFactory()
+            BotEvent.objects.filter(pk=recent.bot_event_id).update(created_at=later)
+            AttackType.objects.filter(pk=recent.pk).update(created_at=later)
+
+            # Three months on, keeping one month expires the legacy and next partitions
+            with mock.patch(
+                "myapp.management.commands.manage_partitions.timezone.now",
+                return_value=add_months(current, 3),
+            ):
+                call_command(
+                    "manage_partitions", "--retain-months", "1", "--drop", stdout=StringIO()
+                )
+
+            assert not BotEvent.objects.filter(pk=old.pk).exists()
+            assert list(AttackType.objects.values_list("pk", flat=True)) == [recent.pk]
+            raise _Rollback
@@ -0,0 +1,161 @@
+"""
+Tests for the content-addressed payload store.
+"""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from myapp import payloads
+from myapp.models import AttackType, BotEvent, Payload
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+XSS = "<script>alert('XSS')</script>"
+
+
+@pytest.mark.django_db
+class TestPayloadStore:
+    """Test ingest dedupes payloads and readers see the same JSON."""
+
+    def _post(self, api_client, honeypot_url, data):
+        api_client.post(honeypot_url, data, REMOTE_ADDR="10.0.0.1")
+        return BotEvent.objects.order_by("-created_at").first()
+
+    def test_ingest_dedupes(self, api_client, honeypot_url):
+        data = {"name": XSS, "message": XSS}
+        first = self._post(api_client, honeypot_url, data)
+        second = self._post(api_client, honeypot_url, data)
+
+        assert first.data_details is None
+        assert first.data_payload_id == second.data_payload_id
+        # One payload for the event data, one shared by every attack value
+        assert Payload.objects.count() == 2
+        attacks = AttackType.objects.all()
+        assert attacks.count() == 4
+        assert {a.full_value_payload_id for a in attacks} != {None}
+        assert {a.full_value for a in attacks} == {""}
+
+    def test_repeat_payload_costs_no_query(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            payloads.intern_values(["same"])
+
+        with CaptureQueriesContext(connection) as context:
+            payloads.intern_values(["same"])
+
+        assert len(context.captured_queries) == 0
+
+    def test_detail_output_matches_inline(self, api_client, honeypot_url):
+        data = {"name": "Jane", "message": XSS}
+        event = self._post(api_client, honeypot_url, data)
+        attack = AttackType.objects.get()
+
+        event_data = api_client.get(f"/api/bot-events/{event.id}/").data
+        attack_data = api_client.get(f"/api/attacks/{attack.id}/").data
+
+        assert event_data["data_details"] == {"name": ["Jane"], "message": [XSS]}
+        assert attack_data["full_value"] == XSS
+
+    def test_export_resolves_payloads(self, api_client, honeypot_url):
+        self._post(api_client, honeypot_url, {"message": XSS})
+
+        response = api_client.get("/api/attacks/export/")
+        row = json.loads(b"".join(response.streaming_content).decode().splitlines()[0])
+
+        assert row["full_value"] == XSS
+
+    @pytest.mark.parametrize("param", ["search", "bot_data"])
+    def test_search_submitted_data(self, api_client, honeypot_url, settings, param):
+        # The long message is stored compressed and matched after decompressing;
+        # the short one is matched in SQL on its stored bytes
+        settings.PAYLOAD_COMPRESSION_THRESHOLD = 64
+        self._post(api_client, honeypot_url, {"name": "uniquezzz", "message": "a" * 200})
+        self._post(api_client, honeypot_url, {"name": "shortzzz"})
+        legacy = BotEventFactory(data_details={"name": "inlinezzz"})
+
+        found = api_client.get("/api/bot-events/", {param: "UNIQUEZZZ"}).data
+        assert found["count"] == 1
+        event = BotEvent.objects.get(pk=found["results"][0]["id"])
+        assert event.data_payload.compressed
+        found = api_client.get("/api/bot-events/", {param: "ShortZZZ"}).data
+        assert found["count"] == 1
+        assert not BotEvent.objects.get(pk=found["results"][0]["id"]).data_payload.compressed
+        inline = api_client.get("/api/bot-events/", {param: "inlinezzz"}).data
+        assert [row["id"] for row in inline["results"]] == [str(legacy.id)]
+        assert api_client.get("/api/bot-events/", {param: "absentzzz"}).data["count"] == 0
+
+    def test_compression(self, settings):
+        settings.PAYLOAD_COMPRESSION_THRESHOLD = 64
+        value = "A" * 5000
+
+        (digest,) = payloads.intern_values([value])
+        payload = Payload.objects.get(pk=digest)
+
+        assert payload.compressed is True
+        assert payload.size == 5000
+        assert len(bytes(payload.content)) < 200
+        assert payloads.decode_content(payload.content, True, as_json=False) == value
+
+    def test_rolled_back_payload_is_not_cached(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                payloads.intern_values(["lost"])
+                raise RuntimeError
+
+        (digest,) = payloads.intern_values(["lost"])
+        assert Payload.objects.filter(pk=digest).exists()
+
+    def test_intern_command_converts_legacy_rows(self, api_client):
+        bot_event = BotEventFactory.create_spam_event()
+        attack = AttackTypeFactory(bot_event=bot_event)
+        before = api_client.get(f"/api/bot-events/{bot_event.id}/").data
+        attack_before = api_client.get(f"/api/attacks/{attack.id}/").data
+
+        call_command("intern_payloads", "--batch-size", "1", stdout=StringIO())
+
+        bot_event.refresh_from_db()
+        assert bot_event.data_details is None
+        assert bot_event.data_payload_id is not None
+        assert AttackType.objects.get().full_value == ""
+        assert api_client.get(f"/api/bot-events/{bot_event.id}/").data == before
+        assert api_client.get(f"/api/attacks/{attack.id}/").data == attack_before
+
+    def test_prune(self):
+        payloads.intern_values(["orphan"])
+
+        call_command("intern_payloads", "--prune", stdout=StringIO())
+
+        assert not Payload.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ingest_after_prune_of_cached_payload(self, api_client, honeypot_url):
+        data = {"message": XSS}
+        self._post(api_client, honeypot_url, data)
+        AttackType.objects.all().delete()  # e.g. archive_events
+        BotEvent.objects.all().delete()
+        call_command("intern_payloads", "--prune", stdout=StringIO())
+        assert not Payload.objects.exists()
+
+        # This worker still has the digests cached
+        event = self._post(api_client, honeypot_url, data)
+
+        assert event is not None
+        assert payloads.resolve_payload(event, "data_details") == {"message": [XSS]}
+        assert AttackType.objects.filter(full_value_payload__isnull=False).exists()
+
+
+    def test_detail_joins_payload(self, api_client, honeypot_url):
+        """Test the detail view joins the payload in one query."""
+        event = self._post(api_client, honeypot_url, {"message": "hi"})
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(
+                f"/api/bot-events/{event.id}/", {"fields": "id,data_details"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(context.captured_queries) == 1
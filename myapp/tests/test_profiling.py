@@ -0,0 +1,116 @@
+"""
+Tests for on-demand request profiling by staff users.
+"""
+
+import json
+import pstats
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+
+from myapp import profiling
+from myapp.tests.factories import BotEventFactory
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.PROFILE_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def staff_client(api_client):
+    api_client.force_authenticate(User.objects.create(username="staff", is_staff=True))
+    return api_client
+
+
+class TestProfiling:
+    """Test profiling a request and reading the stored profile back."""
+
+    def test_bot_events(self, staff_client, profile_dir):
+        BotEventFactory.create_batch(3)
+        response = staff_client.get(
+            reverse("bot-event-list"), {"_profile": "1", "method": "GET"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        profile_id = response["X-Profile-Id"]
+
+        report = staff_client.get(reverse("profile-detail", args=[profile_id]))
+        assert report.status_code == status.HTTP_200_OK
+        data = json.loads(b"".join(report.streaming_content))
+        assert data["path"] == reverse("bot-event-list")
+        assert data["query"] == {"method": ["GET"]}
+        assert data["user"] == "staff"
+        assert data["sql_count"] == len(data["sql"]) > 0
+        assert any(entry.get("explain") for entry in data["sql"])
+        assert data["functions"][0]["cumulative_ms"] > 0
+
+        download = staff_client.get(reverse("profile-download", args=[profile_id]))
+        assert download.status_code == status.HTTP_200_OK
+        path = profile_dir / "downloaded.prof"
+        path.write_bytes(b"".join(download.streaming_content))
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    def test_header_and_cache_bypass(self, staff_client, profile_dir, settings):
+        settings.RESPONSE_CACHE_ENABLED = True
+        BotEventFactory.create_batch(2)
+        url = reverse("aggregate-ip-list")
+        staff_client.get(url)  # cached
+
+        response = staff_client.get(url, HTTP_X_PROFILE="1")
+        assert "X-Profile-Id" in response
+        report = json.loads((profile_dir / f"{response['X-Profile-Id']}.json").read_text())
+        assert report["sql_count"] > 0
+
+    def test_not_requested(self, staff_client, profile_dir):
+        response = staff_client.get(reverse("bot-event-list"))
+        assert "X-Profile-Id" not in response
+        assert list(profile_dir.iterdir()) == []
+
+    def test_staff_only(self, api_client, profile_dir):
+        response = api_client.get(reverse("aggregate-ip-list"), {"_profile": "1"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        api_client.force_authenticate(User.objects.create(username="user"))
+        response = api_client.get(reverse("aggregate-ip-list"), {"_profile": "1"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert list(profile_dir.iterdir()) == []
+
+    def test_rate_limit(self, staff_client, profile_dir, settings):
+        settings.PROFILE_RATE_LIMIT = 2
+        url = reverse("aggregate-ip-list")
+        codes = [staff_client.get(url, {"_profile": "1"}).status_code for _ in range(3)]
+        assert codes == [200, 200, 429]
+        assert staff_client.get(url).status_code == status.HTTP_200_OK
+
+    def test_keep(self, staff_client, profile_dir, settings):
+        settings.PROFILE_KEEP = 2
+        for _ in range(3):
+            staff_client.get(reverse("aggregate-ip-list"), {"_profile": "1"})
+        assert len(list(profile_dir.glob("*.json"))) == 2
+        assert len(list(profile_dir.glob("*.prof"))) == 2
+
+
+class TestProfileView:
+    """Test access to stored profiles."""
+
+    def test_unknown(self, staff_client, profile_dir):
+        assert staff_client.get(
+            reverse("profile-detail", args=["0" * 32])
+        ).status_code == status.HTTP_404_NOT_FOUND
+        assert staff_client.get(
+            reverse("profile-detail", args=["..%2Fsettings"])
+        ).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_staff_only(self, api_client, staff_client, profile_dir):
+        profile_id = staff_client.get(
+            reverse("aggregate-ip-list"), {"_profile": "1"}
+        )["X-Profile-Id"]
+        api_client.force_authenticate(User.objects.create(username="user"))
+        response = api_client.get(reverse("profile-detail", args=[profile_id]))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stored_file(self, profile_dir):
+        assert profiling.stored_file("../../etc/passwd", ".json") is None
@@ -0,0 +1,166 @@
+"""
+Tests for per-route SQL query budgets: every route in myapp/urls.py and the
+router has an explicit budget for its list/retrieve requests.
+"""
+
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework import status
+
+from myapp import distinct, sketches
+from myapp.correlation import issue_token
+from myapp.models import AttackType, BotEvent, CorrelationSession
+
+EVENTS = 6
+
+# (route name, query params, budget). Lists are checked with several rows
+# on the page, so an N+1 shows up as going over budget.
+BUDGETS = [
+    ("api-root", {}, 0),
+    ("snapshot", {}, 7),
+    ("top", {}, 6),  # two per dimension
+    ("top", {"dimension": "path"}, 2),
+    ("uniques", {}, 3),
+    ("aggregate-path-list", {}, 2),
+    ("aggregate-path-list", {"search": "contact", "ordering": "-attack_count"}, 1),
+    ("aggregate-subnet-list", {}, 2),
+    ("aggregate-subnet-list", {"prefix": "16", "ip_version": "4"}, 2),
+    ("agent-list", {}, 1),
+    ("agent-list", {"automation_tool": "true"}, 1),
+    ("bot-event-list", {}, 2),
+    ("bot-event-list", {"fields": "id,agent_family,attack_categories"}, 2),
+    # +1: compressed payloads are matched in Python (payloads.matching_payloads)
+    ("bot-event-list", {"event_category": "attack", "search": "script"}, 3),
+    ("bot-event-list", {"cidr": "198.51.100.0/24", "ordering": "-attack_count"}, 2),
+    ("bot-event-detail", {}, 1),
+    ("bot-event-export", {}, 1),
+    ("aggregate-ip-list", {}, 2),
+    ("aggregate-ip-list", {"search": "198.51", "ordering": "-attack_count"}, 2),
+    ("aggregate-ip-detail", {}, 1),
+    ("aggregate-ip-timeline", {}, 2),
+    ("attack-list", {}, 2),
+    ("attack-list", {"category": "xss", "fields": "id,ip_address,request_path"}, 2),
+    ("attack-detail", {}, 1),
+    ("attack-export", {}, 1),
+    ("session-list", {}, 2),
+    ("session-detail", {}, 1),
+    ("profile-detail", {}, 0),
+    ("profile-download", {}, 0),
+]
+
+# GET / POST with an attack payload on a honeypot path, periodic sketch
+# flushes excluded. GET: payload, event, attacks; POST adds the session upsert.
+# Event and attacks share a transaction: SAVEPOINT/RELEASE inside the test's
+HONEYPOT_BUDGETS = [("GET", 5), ("POST", 9)]
+
+
+def _route_names():
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            else:
+                yield pattern.name
+
+    return set(walk(get_resolver("myapp.urls").url_patterns))
+
+
+def _seed(client):
+    """Events through the real ingest path: form GETs, then attack POSTs."""
+    for number in range(EVENTS):
+        ip = f"198.51.100.{number % 3 + 1}"
+        client.get(reverse("honeypot"), REMOTE_ADDR=ip)
+        _, ctoken = issue_token()
+        client.post(
+            reverse("honeypot"),
+            {"ctoken": ctoken, "message": "<script>alert(1)</script>' OR 1=1 --"},
+            REMOTE_ADDR=ip,
+        )
+    sketches.flush()
+    distinct.flush()
+
+
+def _kwargs(name):
+    if name == "bot-event-detail":
+        return {"pk": BotEvent.objects.filter(attack_attempted=True).first().pk}
+    if name in ("aggregate-ip-detail", "aggregate-ip-timeline"):
+        return {"ip_address": "198.51.100.1"}
+    if name == "attack-detail":
+        return {"pk": AttackType.objects.first().pk}
+    if name == "session-detail":
+        return {"pk": CorrelationSession.objects.first().pk}
+    if name in ("profile-detail", "profile-download"):
+        return {"profile_id": next(Path(settings.PROFILE_DIR).glob("*.json")).stem}
+    return {}
+
+
+class TestCoverage:
+    """Test new routes cannot be added without a budget."""
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {name for name, _, _ in BUDGETS} | {"honeypot"}
+        assert _route_names() - budgeted == set()
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Test each route stays within its query budget."""
+
+    @pytest.fixture
+    def seeded(self, api_client, settings, tmp_path, django_capture_on_commit_callbacks):
+        settings.RESPONSE_CACHE_ENABLED = False
+        settings.PROFILE_DIR = tmp_path
+        # Commit the seed so the worker's key caches are warm, as in production
+        with django_capture_on_commit_callbacks(execute=True):
+            _seed(api_client)
+        distinct.seeded()  # Cached by any worker after its first count
+        # The router's API root and stored profiles need a (staff) login
+        api_client.force_authenticate(User(username="budget", is_staff=True))
+        api_client.get(reverse("bot-event-list"), {"_profile": "1"})
+        assert CorrelationSession.objects.count() == EVENTS
+        return api_client
+
+    @pytest.mark.parametrize(
+        "name, params, budget",
+        BUDGETS,
+        ids=[f"{name}{'?' + '&'.join(params) if params else ''}" for name, params, _ in BUDGETS],
+    )
+    def test_route(self, seeded, assert_query_budget, name, params, budget):
+        url = reverse(name, kwargs=_kwargs(name))
+        with assert_query_budget(budget, label=f"GET {url} {params}"):
+            response = seeded.get(url, params)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.parametrize("method, budget", HONEYPOT_BUDGETS)
+    def test_honeypot(self, seeded, settings, assert_query_budget, method, budget):
+        settings.HEAVY_HITTER_FLUSH_INTERVAL = settings.DISTINCT_COUNTER_FLUSH_INTERVAL = 3600
+        request = seeded.get if method == "GET" else seeded.post
+        _, ctoken = issue_token()
+        with assert_query_budget(budget, label=f"{method} honeypot"):
+            request(reverse("honeypot"), {"ctoken": ctoken, "q": "{{7*7}}"})
+
+
+@pytest.mark.django_db
+class TestAdminQueryBudgets:
+    """Test the admin changelists stay within budget."""
+
+    @pytest.mark.parametrize(
+        "url, budget",
+        [
+            ("/admin/myapp/botevent/", 6),
+            ("/admin/myapp/attacktype/", 7),
+            ("/admin/myapp/correlationsession/", 6),
+        ],
+    )
+    def test_changelist(self, api_client, client, assert_query_budget, url, budget):
+        _seed(api_client)
+        client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pass"))
+        with assert_query_budget(budget, label=f"GET {url}"):
+            response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,42 @@
+"""
+Tests for the fast-path list serialization (RowSerializer).
+"""
+
+import pytest
+
+from myapp.models import AttackType
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+@pytest.mark.django_db
+class TestRowSerializers:
+    """Test fast-path list output is byte-for-byte identical to the DRF serializers."""
+
+    @pytest.fixture
+    def events(self):
+        BotEventFactory.create_scan_event(ip_address=None, agent=None, geo_location=None)
+        BotEventFactory.create_spam_event()
+        bot_event = BotEventFactory()
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.XSS)
+        AttackTypeFactory(bot_event=bot_event, category=AttackType.AttackCategory.SQLI)
+
+    @pytest.mark.parametrize(
+        "url,params",
+        [
+            ("/api/bot-events/", {}),
+            ("/api/bot-events/", {"ordering": "attack_count", "page_size": 2}),
+            ("/api/bot-events/", {"attack_categories": "XSS"}),
+            ("/api/attacks/", {}),
+            ("/api/attacks/", {"search": "XSS"}),
+        ],
+    )
+    def test_fast_path_matches_model_serializer(
+        self, api_client, settings, events, url, params
+    ):
+        settings.FAST_LIST_SERIALIZATION = False
+        expected = api_client.get(url, params).content
+
+        settings.FAST_LIST_SERIALIZATION = True
+        actual = api_client.get(url, params).content
+
+        assert actual == expected
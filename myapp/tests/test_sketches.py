@@ -0,0 +1,187 @@
+"""
+Tests for the heavy-hitter sketches and /api/top/.
+"""
+
+import random
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from rest_framework import status
+
+from myapp import sketches
+from myapp.models import HeavyHitter
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+@pytest.fixture(autouse=True)
+def fresh_sketches(settings):
+    settings.HEAVY_HITTER_FLUSH_INTERVAL = 0
+    sketches.reset()
+    yield
+    sketches.reset()
+
+
+def _assert_bounds(summary, truth):
+    for item, (count, error) in summary.counters.items():
+        assert count - error <= truth[item] <= count
+    floor = summary.floor
+    for item, true_count in truth.items():
+        if item not in summary.counters:
+            assert true_count <= floor
+
+
+class TestSpaceSaving:
+    """Test the Space-Saving summary keeps its error bounds."""
+
+    def _stream(self, seed, size=5000):
+        rng = random.Random(seed)
+        # Zipf-ish: a few heavy items and a long tail
+        return [f"item-{int(rng.paretovariate(1.2))}" for _ in range(size)]
+
+    def test_bounds_hold(self):
+        stream = self._stream(1)
+        summary = sketches.SpaceSaving(20)
+        for item in stream:
+            summary.offer(item)
+
+        _assert_bounds(summary, Counter(stream))
+        assert sum(count for count, _ in summary.counters.values()) == len(stream)
+
+    def test_merge_keeps_bounds_and_finds_heavy_hitters(self):
+        left, right = self._stream(2), self._stream(3)
+        merged = sketches.SpaceSaving(20)
+        for stream in (left, right):
+            summary = sketches.SpaceSaving(20)
+            for item in stream:
+                summary.offer(item)
+            merged.merge(summary)
+
+        truth = Counter(left) + Counter(right)
+        _assert_bounds(merged, truth)
+        assert [item for item, _, _ in merged.top(3)] == [
+            item for item, _ in truth.most_common(3)
+        ]
+
+    def test_merge_counts_items_missing_from_the_other_side(self):
+        left, right = sketches.SpaceSaving(3), sketches.SpaceSaving(2)
+        for item in "aab":
+            left.offer(item)
+        for item in "accdd":
+            right.offer(item)
+
+        left.merge(right)
+
+        count, error = left.counters["a"]
+        assert count - error <= 3 <= count
+        _assert_bounds(left, Counter("aab") + Counter("accdd"))
+
+    def test_merge_of_full_summaries_keeps_bounds(self):
+        left, right = self._stream(4), self._stream(5)
+        merged = sketches.SpaceSaving(10)
+        other = sketches.SpaceSaving(10)
+        for item in left:
+            merged.offer(item)
+        for item in right:
+            other.offer(item)
+        assert len(merged) == len(other) == 10
+
+        merged.merge(other)
+
+        assert len(merged) == 10
+        _assert_bounds(merged, Counter(left) + Counter(right))
+
+class TestTopEndpoint:
+    """Test ingest feeds the sketch table and /api/top/ reads it."""
+
+    def test_ingest_updates_top(self, api_client, honeypot_url, xss_submission_data):
+        for _ in range(3):
+            api_client.get(honeypot_url, REMOTE_ADDR="10.0.0.1")
+        api_client.post(honeypot_url, xss_submission_data, REMOTE_ADDR="10.0.0.2")
+
+        response = api_client.get("/api/top/")
+
+        assert response.status_code == status.HTTP_200_OK
+        ips = response.data["ip"]["items"]
+        assert [(i["item"], i["count"]) for i in ips] == [("10.0.0.1", 3), ("10.0.0.2", 1)]
+        assert ips[0]["guaranteed"] is True
+        assert response.data["path"]["items"][0] == {
+            "item": honeypot_url,
+            "count": 4,
+            "error": 0,
+            "min_count": 4,
+            "guaranteed": True,
+        }
+        assert response.data["category"]["items"][0]["item"] == "XSS"
+
+    def test_table_is_bounded(self, settings):
+        settings.HEAVY_HITTER_CAPACITY = 5
+        sketches.reset()
+        for i in range(20):
+            sketches.record_event(f"10.0.0.{i % 8}", "/x/")
+            sketches.flush()
+
+        assert HeavyHitter.objects.filter(dimension="ip").count() == 5
+        result = sketches.top("ip", 3)
+        assert result["max_error"] > 0
+        truth = Counter(f"10.0.0.{i % 8}" for i in range(20))
+        for item in result["items"]:
+            assert item["min_count"] <= truth[item["item"]] <= item["count"]
+
+    def test_dimension_and_limit(self, api_client):
+        for ip in ["10.0.0.1", "10.0.0.1", "10.0.0.2"]:
+            sketches.record_event(ip, "/x/")
+        sketches.flush()
+
+        response = api_client.get("/api/top/", {"dimension": "ip", "limit": 1})
+
+        assert list(response.data) == ["ip"]
+        assert [i["item"] for i in response.data["ip"]["items"]] == ["10.0.0.1"]
+
+    def test_flushed_after_request_not_during(self, api_client, honeypot_url, monkeypatch):
+        merged = []
+        monkeypatch.setattr(
+            sketches, "_merge_into_table", lambda dimension, sketch: merged.append(dimension)
+        )
+        sketches.record_event("10.0.0.1", "/x/")
+        assert merged == []
+
+        api_client.get(honeypot_url)
+        assert set(merged) == {"ip", "path"}
+
+    def test_pending_counts_flushed_at_exit(self, settings):
+        settings.HEAVY_HITTER_FLUSH_INTERVAL = 3600
+        with mock.patch("atexit.register") as register:
+            apps.get_app_config("myapp").ready()
+        exit_hooks = [call.args[0] for call in register.call_args_list]
+        assert sketches.flush in exit_hooks
+
+        sketches.flush()  # starts the interval
+        sketches.record_event("10.0.0.1", "/x/")
+        sketches.flush_after_request()
+        assert not HeavyHitter.objects.exists()
+
+        for hook in exit_hooks:
+            hook()
+        assert HeavyHitter.objects.get(dimension="ip").item == "10.0.0.1"
+
+    def test_unknown_dimension(self, api_client):
+        response = api_client.get("/api/top/", {"dimension": "referer"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rebuild_command(self):
+        for _ in range(2):
+            BotEventFactory(ip_address="10.0.0.9", request_path="/wp-login.php")
+        AttackTypeFactory(category="SQLI")
+        sketches.record_event("10.0.0.1", "/stale/")
+
+        call_command("rebuild_heavy_hitters", stdout=StringIO())
+
+        top_ip = sketches.top("ip", 1)["items"][0]
+        assert (top_ip["item"], top_ip["count"], top_ip["error"]) == ("10.0.0.9", 2, 0)
+        assert not HeavyHitter.objects.filter(item="/stale/").exists()
+        assert sketches.top("category", 5)["items"][0]["item"] == "SQLI"
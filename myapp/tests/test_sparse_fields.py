@@ -0,0 +1,90 @@
+"""
+Tests for sparse fieldsets (?fields= / ?omit=) and column projection.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+def _sql(api_client, url, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url, params or {})
+    return response, " ".join(query["sql"] for query in context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """Test requested fields drive both the output and the SQL."""
+
+    @pytest.fixture(autouse=True)
+    def bot_event(self):
+        bot_event = BotEventFactory.create_spam_event(ip_address="10.0.0.1")
+        AttackTypeFactory(bot_event=bot_event)
+        return bot_event
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_bot_event_list_fields(self, api_client, settings, fast):
+        """Test ?fields= limits output keys and skips the attacks join."""
+        settings.FAST_LIST_SERIALIZATION = fast
+        response, sql = _sql(api_client, "/api/bot-events/", {"fields": "id,method"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data["results"][0]) == {"id", "method"}
+        assert "myapp_attacktype" not in sql
+        assert "data_details" not in sql
+
+    def test_bot_event_list_never_loads_payload(self, api_client, settings):
+        """Test the default list does not select data_details."""
+        settings.FAST_LIST_SERIALIZATION = False
+        response, sql = _sql(api_client, "/api/bot-events/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "data_details" not in sql
+
+    def test_attack_list_omit(self, api_client):
+        """Test ?omit= drops fields and the bot_event join they need."""
+        response, sql = _sql(
+            api_client,
+            "/api/attacks/",
+            {"omit": "bot_event_id,ip_address,request_path"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "ip_address" not in response.data["results"][0]
+        assert "myapp_botevent" not in sql
+
+    def test_bot_event_detail_fields(self, api_client, bot_event):
+        """Test ?fields= on retrieve."""
+        response = api_client.get(
+            f"/api/bot-events/{bot_event.id}/", {"fields": "id,data_details"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {"id", "data_details"}
+
+    def test_aggregate_ip_fields_skip_subqueries(self, api_client):
+        """Test unrequested IP annotations (and their subqueries) are skipped."""
+        response, sql = _sql(
+            api_client,
+            "/api/aggregate-ips/",
+            {"fields": "ip_address,traffic_count", "ordering": "traffic_count"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0] == {"ip_address": "10.0.0.1", "traffic_count": 1}
+        assert "GROUP_CONCAT" not in sql
+        assert "agent" not in sql
+
+    def test_snapshot_fields(self, api_client):
+        """Test the snapshot only computes requested figures."""
+        response = api_client.get("/api/snapshot/", {"fields": "total_events"})
+        assert response.data == {"total_events": 1}
+
+    def test_unknown_field_is_rejected(self, api_client):
+        """Test unknown field names return 400."""
+        response = api_client.get("/api/bot-events/", {"fields": "id,nope"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "nope" in str(response.data["fields"])
@@ -0,0 +1,123 @@
+"""
+Tests for integer IP keys, the cidr filter and /api/aggregate-subnets/.
+"""
+
+import importlib
+
+import pytest
+from django.apps import apps
+from django.urls import reverse
+from rest_framework import status
+
+from myapp.models import BotEvent
+from myapp.subnets import format_subnet, ip_key, network_range, subnet_mask
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+
+class TestKeys:
+    """Test the integer encoding keeps address order and masks to subnets."""
+
+    def test_order_preserved(self):
+        addresses = ["::1", "2001:db8::1", "2001:db8:1::1", "fe80::1", "ff02::1"]
+        keys = [ip_key(address)[1] for address in addresses]
+        assert keys == sorted(keys)
+
+    def test_ipv4_mapped_is_ipv4(self):
+        assert ip_key("::ffff:192.0.2.1") == ip_key("192.0.2.1") == (4, 3221225985)
+
+    def test_invalid(self):
+        assert ip_key("not-an-ip") == (None, None)
+
+    @pytest.mark.parametrize(
+        "address, prefix, subnet",
+        [
+            ("10.1.2.3", 24, "10.1.2.0/24"),
+            ("10.1.2.3", 20, "10.1.0.0/20"),
+            ("10.1.2.3", 0, "0.0.0.0/0"),
+            ("2001:db8:abcd:12::1", 48, "2001:db8:abcd::/48"),
+            ("fe80::1", 10, "fe80::/10"),
+        ],
+    )
+    def test_subnet(self, address, prefix, subnet):
+        version, key = ip_key(address)
+        assert format_subnet(version, key & subnet_mask(version, prefix), prefix) == subnet
+
+    def test_network_range(self):
+        assert network_range("10.0.0.0/8") == (4, 167772160, 184549375)
+        with pytest.raises(ValueError):
+            network_range("2001:db8::/96")
+
+
+@pytest.mark.django_db
+class TestCidrFilter:
+    """Test ?cidr= on the event and IP endpoints."""
+
+    def test_bot_events(self, api_client):
+        BotEventFactory(ip_address="198.51.100.7")
+        BotEventFactory(ip_address="198.51.101.7")
+        BotEventFactory(ip_address="2001:db8::7")
+
+        response = api_client.get(reverse("bot-event-list"), {"cidr": "198.51.100.0/24"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["ip_address"] for row in response.data["results"]] == ["198.51.100.7"]
+
+        response = api_client.get(reverse("bot-event-list"), {"cidr": "2001:db8::/32"})
+        assert [row["ip_address"] for row in response.data["results"]] == ["2001:db8::7"]
+
+    def test_aggregate_ips(self, api_client):
+        BotEventFactory.create_batch(2, ip_address="203.0.113.5")
+        BotEventFactory(ip_address="192.0.2.5")
+
+        response = api_client.get(reverse("aggregate-ip-list"), {"cidr": "203.0.113.0/24"})
+        assert [row["ip_address"] for row in response.data["results"]] == ["203.0.113.5"]
+
+    def test_invalid_cidr(self, api_client):
+        response = api_client.get(reverse("bot-event-list"), {"cidr": "300.0.0.0/8"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "cidr" in response.data
+
+
+@pytest.mark.django_db
+class TestAggregateSubnets:
+    """Test /api/aggregate-subnets/."""
+
+    def test_grouped_by_prefix(self, api_client):
+        BotEventFactory.create_batch(2, ip_address="198.51.100.1")
+        BotEventFactory(ip_address="198.51.100.200")
+        AttackTypeFactory(bot_event=BotEventFactory(ip_address="198.51.103.9"))
+        BotEventFactory(ip_address="2001:db8:abcd:1::1")
+
+        response = api_client.get(reverse("aggregate-subnet-list"))
+        assert response.status_code == status.HTTP_200_OK
+        rows = {row["subnet"]: row for row in response.data["results"]}
+        assert set(rows) == {"198.51.100.0/24", "198.51.103.0/24", "2001:db8:abcd::/48"}
+        assert rows["198.51.100.0/24"]["traffic_count"] == 3
+        assert rows["198.51.100.0/24"]["ip_count"] == 2
+        assert rows["198.51.103.0/24"]["attack_count"] == 1
+
+        response = api_client.get(
+            reverse("aggregate-subnet-list"), {"prefix": "16", "ip_version": "4"}
+        )
+        assert [(row["subnet"], row["traffic_count"]) for row in response.data["results"]] == [
+            ("198.51.0.0/16", 4)
+        ]
+
+    def test_invalid_prefix(self, api_client):
+        response = api_client.get(reverse("aggregate-subnet-list"), {"prefix6": "96"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "prefix6" in response.data
+
+
+@pytest.mark.django_db
+class TestBackfill:
+    """Test the data migration keys events written before ip_int existed."""
+
+    def test_backfill(self):
+        event = BotEventFactory(ip_address="192.0.2.44")
+        BotEvent.objects.update(ip_version=None, ip_int=None)
+
+        migration = importlib.import_module("myapp.migrations.0011_backfill_ip_int")
+        migration.backfill(apps, None)
+
+        event.refresh_from_db()
+        assert (event.ip_version, event.ip_int) == ip_key("192.0.2.44")
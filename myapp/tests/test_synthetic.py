@@ -0,0 +1,91 @@
+"""
+Tests for the fast synthetic data generator.
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from myapp import synthetic
+from myapp.models import AttackType, BotEvent, HeavyHitter
+from myapp.payloads import resolve_payload
+from myapp.utils import extract_attacks
+
+
+@pytest.mark.django_db
+class TestFastGenerator:
+    """Test --fast writes realistic rows in bulk."""
+
+    def test_command(self):
+        out = StringIO()
+        call_command("generate_fake_bot_data", bots=500, fast=True, seed=7, stdout=out)
+
+        assert "Inserted 500 events" in out.getvalue()
+        assert BotEvent.objects.count() == 500
+        categories = set(BotEvent.objects.values_list("event_category", flat=True))
+        assert categories == {"scan", "spam", "attack"}
+        # Sketches are reseeded from the inserted rows
+        assert HeavyHitter.objects.exists()
+
+    def test_rows_match_ingest(self):
+        synthetic.generate(200, seed=1, batch_size=50)
+
+        attacked = BotEvent.objects.filter(attack_attempted=True).select_related(
+            "data_payload"
+        )
+        event = attacked.first()
+        [(field, value)] = resolve_payload(event, "data_details").items()
+        detected = {pattern for pattern, _, _ in extract_attacks(value)}
+        assert set(event.attacks.values_list("pattern", flat=True)) == detected
+        assert all(a.target_field == field for a in event.attacks.all())
+
+        assert not BotEvent.objects.filter(request_path_ref__isnull=True).exists()
+        assert not BotEvent.objects.filter(request_path__isnull=False).exists()
+        assert not BotEvent.objects.filter(ip_int__isnull=True).exists()
+        assert not AttackType.objects.filter(full_value_payload__isnull=True).exists()
+
+    def test_timestamps_kept(self):
+        now = timezone.now()
+        synthetic.generate(50, seed=3, days=10, now=now)
+        oldest = BotEvent.objects.order_by("created_at").first().created_at
+        assert now - timedelta(days=10) <= oldest < now - timedelta(days=1)
+
+    def test_reproducible(self):
+        now = timezone.now()
+        synthetic.generate(100, seed=5, now=now)
+        columns = ("id", "ip_address", "request_path_ref__value", "created_at")
+        first = list(BotEvent.objects.order_by("id").values_list(*columns))
+        AttackType.objects.all().delete()
+        BotEvent.objects.all().delete()
+        synthetic.generate(100, seed=5, now=now)
+        second = list(BotEvent.objects.order_by("id").values_list(*columns))
+        assert first == second
+
+    def test_heavy_tailed_ips(self):
+        synthetic.generate(2000, seed=9)
+        counts = sorted(
+            BotEvent.objects.values("ip_address")
+            .annotate(n=Count("id"))
+            .values_list("n", flat=True),
+            reverse=True,
+        )
+        # The busiest address sends far more than the median one
+        assert counts[0] >= 20 * counts[len(counts) // 2]
+
+    def test_batched_inserts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            synthetic.generate(1000, seed=2, batch_size=1000)
+        inserts = [
+            query
+            for query in ctx.captured_queries
+            if 'INSERT INTO "myapp_botevent"' in query["sql"]
+        ]
+        # One statement for the whole batch (executemany logs as "N times: ...")
+        assert len(inserts) == 1
+        assert inserts[0]["sql"].startswith("1000 times")
@@ -0,0 +1,149 @@
+"""
+Tests for the keyset-paginated per-IP timeline.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+
+from myapp.models import BotEvent
+from myapp.pagination import TimelineKeysetPagination
+from myapp.tests.factories import AttackTypeFactory, BotEventFactory
+
+URL = "/api/aggregate-ips/10.0.0.1/timeline/"
+
+
+@pytest.mark.django_db
+class TestIPTimeline:
+    """Test the /api/aggregate-ips/{ip}/timeline/ action."""
+
+    @pytest.fixture(autouse=True)
+    def events(self):
+        start = timezone.now() - timedelta(hours=1)
+        paths = ["/login/", "/login/", "/admin/", "/contact/", "/contact/"]
+        events = []
+        for offset, path in enumerate(paths):
+            bot_event = BotEventFactory.create_scan_event(
+                ip_address="10.0.0.1", request_path=path
+            )
+            # created_at is auto_now_add; space events 10s apart
+            BotEvent.objects.filter(pk=bot_event.pk).update(
+                created_at=start + timedelta(seconds=10 * offset)
+            )
+            events.append(bot_event)
+        BotEventFactory(ip_address="10.0.0.2")
+        attacked = events[2]
+        BotEvent.objects.filter(pk=attacked.pk).update(attack_attempted=True)
+        AttackTypeFactory(bot_event=attacked, category="XSS")
+        AttackTypeFactory(bot_event=attacked, category="SQLI")
+        return events
+
+    def test_newest_first_with_gaps(self, api_client, events):
+        """Test events are newest first with gaps to the previous event."""
+        response = api_client.get(URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [r["id"] for r in results] == [str(e.id) for e in reversed(events)]
+        assert [r["gap_seconds"] for r in results] == [10.0, 10.0, 10.0, 10.0, None]
+        assert response.data["next"] is None
+        assert response.data["previous"] is None
+
+    def test_attack_categories_and_path_sequence(self, api_client):
+        """Test attack categories per event and the compressed path sequence."""
+        response = api_client.get(URL)
+
+        admin = next(r for r in response.data["results"] if r["request_path"] == "/admin/")
+        assert admin["attack_categories"] == ["SQLI", "XSS"]
+        assert response.data["path_sequence"] == [
+            {"request_path": "/contact/", "count": 2},
+            {"request_path": "/admin/", "count": 1},
+            {"request_path": "/login/", "count": 2},
+        ]
+
+    def test_keyset_pages_walk_whole_timeline(self, api_client, events):
+        """Test following next/previous cursors covers every event once."""
+        first = api_client.get(URL, {"page_size": 2}).data
+        assert first["next"] is not None
+        # Gap of the last row on a page uses the first row of the next page
+        assert first["results"][-1]["gap_seconds"] == 10.0
+
+        seen = [r["id"] for r in first["results"]]
+        page = first
+        while page["next"]:
+            page = api_client.get(page["next"]).data
+            seen += [r["id"] for r in page["results"]]
+        assert seen == [str(e.id) for e in reversed(events)]
+
+        back = api_client.get(page["previous"]).data
+        assert [r["id"] for r in back["results"]] == seen[-3:-1]
+        assert back["results"][-1]["gap_seconds"] == 10.0
+
+    def test_iso_datetime_cursor(self, api_client, events):
+        """Test a plain ISO datetime is accepted as a before cursor."""
+        cutoff = BotEvent.objects.get(pk=events[2].pk).created_at
+        response = api_client.get(URL, {"before": cutoff.isoformat()})
+
+        assert [r["id"] for r in response.data["results"]] == [
+            str(events[1].id),
+            str(events[0].id),
+        ]
+
+    def test_after_iso_cursor_predecessor(self, api_client, events):
+        """Test an ISO after cursor gaps to the real older event, not the cursor."""
+        cutoff = BotEvent.objects.get(pk=events[2].pk).created_at
+        response = api_client.get(URL, {"after": (cutoff + timedelta(seconds=5)).isoformat()})
+
+        results = response.data["results"]
+        assert [r["id"] for r in results] == [str(events[4].id), str(events[3].id)]
+        assert [r["gap_seconds"] for r in results] == [10.0, 10.0]
+        assert response.data["next"] is not None
+
+    def test_after_oldest_has_no_next(self, api_client, events):
+        """Test an after page starting at the oldest event has no next link."""
+        oldest = BotEvent.objects.get(pk=events[0].pk)
+        response = api_client.get(
+            URL, {"after": (oldest.created_at - timedelta(seconds=1)).isoformat()}
+        )
+
+        results = response.data["results"]
+        assert len(results) == 5
+        assert results[-1]["gap_seconds"] is None
+        assert response.data["next"] is None
+
+    def test_invalid_cursor(self, api_client):
+        """Test a garbage cursor is a 400, not a 500."""
+        response = api_client.get(URL, {"before": "not-a-cursor"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_unknown_ip(self, api_client):
+        """Test an IP without events is a 404."""
+        response = api_client.get("/api/aggregate-ips/10.9.9.9/timeline/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_query_count_is_constant(self, api_client):
+        """Test a page costs one events query plus one attacks query."""
+        with CaptureQueriesContext(connection) as context:
+            api_client.get(URL, {"page_size": 2})
+
+        assert len(context.captured_queries) == 1
+        with CaptureQueriesContext(connection) as context:
+            api_client.get(URL)
+        assert len(context.captured_queries) == 2
+
+
+class TestTimelineCursor:
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        now = timezone.now()
+        pk = BotEvent().id
+        cursor = TimelineKeysetPagination.encode_cursor(now, pk)
+
+        assert TimelineKeysetPagination.decode_cursor(cursor) == (now, pk)
@@ -2,23 +2,43 @@ from django.urls import path, include
 
 from .views import (
     HoneypotView,
+    ProfileView,
     SnapShotView,
     AggregatePathList,
+    AgentAggregateList,
+    AggregateSubnetList,
+    TopView,
+    UniquesView,
 )
 from .routers import router
 from .fake_urls import FAKE_URLS
 
 urlpatterns = [
     path("api/snapshot/", SnapShotView.as_view(), name="snapshot"),
+    path("api/top/", TopView.as_view(), name="top"),
+    path("api/uniques/", UniquesView.as_view(), name="uniques"),
     # Aggregate analytics endpoints
     path(
         "api/aggregate-paths/",
         AggregatePathList.as_view(),
         name="aggregate-path-list",
     ),
+    path(
+        "api/aggregate-subnets/",
+        AggregateSubnetList.as_view(),
+        name="aggregate-subnet-list",
+    ),
+    path("api/agents/", AgentAggregateList.as_view(), name="agent-list"),
+    path("api/profiles/<str:profile_id>/", ProfileView.as_view(), name="profile-detail"),
+    path(
+        "api/profiles/<str:profile_id>/download/",
+        ProfileView.as_view(download=True),
+        name="profile-download",
+    ),
     *[path(url, HoneypotView.as_view(), name="honeypot") for url in FAKE_URLS],
     path("api/", include(router.urls)),
     # api/bot-events/
     # api/aggregate-ips/
     # api/attacks/
+    # api/sessions/
 ]
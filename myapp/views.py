@@ -2,75 +2,332 @@ from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import render
+from django.http import FileResponse
+from django.utils.dateparse import parse_date
 from uuid import uuid4
 from .filters import (
     BotEventFilter,
     AggregatePathFilter,
     AggregateIPFilter,
+    AgentFilter,
+    SubnetFilter,
     AttackTypeFilter,
+    CorrelationSessionFilter,
+    PayloadSearchFilter,
 )
-from .models import BotEvent, AttackType
-from .utils import (
-    extract_attacks,
-    extract_meta_data,
-    extract_email_from_payload,
+from .models import (
+    BotEvent,
+    AttackType,
+    CorrelationSession,
+    DistinctCounter,
+    RequestPath,
+    UserAgent,
 )
-from .pagination import StandardResultsSetPagination
+from .pagination import StandardResultsSetPagination, TimelineKeysetPagination
+from .caching import cache_response
+from .correlation import issue_token, parse_token, record_submission
+from .subnets import MAX_PREFIX, subnet_mask
+from . import decoys, distinct, honeypot, metrics, profiling, sketches
+from .profiling import ProfilingMixin
+from .exports import ExportMixin, BOT_EVENT_EXPORT_FIELDS, ATTACK_TYPE_EXPORT_FIELDS
 from .serializers import (
     BotEventListSerializer,
     BotEventDetailSerializer,
     PathAnalyticsSerializer,
+    AgentAnalyticsSerializer,
+    SubnetAnalyticsSerializer,
     IPAnalyticsListSerializer,
     IPAnalyticsDetailSerializer,
     AttackTypeDetailSerializer,
     AttackTypeListSerializer,
+    CorrelationSessionSerializer,
+    BotEventListRowSerializer,
+    AttackTypeListRowSerializer,
+    IPTimelineRowSerializer,
+    serializer_field_names,
+)
+from django.conf import settings
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from django.db.models import (
+    BigIntegerField,
+    Count,
+    Q,
+    Subquery,
+    OuterRef,
+    Max,
+    Case,
+    When,
+    F,
+    Value,
 )
-from django.db.models import Count, Q, Subquery, OuterRef, Max, Case, When, F, Value
 from .aggregates import ListAgg
 
 
-class SnapShotView(APIView):
+def _split_param(value):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: `?fields=a,b` renders only those fields, `?omit=c,d`
+    drops them. get_queryset() uses `field_requested()` / `annotation_needed()`
+    to skip columns, annotations and prefetches no rendered field needs.
+    """
+
+    # Output field -> ORM columns/annotations it reads (defaults to its own name)
+    field_sources = {}
+
+    def get_available_fields(self):
+        return serializer_field_names(self.get_serializer_class())
+
+    def get_requested_fields(self):
+        """Set of output fields to render, or None for all of them."""
+        if hasattr(self, "_requested_fields"):
+            return self._requested_fields
+
+        request = getattr(self, "request", None)
+        params = request.query_params if request is not None else {}
+        fields = _split_param(params.get("fields"))
+        omit = _split_param(params.get("omit"))
+
+        requested = None
+        if fields or omit:
+            available = self.get_available_fields()
+            unknown = (set(fields) | set(omit)) - set(available)
+            if unknown:
+                raise ValidationError(
+                    {"fields": [f"Unknown field(s): {', '.join(sorted(unknown))}"]}
+                )
+            requested = {name for name in (fields or available) if name not in omit}
+
+        self._requested_fields = requested
+        return requested
+
+    def field_requested(self, *names):
+        requested = self.get_requested_fields()
+        return requested is None or any(name in requested for name in names)
+
+    def get_requested_sources(self):
+        """ORM columns/annotations read by the requested fields."""
+        requested = self.get_requested_fields()
+        names = requested if requested is not None else self.get_available_fields()
+        sources = set()
+        for name in names:
+            sources.update(self.field_sources.get(name, [name]))
+        return sources
+
+    def get_ordering_terms(self):
+        """Fields the OrderingFilter will order by (param if valid, else default)."""
+        request = getattr(self, "request", None)
+        param = request.query_params.get("ordering", "") if request is not None else ""
+        valid = set(getattr(self, "ordering_fields", None) or [])
+        terms = [term.lstrip("-") for term in _split_param(param)]
+        terms = [term for term in terms if term in valid]
+        if not terms:
+            terms = [term.lstrip("-") for term in (getattr(self, "ordering", None) or [])]
+        return set(terms)
+
+    def annotation_needed(self, name):
+        """An annotation is needed if rendered, ordered on or filtered on by name."""
+        request = getattr(self, "request", None)
+        return (
+            name in self.get_requested_sources()
+            or name in self.get_ordering_terms()
+            or (request is not None and name in request.query_params)
+        )
+
+    def get_only_columns(self, model):
+        """Concrete model columns for `.only()` covering the requested fields."""
+        concrete = {field.name for field in model._meta.concrete_fields}
+        columns = set()
+        for source in self.get_requested_sources():
+            if source.split("__")[0] not in concrete:
+                continue  # annotation
+            columns.add(source)
+            if "__" in source:
+                # The FK itself must be loaded to traverse it with select_related
+                columns.add(source.rsplit("__", 1)[0])
+        return sorted(columns)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class FastListMixin:
+    """
+    Serve `list` from `.values()` rows through a RowSerializer instead of
+    materializing model instances and running the ModelSerializer.
+    Output is identical; disable with FAST_LIST_SERIALIZATION=False.
+    """
+
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, "FAST_LIST_SERIALIZATION", True):
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_requested_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.select_related(None).prefetch_related(None).values(
+            *self.row_serializer_class.get_columns(fields)
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            with metrics.timer("serialize"):
+                data = self.row_serializer_class(page, fields=fields).data
+            return self.get_paginated_response(data)
+        with metrics.timer("serialize"):
+            data = self.row_serializer_class(rows, fields=fields).data
+        return Response(data)
+
+
+class SnapShotView(SparseFieldsMixin, APIView):
     """
     Returns a summary of the analytics data.
+    Supports `?fields=` / `?omit=`; only the requested figures are computed.
+    """
+
+    permission_classes = [AllowAny]
+    snapshot_fields = [
+        "total_events",
+        "total_injection_attempts",
+        "total_ips",
+        "top_three_categories",
+        "top_three_paths",
+    ]
+
+    def get_available_fields(self):
+        return self.snapshot_fields
+
+    @cache_response("snapshot")
+    def get(self, request):
+        data = {}
+        if self.field_requested("total_events"):
+            data["total_events"] = BotEvent.objects.count()
+        if self.field_requested("total_injection_attempts"):
+            # link AttackTypeViewSet (default)
+            data["total_injection_attempts"] = AttackType.objects.count()
+        if self.field_requested("total_ips"):
+            # link aggregate ip viewset (default)
+            # HyperLogLog union of the daily IP sketches (exact until seeded)
+            data["total_ips"], _ = distinct.distinct_count(DistinctCounter.Dimension.IP)
+        if self.field_requested("top_three_categories"):
+            # link AttackTypeViewSet (filter by category clicked)
+            data["top_three_categories"] = list(
+                AttackType.objects.values("category")
+                .annotate(total_count=Count("id"))
+                .order_by("-total_count")[:3]
+            )
+        if self.field_requested("top_three_paths"):
+            # link aggregate path viewset (default)
+            # GROUP BY the integer path key; the three texts are looked up after
+            top = list(
+                BotEvent.objects.filter(request_path_ref__isnull=False)
+                .values("request_path_ref")
+                .annotate(total_count=Count("id"))
+                .order_by("-total_count", "request_path_ref")[:3]
+            )
+            paths = RequestPath.objects.in_bulk([row["request_path_ref"] for row in top])
+            data["top_three_paths"] = [
+                {
+                    "request_path": paths[row["request_path_ref"]].value,
+                    "total_count": row["total_count"],
+                }
+                for row in top
+            ]
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class TopView(APIView):
+    """
+    Top-K IPs, paths and attack categories from the heavy-hitter sketches.
+
+    `?dimension=ip,path,category` (default: all) and `?limit=` (default 10).
+    Reads the merged sketch table, never the event table; every item carries
+    `count` (upper bound), `min_count` (lower bound) and `guaranteed`.
     """
 
     permission_classes = [AllowAny]
+    default_limit = 10
 
+    @cache_response("top")
     def get(self, request):
-        # Optimize: Use single query with select_related/prefetch_related where possible
-        # Count queries can be combined or cached, but these are simple aggregations
-        total_events = BotEvent.objects.count()
-        total_injection_attempts = AttackType.objects.count()
-        total_ips = BotEvent.objects.values("ip_address").distinct().count()
-
-        top_three_categories = (
-            AttackType.objects.values("category")
-            .annotate(total_count=Count("id"))
-            .order_by("-total_count")[:3]
-        )
-        top_three_paths = (
-            BotEvent.objects.values("request_path")
-            .annotate(total_count=Count("id"))
-            .order_by("-total_count")[:3]
+        dimensions = (
+            _split_param(request.query_params.get("dimension")) or sketches.DIMENSIONS
         )
+        unknown = sorted(set(dimensions) - set(sketches.DIMENSIONS))
+        if unknown:
+            raise ValidationError(
+                {"dimension": [f"Unknown dimension(s): {', '.join(unknown)}"]}
+            )
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        limit = max(1, min(limit, sketches.get_capacity()))
 
-        return Response(
-            {
-                "total_events": total_events,
-                "total_injection_attempts": total_injection_attempts,  # link AttackTypeViewSet (default)
-                "total_ips": total_ips,  # link aggregate ip viewset (default)
-                "top_three_categories": top_three_categories,  # link AttackTypeViewSet (filter by category clicked)
-                "top_three_paths": top_three_paths,  # link aggregate path viewset (default)
-            },
-            status=status.HTTP_200_OK,
-        )
+        data = {dimension: sketches.top(dimension, limit) for dimension in dimensions}
+        return Response(data, status=status.HTTP_200_OK)
 
 
-class AggregatePathList(generics.ListAPIView):
+class UniquesView(APIView):
+    """
+    Distinct counts from the daily HyperLogLog sketches.
+
+    `?dimension=ip|email|agent|path_ip` (default ip), `?path=` (required for
+    path_ip), `?start=` / `?end=` (inclusive ISO dates). Returns the total over
+    the range and one figure per day; `approximate` is false when the exact
+    fallback answered.
+    """
+
+    permission_classes = [AllowAny]
+
+    def _date_param(self, request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: ["Enter a date as YYYY-MM-DD."]})
+        return parsed
+
+    @cache_response("uniques")
+    def get(self, request):
+        dimension = request.query_params.get("dimension") or DistinctCounter.Dimension.IP
+        if dimension not in DistinctCounter.Dimension.values:
+            raise ValidationError({"dimension": [f"Unknown dimension: {dimension}"]})
+        key = ""
+        if dimension == DistinctCounter.Dimension.PATH_IP:
+            key = request.query_params.get("path", "")
+            if not key:
+                raise ValidationError({"path": ["Required for the path_ip dimension."]})
+        start = self._date_param(request, "start")
+        end = self._date_param(request, "end")
+
+        total, approximate = distinct.distinct_count(dimension, key, start, end)
+        days, _ = distinct.daily_counts(dimension, key, start, end, exact=not approximate)
+        data = {
+            "dimension": dimension,
+            "path": key or None,
+            "total": total,
+            "approximate": approximate,
+            "relative_error": distinct.RELATIVE_ERROR if approximate else 0.0,
+            "days": [{"day": day, "count": count} for day, count in days],
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AggregatePathList(SparseFieldsMixin, generics.ListAPIView):
     """
     Read-only ViewSet for aggregated path analytics with filtering, searching, and ordering.
     """
@@ -80,7 +337,7 @@ class AggregatePathList(generics.ListAPIView):
     serializer_class = PathAnalyticsSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = AggregatePathFilter
-    search_fields = ["request_path"]
+    search_fields = ["value"]
     ordering_fields = [
         "traffic_count",
         "scan_count",
@@ -95,31 +352,39 @@ class AggregatePathList(generics.ListAPIView):
         "request_path",
     ]
 
+    @cache_response("aggregate-paths")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_queryset(self):
-        # path_names
-        queryset = BotEvent.objects.values(
-            "request_path"
-        ).annotate(
-            traffic_count=Count("id"),
+        # path_names: grouped on the integer RequestPath key, text joined once per path
+        annotations = dict(
+            traffic_count=Count("bot_events"),
             scan_count=Count(
-                "id", filter=Q(event_category=BotEvent.EventCategory.SCAN)
+                "bot_events",
+                filter=Q(bot_events__event_category=BotEvent.EventCategory.SCAN),
             ),
             spam_count=Count(
-                "id", filter=Q(event_category=BotEvent.EventCategory.SPAM)
+                "bot_events",
+                filter=Q(bot_events__event_category=BotEvent.EventCategory.SPAM),
             ),
             attack_count=Count(
-                "id", filter=Q(event_category=BotEvent.EventCategory.ATTACK)
+                "bot_events",
+                filter=Q(bot_events__event_category=BotEvent.EventCategory.ATTACK),
             ),
-            created_at=Max("created_at"),  # Most recent event per path,
+            created_at=Max("bot_events__created_at"),  # Most recent event per path,
             attacks_used=ListAgg(
                 Case(
-                    When(attack_attempted=True, then=F("attacks__category")),
+                    When(
+                        bot_events__attack_attempted=True,
+                        then=F("bot_events__attacks__category"),
+                    ),
                     default=Value(None)
                 )
             ),
             most_popular_attack=Subquery(
                 AttackType.objects.filter(
-                    bot_event__request_path=OuterRef("request_path")
+                    bot_event__request_path_ref=OuterRef("pk")
                 )
                 .values("category")
                 .annotate(count=Count("id"))
@@ -127,10 +392,148 @@ class AggregatePathList(generics.ListAPIView):
                 .values_list("category", flat=True)[:1]
             ),
         )
+        # traffic_count is always kept: it is what makes this a GROUP BY (on the
+        # path key; PostgreSQL drops the dependent text columns from it).
+        # Paths whose events were all archived/deleted drop out.
+        queryset = (
+            RequestPath.objects.filter(bot_events__isnull=False)
+            .annotate(
+                request_path=F("value"),
+                **{
+                    name: expression
+                    for name, expression in annotations.items()
+                    if name == "traffic_count" or self.annotation_needed(name)
+                }
+            )
+        )
         return queryset
 
 
-class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
+class AggregateSubnetList(SparseFieldsMixin, generics.ListAPIView):
+    """
+    Events grouped by subnet. `?prefix=` sets the IPv4 prefix length (default
+    SUBNET_PREFIX_V4) and `?prefix6=` the IPv6 one (default SUBNET_PREFIX_V6,
+    at most 64). Groups on the masked integer IP key, no address text is parsed.
+    """
+
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+    serializer_class = SubnetAnalyticsSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = SubnetFilter
+    ordering_fields = ["traffic_count", "ip_count", "attack_count", "created_at"]
+    ordering = ["-traffic_count", "ip_version", "subnet_key"]
+
+    @cache_response("aggregate-subnets")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_prefixes(self):
+        """{ip_version: prefix length} from the query string."""
+        params = self.request.query_params
+        prefixes = {}
+        for version, param, default in (
+            (4, "prefix", getattr(settings, "SUBNET_PREFIX_V4", 24)),
+            (6, "prefix6", getattr(settings, "SUBNET_PREFIX_V6", 48)),
+        ):
+            value = params.get(param, default)
+            try:
+                prefixes[version] = int(value)
+                subnet_mask(version, prefixes[version])
+            except ValueError:
+                raise ValidationError(
+                    {param: [f"Must be an integer between 0 and {MAX_PREFIX[version]}."]}
+                )
+        return prefixes
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["prefixes"] = self.get_prefixes()
+        return context
+
+    def get_queryset(self):
+        prefixes = self.get_prefixes()
+        subnet_key = Case(
+            When(ip_version=4, then=F("ip_int").bitand(subnet_mask(4, prefixes[4]))),
+            default=F("ip_int").bitand(subnet_mask(6, prefixes[6])),
+            output_field=BigIntegerField(),
+        )
+        annotations = dict(
+            traffic_count=Count("id"),
+            ip_count=Count("ip_int", distinct=True),
+            attack_count=Count(
+                "id", filter=Q(event_category=BotEvent.EventCategory.ATTACK)
+            ),
+            created_at=Max("created_at"),
+        )
+        # traffic_count is always kept: it is what makes this a GROUP BY
+        return (
+            BotEvent.objects.filter(ip_int__isnull=False)
+            .annotate(subnet_key=subnet_key)
+            .values("ip_version", "subnet_key")
+            .annotate(
+                **{
+                    name: expression
+                    for name, expression in annotations.items()
+                    if name == "traffic_count" or self.annotation_needed(name)
+                }
+            )
+        )
+
+
+class AgentAggregateList(SparseFieldsMixin, generics.ListAPIView):
+    """
+    Events grouped by parsed user-agent family. Reads the columns stored on
+    the UserAgent dimension at ingest; no user-agent string is parsed here.
+    """
+
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+    serializer_class = AgentAnalyticsSerializer
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = AgentFilter
+    ordering_fields = [
+        "traffic_count",
+        "attack_count",
+        "agent_count",
+        "ip_count",
+        "family",
+        "created_at",
+    ]
+    ordering = ["-traffic_count", "family"]
+
+    @cache_response("agents")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        annotations = dict(
+            traffic_count=Count("bot_events"),
+            attack_count=Count(
+                "bot_events",
+                filter=Q(bot_events__event_category=BotEvent.EventCategory.ATTACK),
+            ),
+            agent_count=Count("id", distinct=True),
+            ip_count=Count("bot_events__ip_address", distinct=True),
+            created_at=Max("bot_events__created_at"),
+        )
+        # GROUP BY the two parsed columns of the (small) agent dimension table
+        return (
+            UserAgent.objects.filter(bot_events__isnull=False)
+            .values("family", "is_automation_tool")
+            .annotate(
+                **{
+                    name: expression
+                    for name, expression in annotations.items()
+                    if name == "traffic_count" or self.annotation_needed(name)
+                }
+            )
+        )
+
+
+class AggregateIPViewSet(
+    ProfilingMixin, SparseFieldsMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Read-only ViewSet for aggregated IP analytics with filtering, searching, and ordering.
 
@@ -171,14 +574,15 @@ class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
             base_queryset: Optional base queryset to annotate. If None, uses BotEvent.objects.
 
         Returns:
-            Annotated queryset grouped by ip_address.
+            Annotated queryset grouped by ip_address. Annotations (and their
+            subqueries) are only added when rendered, ordered or filtered on.
         """
         if base_queryset is None:
             base_queryset = BotEvent.objects
 
         # Note: Subqueries are necessary due to different ordering requirements
         # PostgreSQL can optimize these with proper indexes on (ip_address, created_at)
-        return base_queryset.values("ip_address").annotate(
+        annotations = dict(
             traffic_count=Count("id"),
             scan_count=Count(
                 "id", filter=Q(event_category=BotEvent.EventCategory.SCAN)
@@ -198,8 +602,7 @@ class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
             referer=Subquery(
                 BotEvent.objects.filter(ip_address=OuterRef("ip_address"))
                 .order_by("created_at")
-                .values("referer")[:1]
-                .values_list("referer", flat=True)
+                .values_list("referer_ref__value", flat=True)[:1]
             ),
             emails_used=ListAgg(
                 Case(
@@ -211,8 +614,7 @@ class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
             agent=Subquery(
                 BotEvent.objects.filter(ip_address=OuterRef("ip_address"))
                 .order_by("created_at")
-                .values("agent")[:1]
-                .values_list("agent", flat=True)
+                .values_list("agent_ref__value", flat=True)[:1]
             ),
             language=Subquery(
                 BotEvent.objects.filter(ip_address=OuterRef("ip_address"))
@@ -228,6 +630,82 @@ class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
             ),
             created_at=Max("created_at"),  # Most recent event per IP
         )
+        request = getattr(self, "request", None)
+        searching = request is not None and request.query_params.get("search", "").strip()
+        # traffic_count is always kept: it is what makes this a GROUP BY
+        return base_queryset.values("ip_address").annotate(
+            **{
+                name: expression
+                for name, expression in annotations.items()
+                if name == "traffic_count"
+                or self.annotation_needed(name)
+                or (name == "referer" and searching)  # search matches first referer
+            }
+        )
+
+    @cache_response("aggregate-ips-list")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response("aggregate-ips-detail")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=True, methods=["get"])
+    @cache_response("aggregate-ips-timeline")
+    def timeline(self, request, *args, **kwargs):
+        """
+        Time-ordered activity stream for one IP, newest first.
+
+        Keyset-paginated on (created_at, id) with `?before=`/`?after=` cursors,
+        so deep pages cost the same as the first. Each event carries the gap to
+        the previous event from this IP and its attack categories; the page
+        also returns the run-length compressed path sequence.
+        """
+        ip_address = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        paginator = TimelineKeysetPagination()
+        # Event columns held in botevent_ip_timeline_idx, plus the path text
+        # joined from its dimension key
+        queryset = BotEvent.objects.filter(ip_address=ip_address).values(
+            *IPTimelineRowSerializer.columns
+        )
+        rows = paginator.paginate_queryset(queryset, request)
+        paging = "before" in request.query_params or "after" in request.query_params
+        if not rows and not paging:
+            raise NotFound("No IP analytics found for this IP address.")
+
+        categories = {}
+        attacked = [row["id"] for row in rows if row["attack_attempted"]]
+        if attacked:
+            for bot_event_id, category in (
+                AttackType.objects.filter(bot_event_id__in=attacked)
+                .order_by("bot_event_id", "category")
+                .values_list("bot_event_id", "category")
+                .distinct()
+            ):
+                categories.setdefault(bot_event_id, []).append(category)
+
+        # Rows are newest first: each gap is measured to the next (older) row
+        older = [row["created_at"] for row in rows[1:]] + [paginator.predecessor]
+        path_sequence = []
+        for row, previous_at in zip(rows, older):
+            row["attack_categories"] = categories.get(row["id"], [])
+            row["gap_seconds"] = (
+                round((row["created_at"] - previous_at).total_seconds(), 3)
+                if previous_at is not None
+                else None
+            )
+            path = row["request_path_ref__value"]
+            if path_sequence and path_sequence[-1]["request_path"] == path:
+                path_sequence[-1]["count"] += 1
+            else:
+                path_sequence.append({"request_path": path, "count": 1})
+
+        return paginator.get_paginated_response(
+            IPTimelineRowSerializer(rows).data,
+            ip_address=ip_address,
+            path_sequence=path_sequence,
+        )
 
     def get_queryset(self):
         """Get the base queryset with annotations for IP analytics."""
@@ -304,7 +782,13 @@ class AggregateIPViewSet(viewsets.ReadOnlyModelViewSet):
         return IPAnalyticsListSerializer
 
 
-class BotEventViewSet(viewsets.ReadOnlyModelViewSet):
+class BotEventViewSet(
+    ProfilingMixin,
+    SparseFieldsMixin,
+    FastListMixin,
+    ExportMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     Read-only ViewSet for BotEvent with advanced filtering, searching, and ordering.
 
@@ -313,27 +797,34 @@ class BotEventViewSet(viewsets.ReadOnlyModelViewSet):
 
     retrieve:
     Returns a single bot event with all related attack details.
+
+    export:
+    Streams every matching bot event as NDJSON (default) or CSV (`?format=csv`).
     """
 
-    queryset = BotEvent.objects.prefetch_related("attacks").all()
+    queryset = BotEvent.objects.all()
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
     filter_backends = [
         DjangoFilterBackend,
-        SearchFilter,
+        PayloadSearchFilter,
         OrderingFilter,
     ]
     filterset_class = BotEventFilter
+    row_serializer_class = BotEventListRowSerializer
+    export_fields = BOT_EVENT_EXPORT_FIELDS
+    export_basename = "bot-events"
 
     # Search fields (for SearchFilter)
     search_fields = [
         "email",
-        "data",
-        "referer",
+        "data_payload__contains_text",  # Submitted data (shared payloads)
+        "data_details",  # Submitted data stored inline before the payload store
+        "referer_ref__value",
         "ip_address",
         "geo_location",
-        "agent",
-        "request_path",
+        "agent_ref__value",
+        "request_path_ref__value",
         "attacks__raw_value",  # Search in attack raw values
     ]
 
@@ -345,24 +836,49 @@ class BotEventViewSet(viewsets.ReadOnlyModelViewSet):
         "attack_count",
     ]
     ordering = ["-created_at"]
+    field_sources = {
+        # Interned columns are read through their dimension keys
+        "request_path": ["request_path_ref__value"],
+        "agent": ["agent_ref__value"],
+        "referer": ["referer_ref__value"],
+        "agent_snapshot": ["agent_ref__family", "agent_ref__version"],
+        "agent_family": ["agent_ref__family"],
+        "data_details": [
+            "data_details",
+            "data_payload__content",
+            "data_payload__compressed",
+        ],
+    }
 
     def get_queryset(self):
-        """Annotate queryset with attack count for ordering."""
-        from django.db.models import Count
-
+        """
+        Load only the columns the requested fields need (the list never loads
+        data_details) and annotate attack count/categories only when rendered
+        or ordered on.
+        """
         queryset = super().get_queryset()
+        sources = self.get_requested_sources()
+        if "data_details" in sources:
+            queryset = queryset.select_related("data_payload")
+        # Interned and parsed columns come from the dimension tables
+        related = {source.split("__")[0] for source in sources if "_ref__" in source}
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        queryset = queryset.only(*self.get_only_columns(BotEvent))
 
         # Annotate with attack count for ordering
-        queryset = queryset.annotate(attack_count=Count("attacks"))
+        if self.annotation_needed("attack_count"):
+            queryset = queryset.annotate(attack_count=Count("attacks"))
         # get attack categories
-        queryset = queryset.annotate(
-            attack_categories=ListAgg(
-                Case(
-                    When(attack_attempted=True, then=F("attacks__category")),
-                    default=Value(None)
+        if self.annotation_needed("attack_categories"):
+            queryset = queryset.annotate(
+                attack_categories=ListAgg(
+                    Case(
+                        When(attack_attempted=True, then=F("attacks__category")),
+                        default=Value(None)
+                    )
                 )
             )
-        )
 
         return queryset
 
@@ -373,7 +889,9 @@ class BotEventViewSet(viewsets.ReadOnlyModelViewSet):
         return BotEventListSerializer
 
 
-class AttackTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class AttackTypeViewSet(
+    SparseFieldsMixin, FastListMixin, ExportMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Read-only ViewSet for AttackType with advanced filtering, searching, and ordering.
 
@@ -382,28 +900,55 @@ class AttackTypeViewSet(viewsets.ReadOnlyModelViewSet):
 
     retrieve:
     Returns a single attack with full details and linked BotEvent information.
+
+    export:
+    Streams every matching attack as NDJSON (default) or CSV (`?format=csv`).
     """
 
     # filtered by CATEGORY on snapshot view + path analytics view
 
-    queryset = AttackType.objects.select_related("bot_event").all()
+    queryset = AttackType.objects.all()
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = AttackTypeFilter
+    row_serializer_class = AttackTypeListRowSerializer
+    export_fields = ATTACK_TYPE_EXPORT_FIELDS
+    export_basename = "attacks"
     search_fields = [
         "category",
         "pattern",
         "target_field",
-        "bot_event__request_path",
+        "bot_event__request_path_ref__value",
         "raw_value",
         "bot_event__email",
-        "bot_event__referer",
+        "bot_event__referer_ref__value",
     ]
     ordering_fields = [
         "created_at",
     ]
     ordering = ["-created_at"]  # Default ordering (newest first)
+    field_sources = {
+        "bot_event_id": ["bot_event__id"],
+        "ip_address": ["bot_event__ip_address"],
+        "request_path": ["bot_event__request_path_ref__value"],
+        "full_value": [
+            "full_value",
+            "full_value_payload__content",
+            "full_value_payload__compressed",
+        ],
+    }
+
+    def get_queryset(self):
+        """Join bot_event only for the requested event columns, never its payload."""
+        queryset = super().get_queryset()
+        if self.field_requested("request_path"):
+            queryset = queryset.select_related("bot_event__request_path_ref")
+        elif self.field_requested("bot_event_id", "ip_address"):
+            queryset = queryset.select_related("bot_event")
+        if "full_value" in self.get_requested_sources():
+            queryset = queryset.select_related("full_value_payload")
+        return queryset.only(*self.get_only_columns(AttackType))
 
     def get_serializer_class(self):
         """Use detail serializer for retrieve, list serializer for list."""
@@ -412,6 +957,59 @@ class AttackTypeViewSet(viewsets.ReadOnlyModelViewSet):
         return AttackTypeListSerializer
 
 
+class CorrelationSessionViewSet(SparseFieldsMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only ViewSet for GET→POST correlation sessions.
+
+    list:
+    Returns a paginated list of sessions with time-to-submit and fill speed,
+    filterable by IP, path and timing ranges.
+
+    retrieve:
+    Returns a single session.
+    """
+
+    queryset = CorrelationSession.objects.all()
+    serializer_class = CorrelationSessionSerializer
+    permission_classes = [AllowAny]
+    pagination_class = StandardResultsSetPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = CorrelationSessionFilter
+    ordering_fields = [
+        "first_submitted_at",
+        "time_to_submit_ms",
+        "chars_per_second",
+        "submit_count",
+    ]
+    ordering = ["-first_submitted_at"]
+    field_sources = {"post_event_id": ["post_event"]}
+
+    def get_queryset(self):
+        return super().get_queryset().only(*self.get_only_columns(CorrelationSession))
+
+
+class ProfileView(APIView):
+    """
+    A stored request profile (see myapp/profiling.py), staff only.
+
+    `download=True` serves the raw cProfile stats instead of the JSON report.
+    """
+
+    permission_classes = [IsAdminUser]
+    download = False
+
+    def get(self, request, profile_id):
+        suffix = ".prof" if self.download else ".json"
+        stored = profiling.stored_file(profile_id, suffix)
+        if stored is None:
+            raise NotFound("Unknown profile.")
+        if self.download:
+            return FileResponse(
+                open(stored, "rb"), as_attachment=True, filename=stored.name
+            )
+        return FileResponse(open(stored, "rb"), content_type="application/json")
+
+
 class HoneypotView(APIView):
     """
     Logs GET and POST bot activity, detects XSS, and correlates follow-up requests.
@@ -426,87 +1024,18 @@ class HoneypotView(APIView):
         else:
             # For POST, PUT, PATCH, DELETE - use request.data
             params = request.data if hasattr(request, "data") and request.data else {}
-
-        meta_data = extract_meta_data(request.META)
-        # Use extract_email_from_payload which handles QueryDict lists, validates format, and checks multiple fields
-        email = extract_email_from_payload(params)
-
-        # Optimize: Collect all attacks and use bulk_create instead of individual creates
-        # This reduces N database writes to 1
-        attacks_to_create = []
-        attacks_found = False
-
-        # Check for attacks before creating the event (to determine category)
-        # Ensure params is dict-like and iterable
-        if params:
-            for key, value in params.items():
-                attack_list = extract_attacks(value)
-                if attack_list:
-                    for attack in attack_list:
-                        pattern, category, match = attack
-                        attacks_to_create.append(
-                            AttackType(
-                                target_field=key,
-                                pattern=pattern,
-                                raw_value=match,
-                                category=category.value,  # Convert enum to string value
-                                # for full context
-                                full_value=value,
-                            )
-                        )
-                    attacks_found = True
-
-        # Extract submission data information
-        if params and isinstance(params, dict):
-            data_present = True
-            field_count = len(params)
-            target_fields = list(params.keys())
-            data_details = dict(params)  # Store all param data
-        else:
-            data_present = False
-            field_count = 0
-            target_fields = None
-            data_details = None
-
-        # Create main BotEvent
-        bot_event = BotEvent.objects.create(
-            method=method_type,
-            ip_address=meta_data["ip_address"],
-            geo_location=meta_data["geo_location"],
-            agent=meta_data["agent"],
-            referer=meta_data["referer"],
-            language=meta_data["lang"],
-            origin=meta_data["origin"],
-            request_path=request.path,
-            correlation_token=ctoken,
-            email=email,
-            attack_attempted=attacks_found,
-            # submission data
-            data_present=data_present,
-            field_count=field_count,
-            target_fields=target_fields,
-            data_details=data_details,
-        )
-
-        # Set event category using the model method
-        bot_event.set_category()
-
-        # Bulk create all attacks in a single query (now that bot_event exists)
-        if attacks_to_create:
-            for attack in attacks_to_create:
-                attack.bot_event = bot_event
-            AttackType.objects.bulk_create(attacks_to_create)
+            if params and request.FILES:
+                params = honeypot.with_file_names(params, request.FILES)
+        return honeypot.log_event(request, method_type, params, ctoken)
 
     def get(self, request):
-        # Create a correlation token
-        ctoken = uuid4()
+        # Create a signed correlation token carrying the issue time
+        ctoken, signed_ctoken = issue_token()
 
         self._log_event(request, "GET", ctoken)
-        context = {
-            "ctoken": ctoken,
-        }
 
-        return render(request, "fake_form.html", context)
+        # Pre-rendered decoy page for this path with the token spliced in
+        return decoys.response(request.path_info, signed_ctoken)
 
     #
     # POST → logs XSS in posted form data, correlates via ctoken
@@ -514,11 +1043,14 @@ class HoneypotView(APIView):
     def post(self, request):
         # Get correlation token from form submission (created in GET request)
         # If not present, create new one (for direct POST requests)
-        ctoken = request.data.get("ctoken")
-        if not ctoken:
+        ctoken, issued_at = parse_token(request.data.get("ctoken"))
+        from_form = ctoken is not None
+        if not from_form:
             ctoken = uuid4()
 
-        self._log_event(request, "POST", ctoken)
+        bot_event = self._log_event(request, "POST", ctoken)
+        if from_form:
+            record_submission(ctoken, issued_at, bot_event, request.data, request.path)
 
         return Response({"status": "ok"}, status=status.HTTP_200_OK)
 